@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.cache import report_cache
+from app.db import engine, pool_stats
+from app.schemas import PoolStatusOut, ReportCacheOut
+from app.settings import settings
+
+router = APIRouter(prefix="/admin")
+
+
+@router.get("/pool", response_model=PoolStatusOut)
+async def pool_status() -> dict:
+    pool = engine.pool
+    checkouts = pool_stats.checkouts
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "timeout_s": settings.db_pool_timeout,
+        "recycle_s": settings.db_pool_recycle,
+        "pre_ping": settings.db_pool_pre_ping,
+        "statement_cache_size": settings.db_statement_cache_size,
+        "checked_out": pool.checkedout(),  # type: ignore[attr-defined]
+        "checked_in": pool.checkedin(),  # type: ignore[attr-defined]
+        # QueuePool reports overflow relative to pool_size, negative while the pool is still filling
+        "overflow": max(pool.overflow(), 0),  # type: ignore[attr-defined]
+        "waiting": pool_stats.waiting,
+        "checkouts": checkouts,
+        "checkout_timeouts": pool_stats.timeouts,
+        "checkout_latency_avg_ms": pool_stats.checkout_seconds_total / checkouts * 1000 if checkouts else 0.0,
+        "checkout_latency_max_ms": pool_stats.checkout_seconds_max * 1000,
+    }
+
+
+@router.get("/report-cache", response_model=ReportCacheOut)
+async def report_cache_status() -> dict:
+    return {
+        "entries": len(report_cache),
+        "size_bytes": report_cache.size,
+        "max_bytes": report_cache.max_bytes,
+        "hits": report_cache.hits,
+        "misses": report_cache.misses,
+        "evictions": report_cache.evictions,
+    }
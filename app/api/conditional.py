@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.refdata import CHANGED_US_SQL, DataVersion
+
+# Counters are bumped by triggers / sp_refresh_due_mviews (see migration 0008)
+_DATA_VERSION_SQL = text(
+    f"SELECT version, {CHANGED_US_SQL} AS changed_us FROM metrology.data_version WHERE name = :name"
+)
+
+# Clients may keep the body but must revalidate before reusing it
+CACHE_CONTROL = "no-cache"
+
+
+async def fetch_data_version(conn: AsyncConnection, name: str) -> DataVersion:
+    row = (await conn.execute(_DATA_VERSION_SQL, {"name": name})).first()
+    return DataVersion(row.version, row.changed_us) if row else DataVersion(0, 0)
+
+
+async def data_version_etag(conn: AsyncConnection, name: str) -> str:
+    # Read before the data itself: a change in between yields a body newer than its tag,
+    # which only costs the client one extra full response.
+    return (await fetch_data_version(conn, name)).etag(name)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
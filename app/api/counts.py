@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Literal
+from uuid import UUID
+
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql.elements import TextClause
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+# Which mode produced the header: exact falls back to estimate for filters without a counter
+TOTAL_COUNT_MODE_HEADER = "X-Total-Count-Mode"
+
+CountMode = Literal["estimate", "exact"]
+COUNT_DESCRIPTION = (
+    f"Put the size of the filtered list in {TOTAL_COUNT_HEADER}: estimate (planner statistics) "
+    f"or exact (trigger-maintained counters; the mode used is in {TOTAL_COUNT_MODE_HEADER})"
+)
+
+# The planner's own extrapolation: tuple density from the last ANALYZE times the current size.
+# NULL when the table has never been analyzed.
+_RELTUPLES_SQL = text(
+    """
+    SELECT (c.reltuples / c.relpages * (pg_relation_size(c.oid) / current_setting('block_size')::int))::bigint
+    FROM pg_class c
+    WHERE c.oid = CAST(:table AS regclass) AND c.reltuples >= 0 AND c.relpages > 0
+    """
+)
+
+# Counters are kept by the row count triggers (see migration 0012)
+_ROW_COUNT_SQL = text("SELECT coalesce(sum(n), 0)::bigint FROM metrology.row_count WHERE table_name = :table_name")
+_ORG_UNIT_ROW_COUNT_SQL = text(
+    "SELECT coalesce(sum(n), 0)::bigint FROM metrology.row_count "
+    "WHERE table_name = :table_name AND org_unit_id = :org_unit_id"
+)
+
+
+@lru_cache(maxsize=256)
+def _explain_sql(table: str, where: tuple[str, ...]) -> TextClause:
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    return text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} {where_sql}")
+
+
+async def estimate_count(conn: AsyncConnection, table: str, where: list[str], params: dict[str, Any]) -> int:
+    """Row estimate from statistics alone; neither the table nor an index is scanned."""
+    if not where:
+        n = (await conn.execute(_RELTUPLES_SQL, {"table": table})).scalar_one_or_none()
+        if n is not None:
+            return n
+    # Planned with the bound values, so selective filters get their own estimate
+    plan = (await conn.execute(_explain_sql(table, tuple(where)), params)).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def exact_count(conn: AsyncConnection, table_name: str, org_unit_id: UUID | None = None) -> int:
+    if org_unit_id is None:
+        res = await conn.execute(_ROW_COUNT_SQL, {"table_name": table_name})
+    else:
+        res = await conn.execute(_ORG_UNIT_ROW_COUNT_SQL, {"table_name": table_name, "org_unit_id": org_unit_id})
+    return res.scalar_one()
+
+
+def set_total_count(response: Response, count: int, mode: CountMode) -> None:
+    response.headers[TOTAL_COUNT_HEADER] = str(count)
+    response.headers[TOTAL_COUNT_MODE_HEADER] = mode
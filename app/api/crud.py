@@ -0,0 +1,695 @@
+from __future__ import annotations
+
+import inspect
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, get_args
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql.elements import TextClause
+
+from app.api.conditional import data_version_etag, etag_matches, not_modified, set_etag
+from app.api.counts import COUNT_DESCRIPTION, CountMode, estimate_count, exact_count, set_total_count
+from app.api.pagination import NEXT_CURSOR_HEADER, Keyset
+from app.db import get_read_conn
+from app.refdata import refdata
+from app.schemas import LookupIn, LookupOut
+from app.settings import settings
+from app.transactions import TransactionRunner, get_tx
+
+CURSOR_DESCRIPTION = f"Opaque keyset cursor taken from the {NEXT_CURSOR_HEADER} header of the previous page"
+
+MISSING_IDS_HEADER = "X-Missing-Ids"
+# ?ids= has to fit in a URL; bigger batches go through POST <path>/lookup
+LOOKUP_QUERY_MAX_IDS = 200
+IDS_DESCRIPTION = (
+    f"Fetch these ids in the given order instead of a page (up to {LOOKUP_QUERY_MAX_IDS}); "
+    f"ids without a row are listed in {MISSING_IDS_HEADER}"
+)
+
+
+@lru_cache(maxsize=4096)
+def sql(stmt: str) -> TextClause:
+    # text() parses bind params on construction; identical statements share one object
+    return text(stmt)
+
+
+async def fetch_all(conn: AsyncConnection, stmt: str, params: dict) -> list[dict]:
+    res = await conn.execute(sql(stmt), params)
+    return [dict(r._mapping) for r in res.fetchall()]
+
+
+async def fetch_one(conn: AsyncConnection, stmt: str, params: dict) -> dict | None:
+    res = await conn.execute(sql(stmt), params)
+    row = res.fetchone()
+    return dict(row._mapping) if row else None
+
+
+@lru_cache(maxsize=1024)
+def _page_sql(select_sql: str, keyset: Keyset, where: tuple[str, ...]) -> str:
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    return f"{select_sql} {where_sql} ORDER BY {keyset.order_by_sql()} LIMIT :limit OFFSET :offset"
+
+
+def json_timestamp_sql(expr: str) -> str:
+    """
+    `expr` (timestamptz) as the string pydantic emits for it: UTC with a "Z", microseconds only when non-zero.
+
+    json_build_object() would render it in the session TimeZone ("+00:00", "+03:00", ...).
+    """
+    utc = f"(({expr}) AT TIME ZONE 'UTC')"
+    return (
+        f"to_char({utc}, 'YYYY-MM-DD\"T\"HH24:MI:SS')"
+        f" || CASE WHEN date_part('microseconds', {utc})::int % 1000000 = 0 THEN '' ELSE to_char({utc}, '.US') END"
+        " || 'Z'"
+    )
+
+
+def json_object_args(model: type[BaseModel], columns: tuple[str, ...], alias: str) -> str:
+    """json_build_object() arguments for `columns` of `alias`, rendered the way `model` serializes them."""
+    args = []
+    for c in columns:
+        annotation = model.model_fields[c].annotation
+        is_datetime = annotation is datetime or datetime in get_args(annotation)
+        args.append(f"'{c}', {json_timestamp_sql(f'{alias}.{c}') if is_datetime else f'{alias}.{c}'}")
+    return ", ".join(args)
+
+
+@lru_cache(maxsize=1024)
+def _page_json_sql(
+    select_sql: str, out_model: type[BaseModel], columns: tuple[str, ...], keyset: Keyset, where: tuple[str, ...]
+) -> str:
+    # Keys in `columns` order, the same order pydantic emits the *Out fields in.
+    # The extra look-ahead row is dropped here; its predecessor's key becomes the cursor.
+    obj = json_object_args(out_model, columns, "p")
+    key = ", ".join(f"p.{c}" for c in keyset.names)
+    return f"""
+        SELECT
+          coalesce(json_agg(json_build_object({obj}) ORDER BY p._n) FILTER (WHERE p._n <= :page_size), '[]')::text,
+          (json_agg(json_build_array({key})) FILTER (WHERE p._n = :page_size))::text,
+          count(*) > :page_size
+        FROM (
+          SELECT q.*, row_number() OVER (ORDER BY {keyset.order_by_sql()}) AS _n
+          FROM ({_page_sql(select_sql, keyset, where)}) q
+        ) p
+    """
+
+
+def _page_params(
+    keyset: Keyset, limit: int, offset: int, cursor: str | None, where: list[str] | None, params: dict[str, Any] | None
+) -> tuple[tuple[str, ...], dict[str, Any]]:
+    where = list(where or [])
+    # One extra row tells whether there is a next page without a count(*)
+    params = {**(params or {}), "limit": limit + 1, "offset": offset}
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status_code=400, detail="cursor and offset are mutually exclusive")
+        where.append(keyset.after_sql())
+        params.update(keyset.decode(cursor))
+    return tuple(where), params
+
+
+async def fetch_page(
+    conn: AsyncConnection,
+    response: Response,
+    *,
+    select_sql: str,
+    keyset: Keyset,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    where: list[str] | None = None,
+    params: dict[str, Any] | None = None,
+) -> list[dict]:
+    where_, params = _page_params(keyset, limit, offset, cursor, where, params)
+    rows = await fetch_all(conn, _page_sql(select_sql, keyset, where_), params)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = keyset.encode_row(rows[-1])
+    return rows
+
+
+@lru_cache(maxsize=128)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])  # type: ignore[valid-type]
+
+
+async def fetch_page_json(
+    conn: AsyncConnection,
+    *,
+    out_model: type[BaseModel],
+    select_sql: str,
+    keyset: Keyset,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    where: list[str] | None = None,
+    params: dict[str, Any] | None = None,
+    columns: tuple[str, ...] | None = None,
+) -> Response:
+    """
+    Same page as `fetch_page`, rendered to JSON by Postgres and passed through as bytes.
+
+    `out_model` fields name the JSON keys unless a `columns` subset is given; with
+    `json_passthrough_validate` on, full rows are checked against `list[out_model]`
+    before they are sent.
+    """
+    where_, params = _page_params(keyset, limit, offset, cursor, where, params)
+    stmt = _page_json_sql(select_sql, out_model, columns or tuple(out_model.model_fields), keyset, where_)
+    res = await conn.execute(sql(stmt), {**params, "page_size": limit})
+    body, last_key, has_more = res.one()
+    if settings.json_passthrough_validate and columns is None:
+        _list_adapter(out_model).validate_json(body)
+
+    headers = {NEXT_CURSOR_HEADER: keyset.encode(json.loads(last_key)[0])} if has_more else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@dataclass(frozen=True)
+class CodeLookup:
+    """Payload field carrying a lookup-table code that is stored as an id column."""
+
+    field: str
+    column: str
+    table: str
+    detail: str
+
+
+@dataclass(frozen=True)
+class ListFilter:
+    """
+    Optional list query parameter; when given, `condition` (bound as `:param`) narrows the page.
+
+    With `lookup` set the parameter carries a lookup-table code and is bound as its id.
+    """
+
+    param: str
+    annotation: Any
+    condition: str
+    description: str | None = None
+    lookup: CodeLookup | None = None
+
+
+@dataclass(frozen=True)
+class Expansion:
+    """`expand=<name>` embeds the `table` row referenced by `column`, shaped as `out_model`."""
+
+    name: str
+    column: str
+    table: str
+    out_model: type[BaseModel]
+
+    @property
+    def sql(self) -> str:
+        return f"SELECT {', '.join(self.out_model.model_fields)} FROM {self.table} WHERE id = ANY(:ids)"
+
+
+async def load_expansions(conn: AsyncConnection, rows: list[dict], expansions: list[Expansion]) -> None:
+    """Batched loader: one query per expansion for the whole page, never one per row."""
+    for exp in expansions:
+        ids = list({row[exp.column] for row in rows if row[exp.column] is not None})
+        found = {r["id"]: r for r in await fetch_all(conn, exp.sql, {"ids": ids})} if ids else {}
+        for row in rows:
+            row[exp.name] = found.get(row[exp.column])
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    Declarative description of one entity exposed as CRUD routes.
+
+    Selected columns are the fields of `out_model`; insert/update columns are the
+    fields of `create_model`/`update_model` with code lookups replaced by their id column.
+    """
+
+    path: str
+    table: str
+    entity: str
+    plural: str
+    out_model: type[BaseModel]
+    keyset: Keyset
+    create_model: type[BaseModel] | None = None
+    update_model: type[BaseModel] | None = None
+    code_lookups: tuple[CodeLookup, ...] = ()
+    # Columns filled from a fixed lookup code on create: (column, table, code)
+    create_defaults: tuple[tuple[str, str, str], ...] = ()
+    casts: dict[str, str] = field(default_factory=dict)
+    filters: tuple[ListFilter, ...] = ()
+    # Lists with expansions also accept fields= (column subset) and expand=
+    expansions: tuple[Expansion, ...] = ()
+    deletable: bool = True
+    # List answers If-None-Match from metrology.data_version (table needs the bump trigger)
+    versioned: bool = False
+    # count=exact also reads the per-org-unit counters for an org_unit_id-only filter (see migration 0012)
+    org_unit_counts: bool = False
+
+    @property
+    def id_param(self) -> str:
+        return f"{self.entity}_id"
+
+    @property
+    def version_name(self) -> str:
+        return self.table.rpartition(".")[2]
+
+
+class Crud:
+    """SQL for one TableSpec, compiled once at import time."""
+
+    def __init__(self, spec: TableSpec) -> None:
+        self.spec = spec
+        self._lookups = {lk.field: lk for lk in spec.code_lookups}
+        self._expansions = {exp.name: exp for exp in spec.expansions}
+
+        self.columns = tuple(spec.out_model.model_fields)
+        # Cursors are built from the returned rows, so the sort key must be part of them
+        if missing := set(spec.keyset.names) - set(self.columns):
+            raise ValueError(f"{spec.entity}: keyset columns {sorted(missing)} are not in {spec.out_model.__name__}")
+        self.select_list = ", ".join(self.columns)
+        self.select_sql = f"SELECT {self.select_list} FROM {spec.table}"
+        self.get_sql = f"{self.select_sql} WHERE id = :id"
+        self.delete_sql = f"DELETE FROM {spec.table} WHERE id = :id RETURNING id"
+
+        # Ordinality keeps the input order; a NULL t.id marks an id with no row
+        lookup_from = (
+            f"FROM unnest(CAST(:ids AS uuid[])) WITH ORDINALITY AS k(id, ord) LEFT JOIN {spec.table} t ON t.id = k.id"
+        )
+        self.lookup_sql = (
+            f"SELECT k.id AS _key, {', '.join(f't.{c}' for c in self.columns)} {lookup_from} ORDER BY k.ord"
+        )
+        obj = json_object_args(spec.out_model, self.columns, "t")
+        self.lookup_json_sql = f"""
+            SELECT
+              coalesce(json_agg(json_build_object({obj}) ORDER BY k.ord) FILTER (WHERE t.id IS NOT NULL), '[]')::text,
+              coalesce(json_agg(k.id ORDER BY k.ord) FILTER (WHERE t.id IS NULL), '[]')::text
+            {lookup_from}
+        """
+
+        self.insert_columns: tuple[str, ...] = ()
+        self.insert_sql = ""
+        if spec.create_model is not None:
+            self.insert_columns = self._to_columns(spec.create_model) + tuple(c for c, _, _ in spec.create_defaults)
+            binds = ", ".join(self._bind(c) for c in self.insert_columns)
+            self.insert_sql = (
+                f"INSERT INTO {spec.table}({', '.join(self.insert_columns)}) "
+                f"VALUES ({binds}) RETURNING {self.select_list}"
+            )
+
+        self.update_columns: tuple[str, ...] = ()
+        if spec.update_model is not None:
+            self.update_columns = self._to_columns(spec.update_model)
+        self._update_sql: dict[tuple[str, ...], str] = {}
+
+    def _to_columns(self, model: type[BaseModel]) -> tuple[str, ...]:
+        return tuple(self._lookups[f].column if f in self._lookups else f for f in model.model_fields)
+
+    def _bind(self, column: str) -> str:
+        cast = self.spec.casts.get(column)
+        # Not ":col::type": text() binds no name followed by a colon, and backtracks to a shorter one
+        return f"CAST(:{column} AS {cast})" if cast else f":{column}"
+
+    def update_sql(self, columns: tuple[str, ...]) -> str:
+        # Memoized per column subset; `columns` is always in update_columns order
+        stmt = self._update_sql.get(columns)
+        if stmt is None:
+            set_sql = ", ".join(f"{c} = {self._bind(c)}" for c in columns)
+            stmt = f"UPDATE {self.spec.table} SET {set_sql} WHERE id = :id RETURNING {self.select_list}"
+            self._update_sql[columns] = stmt
+        return stmt
+
+    async def resolve_codes(self, conn: AsyncConnection, data: dict[str, Any]) -> dict[str, Any]:
+        for lk in self.spec.code_lookups:
+            if lk.field in data:
+                id_ = await refdata.id_for(conn, lk.table, data.pop(lk.field))
+                if not id_:
+                    raise HTTPException(status_code=400, detail=lk.detail)
+                data[lk.column] = id_
+        return data
+
+    def not_found(self) -> HTTPException:
+        return HTTPException(status_code=404, detail=f"{self.spec.entity} not found")
+
+    # create/update/delete run inside the caller's transaction, see app.transactions
+
+    async def create(self, conn: AsyncConnection, payload: BaseModel) -> dict:
+        data = await self.resolve_codes(conn, payload.model_dump())
+        for column, table, code in self.spec.create_defaults:
+            data[column] = await refdata.id_for(conn, table, code)
+            if not data[column]:
+                raise HTTPException(status_code=500, detail=f"{table} not seeded")
+        row = await fetch_one(conn, self.insert_sql, data)
+        assert row is not None
+        return row
+
+    async def list_page(
+        self,
+        conn: AsyncConnection,
+        response: Response,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None,
+        if_none_match: str | None = None,
+        filters: dict[str, Any] | None = None,
+        ids: list[UUID] | None = None,
+        fields: tuple[str, ...] | None = None,
+        expand: tuple[str, ...] = (),
+        count: CountMode | None = None,
+    ) -> list[dict] | Response:
+        if ids is not None and (cursor is not None or offset or any(v is not None for v in (filters or {}).values())):
+            raise HTTPException(status_code=400, detail="ids cannot be combined with cursor, offset or filters")
+        page_args = {
+            "limit": limit,
+            "offset": offset,
+            "cursor": cursor,
+            "filters": filters,
+            "ids": ids,
+            "fields": fields,
+            "expand": expand,
+        }
+        if not self.spec.versioned:
+            page = await self._list_page(conn, response, **page_args)
+        else:
+            etag = await data_version_etag(conn, self.spec.version_name)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            page = await self._list_page(conn, response, **page_args)
+            set_etag(page if isinstance(page, Response) else response, etag)
+        if count is not None and ids is None:
+            total, mode = await self.total_count(conn, count, filters or {})
+            set_total_count(page if isinstance(page, Response) else response, total, mode)
+        return page
+
+    async def total_count(
+        self, conn: AsyncConnection, mode: CountMode, filters: dict[str, Any]
+    ) -> tuple[int, CountMode]:
+        """Size of the filtered list, ignoring the page window; exact only where a counter covers the filters."""
+        active = {k: v for k, v in filters.items() if v is not None}
+        if mode == "exact":
+            if not active:
+                return await exact_count(conn, self.spec.version_name), "exact"
+            if self.spec.org_unit_counts and active.keys() == {"org_unit_id"}:
+                return await exact_count(conn, self.spec.version_name, active["org_unit_id"]), "exact"
+        where, params = await self.filter_where(conn, active)
+        return await estimate_count(conn, self.spec.table, where, params), "estimate"
+
+    async def _list_page(
+        self,
+        conn: AsyncConnection,
+        response: Response,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None,
+        filters: dict[str, Any] | None,
+        ids: list[UUID] | None,
+        fields: tuple[str, ...] | None,
+        expand: tuple[str, ...],
+    ) -> list[dict] | Response:
+        if settings.json_passthrough and not expand:
+            if ids is None:
+                page = await self._page_args(conn, limit, offset, cursor, filters)
+                return await fetch_page_json(conn, out_model=self.spec.out_model, columns=fields, **page)
+            if fields is None:
+                return await self._ids_json(conn, ids)
+
+        if ids is not None:
+            rows, missing = await self.lookup(conn, ids)
+            if missing:
+                response.headers[MISSING_IDS_HEADER] = ",".join(map(str, missing))
+        else:
+            rows = await fetch_page(conn, response, **await self._page_args(conn, limit, offset, cursor, filters))
+        if fields is None and not expand:
+            return rows
+
+        await load_expansions(conn, rows, [self._expansions[name] for name in expand])
+        keep = (*(fields or self.columns), *expand)
+        headers = {h: response.headers[h] for h in (NEXT_CURSOR_HEADER, MISSING_IDS_HEADER) if h in response.headers}
+        # Shaped rows no longer match out_model, so they bypass response_model
+        return JSONResponse(jsonable_encoder([{k: row[k] for k in keep} for row in rows]), headers=headers)
+
+    async def _page_args(
+        self, conn: AsyncConnection, limit: int, offset: int, cursor: str | None, filters: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        where, params = await self.filter_where(conn, filters or {})
+        return {
+            "select_sql": self.select_sql,
+            "keyset": self.spec.keyset,
+            "limit": limit,
+            "offset": offset,
+            "cursor": cursor,
+            "where": where,
+            "params": params,
+        }
+
+    async def _ids_json(self, conn: AsyncConnection, ids: list[UUID]) -> Response:
+        items, missing = await self.lookup_json(conn, ids)
+        headers = {MISSING_IDS_HEADER: ",".join(missing)} if missing else None
+        return Response(content=items, media_type="application/json", headers=headers)
+
+    def parse_fields(self, value: str) -> tuple[str, ...]:
+        requested = {f.strip() for f in value.split(",") if f.strip()}
+        if unknown := requested - set(self.columns):
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # out_model order, so equal subsets share one cached statement
+        return tuple(c for c in self.columns if c in requested)
+
+    def parse_expand(self, value: str) -> tuple[str, ...]:
+        requested = {e.strip() for e in value.split(",") if e.strip()}
+        if unknown := requested - set(self._expansions):
+            raise HTTPException(status_code=400, detail=f"Unknown expansions: {', '.join(sorted(unknown))}")
+        return tuple(name for name in self._expansions if name in requested)
+
+    async def lookup(self, conn: AsyncConnection, ids: list[UUID]) -> tuple[list[dict], list[UUID]]:
+        """Rows for `ids` in input order, and the ids that have no row."""
+        rows, missing = [], []
+        for row in await fetch_all(conn, self.lookup_sql, {"ids": ids}):
+            key = row.pop("_key")
+            if row["id"] is None:
+                missing.append(key)
+            else:
+                rows.append(row)
+        return rows, missing
+
+    async def lookup_json(self, conn: AsyncConnection, ids: list[UUID]) -> tuple[str, list[str]]:
+        """Same as `lookup`, with the rows rendered to a JSON array by Postgres."""
+        res = await conn.execute(sql(self.lookup_json_sql), {"ids": ids})
+        items, missing = res.one()
+        if settings.json_passthrough_validate:
+            _list_adapter(self.spec.out_model).validate_json(items)
+        return items, json.loads(missing)
+
+    async def filter_where(self, conn: AsyncConnection, values: dict[str, Any]) -> tuple[list[str], dict[str, Any]]:
+        where = []
+        params: dict[str, Any] = {}
+        # Spec order, so each filter combination maps to one cached statement
+        for flt in self.spec.filters:
+            value = values.get(flt.param)
+            if value is None:
+                continue
+            if flt.lookup is not None:
+                value = await refdata.id_for(conn, flt.lookup.table, value)
+                if not value:
+                    raise HTTPException(status_code=400, detail=flt.lookup.detail)
+            where.append(flt.condition)
+            params[flt.param] = value
+        return where, params
+
+    async def get(self, conn: AsyncConnection, id_: UUID) -> dict:
+        row = await fetch_one(conn, self.get_sql, {"id": id_})
+        if not row:
+            raise self.not_found()
+        return row
+
+    async def update(self, conn: AsyncConnection, id_: UUID, payload: BaseModel) -> dict:
+        data = await self.resolve_codes(conn, payload.model_dump(exclude_unset=True))
+        columns = tuple(c for c in self.update_columns if c in data)
+        if not columns:
+            raise HTTPException(status_code=400, detail="No fields to update")
+        row = await fetch_one(conn, self.update_sql(columns), {**{c: data[c] for c in columns}, "id": id_})
+        if not row:
+            raise self.not_found()
+        return row
+
+    async def delete(self, conn: AsyncConnection, id_: UUID) -> dict:
+        row = await fetch_one(conn, self.delete_sql, {"id": id_})
+        if not row:
+            raise self.not_found()
+        return {"status": "ok"}
+
+    def register(self, router: APIRouter) -> None:
+        spec = self.spec
+        item_path = f"{spec.path}/{{{spec.id_param}}}"
+        tx_param = _param("tx", TransactionRunner, Depends(get_tx()))
+        read_conn_param = _param("conn", AsyncConnection, Depends(get_read_conn))
+        id_param = _param(spec.id_param, UUID)
+
+        if spec.create_model is not None:
+
+            async def create(payload: BaseModel, tx: TransactionRunner) -> dict:
+                return await tx.run(lambda conn: self.create(conn, payload))
+
+            router.add_api_route(
+                spec.path,
+                _endpoint(f"create_{spec.entity}", create, [_param("payload", spec.create_model), tx_param]),
+                methods=["POST"],
+                response_model=spec.out_model,
+            )
+
+        async def list_(
+            response: Response,
+            limit: int,
+            offset: int,
+            cursor: str | None,
+            conn: AsyncConnection,
+            ids: list[str] | None = None,
+            if_none_match: str | None = None,
+            fields: str | None = None,
+            expand: str | None = None,
+            count: CountMode | None = None,
+            **filters: Any,
+        ) -> list[dict] | Response:
+            return await self.list_page(
+                conn,
+                response,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                if_none_match=if_none_match,
+                filters=filters,
+                ids=_parse_ids(ids, spec.path) if ids is not None else None,
+                fields=self.parse_fields(fields) if fields is not None else None,
+                expand=self.parse_expand(expand) if expand else (),
+                count=count,
+            )
+
+        list_params = [
+            _param("response", Response),
+            _param("limit", int, Query(default=100, ge=1, le=1000)),
+            _param("offset", int, Query(default=0, ge=0, le=1_000_000)),
+            _param("cursor", str | None, Query(default=None, description=CURSOR_DESCRIPTION)),
+            _param("ids", list[str] | None, Query(default=None, description=IDS_DESCRIPTION)),
+            _param("count", CountMode | None, Query(default=None, description=COUNT_DESCRIPTION)),
+            *(
+                _param(f.param, f.annotation | None, Query(default=None, description=f.description))
+                for f in spec.filters
+            ),
+            read_conn_param,
+        ]
+        if spec.versioned:
+            list_params.append(_param("if_none_match", str | None, Header(default=None)))
+        if spec.expansions:
+            list_params += [
+                _param(
+                    "fields",
+                    str | None,
+                    Query(default=None, description=f"Comma-separated subset of: {', '.join(self.columns)}"),
+                ),
+                _param(
+                    "expand",
+                    str | None,
+                    Query(default=None, description=f"Comma-separated: {', '.join(self._expansions)}"),
+                ),
+            ]
+
+        router.add_api_route(
+            spec.path,
+            _endpoint(f"list_{spec.plural}", list_, list_params),
+            methods=["GET"],
+            response_model=list[spec.out_model],  # type: ignore[name-defined]
+        )
+
+        async def lookup(payload: LookupIn, conn: AsyncConnection) -> dict | Response:
+            ids = list(dict.fromkeys(payload.ids))
+            if settings.json_passthrough:
+                items, missing = await self.lookup_json(conn, ids)
+                body = f'{{"items":{items},"missing":{json.dumps(missing)}}}'
+                return Response(content=body, media_type="application/json")
+            rows, missing_ids = await self.lookup(conn, ids)
+            return {"items": rows, "missing": missing_ids}
+
+        router.add_api_route(
+            f"{spec.path}/lookup",
+            _endpoint(f"lookup_{spec.plural}", lookup, [_param("payload", LookupIn), read_conn_param]),
+            methods=["POST"],
+            response_model=LookupOut[spec.out_model],  # type: ignore[name-defined]
+        )
+
+        async def get(conn: AsyncConnection, **path: UUID) -> dict:
+            return await self.get(conn, path[spec.id_param])
+
+        router.add_api_route(
+            item_path,
+            _endpoint(f"get_{spec.entity}", get, [id_param, read_conn_param]),
+            methods=["GET"],
+            response_model=spec.out_model,
+        )
+
+        if spec.update_model is not None:
+
+            async def update(payload: BaseModel, tx: TransactionRunner, **path: UUID) -> dict:
+                return await tx.run(lambda conn: self.update(conn, path[spec.id_param], payload))
+
+            router.add_api_route(
+                item_path,
+                _endpoint(
+                    f"update_{spec.entity}", update, [id_param, _param("payload", spec.update_model), tx_param]
+                ),
+                methods=["PATCH"],
+                response_model=spec.out_model,
+            )
+
+        if spec.deletable:
+
+            async def delete(tx: TransactionRunner, **path: UUID) -> dict:
+                return await tx.run(lambda conn: self.delete(conn, path[spec.id_param]))
+
+            router.add_api_route(
+                item_path,
+                _endpoint(f"delete_{spec.entity}", delete, [id_param, tx_param]),
+                methods=["DELETE"],
+            )
+
+
+def _parse_ids(values: list[str], path: str) -> list[UUID]:
+    # Repeated (?ids=a&ids=b) and comma-separated (?ids=a,b) forms both work
+    try:
+        ids = [UUID(v) for value in values for v in value.split(",") if v]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid id in ids") from exc
+    if len(ids) > LOOKUP_QUERY_MAX_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {LOOKUP_QUERY_MAX_IDS} ids per request, use POST {path}/lookup"
+        )
+    return list(dict.fromkeys(ids))
+
+
+def _param(name: str, annotation: Any, default: Any = inspect.Parameter.empty) -> inspect.Parameter:
+    return inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation, default=default)
+
+
+def _endpoint(
+    name: str, impl: Callable[..., Awaitable[Any]], params: list[inspect.Parameter]
+) -> Callable[..., Awaitable[Any]]:
+    # FastAPI reads parameters from __signature__, so spec models become real annotations
+    async def endpoint(**kwargs: Any) -> Any:
+        return await impl(**kwargs)
+
+    endpoint.__name__ = endpoint.__qualname__ = name
+    endpoint.__signature__ = inspect.Signature(params)  # type: ignore[attr-defined]
+    return endpoint
+
+
+def register_crud(router: APIRouter, specs: tuple[TableSpec, ...]) -> dict[str, Crud]:
+    cruds = {spec.entity: Crud(spec) for spec in specs}
+    for crud in cruds.values():
+        crud.register(router)
+    return cruds
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from uuid import UUID
+
+from app.api.crud import CodeLookup, Expansion, ListFilter, TableSpec
+from app.api.pagination import Keyset
+from app.schemas import (
+    CheckEventOut,
+    CheckPlanCreate,
+    CheckPlanOut,
+    CheckPlanUpdate,
+    CheckRequirementCreate,
+    CheckRequirementOut,
+    CheckRequirementUpdate,
+    CheckTypeCreate,
+    CheckTypeOut,
+    CheckTypeUpdate,
+    CodeNameOut,
+    DocumentCreate,
+    DocumentOut,
+    DocumentUpdate,
+    InstrumentCreate,
+    InstrumentModelCreate,
+    InstrumentModelOut,
+    InstrumentModelUpdate,
+    InstrumentOut,
+    InstrumentTypeCreate,
+    InstrumentTypeOut,
+    InstrumentTypeUpdate,
+    InstrumentUpdate,
+    LabCreate,
+    LabOut,
+    LabUpdate,
+    LocationCreate,
+    LocationOut,
+    LocationUpdate,
+    OrgUnitCreate,
+    OrgUnitOut,
+    OrgUnitUpdate,
+    SpecialistCreate,
+    SpecialistOut,
+    SpecialistUpdate,
+)
+
+ORG_UNIT = TableSpec(
+    path="/org-units",
+    table="metrology.org_unit",
+    entity="org_unit",
+    plural="org_units",
+    out_model=OrgUnitOut,
+    create_model=OrgUnitCreate,
+    update_model=OrgUnitUpdate,
+    keyset=Keyset((("code", str),)),
+)
+
+LOCATION = TableSpec(
+    path="/locations",
+    table="metrology.location",
+    entity="location",
+    plural="locations",
+    out_model=LocationOut,
+    create_model=LocationCreate,
+    update_model=LocationUpdate,
+    keyset=Keyset((("code", str), ("id", UUID))),
+)
+
+LAB = TableSpec(
+    path="/labs",
+    table="metrology.lab",
+    entity="lab",
+    plural="labs",
+    out_model=LabOut,
+    create_model=LabCreate,
+    update_model=LabUpdate,
+    keyset=Keyset((("code", str),)),
+    casts={"contacts": "jsonb"},
+    versioned=True,
+)
+
+SPECIALIST = TableSpec(
+    path="/specialists",
+    table="metrology.specialist",
+    entity="specialist",
+    plural="specialists",
+    out_model=SpecialistOut,
+    create_model=SpecialistCreate,
+    update_model=SpecialistUpdate,
+    keyset=Keyset((("full_name", str), ("id", UUID))),
+)
+
+INSTRUMENT_TYPE = TableSpec(
+    path="/instrument-types",
+    table="metrology.instrument_type",
+    entity="instrument_type",
+    plural="instrument_types",
+    out_model=InstrumentTypeOut,
+    create_model=InstrumentTypeCreate,
+    update_model=InstrumentTypeUpdate,
+    keyset=Keyset((("code", str),)),
+    versioned=True,
+)
+
+INSTRUMENT_MODEL = TableSpec(
+    path="/instrument-models",
+    table="metrology.instrument_model",
+    entity="instrument_model",
+    plural="instrument_models",
+    out_model=InstrumentModelOut,
+    create_model=InstrumentModelCreate,
+    update_model=InstrumentModelUpdate,
+    keyset=Keyset((("manufacturer", str), ("model_name", str), ("id", UUID))),
+)
+
+# Written as status_code and filtered by it: one lookup so both resolve codes the same way
+INSTRUMENT_STATUS_CODE = CodeLookup("status_code", "status_id", "instrument_status", "Unknown instrument status_code")
+
+INSTRUMENT = TableSpec(
+    path="/instruments",
+    table="metrology.instrument",
+    entity="instrument",
+    plural="instruments",
+    out_model=InstrumentOut,
+    create_model=InstrumentCreate,
+    update_model=InstrumentUpdate,
+    keyset=Keyset((("inventory_no", str),)),
+    code_lookups=(INSTRUMENT_STATUS_CODE,),
+    # The equality filters on org_unit_id, location_id, status and instrument_model_id each have a
+    # (column, inventory_no) index (migration 0009): a page is a range scan in keyset order.
+    # instrument_type_id (several models) and installed_from/installed_to (ix_instrument_installed_at)
+    # are not: every matching row is read and top-N sorted by inventory_no on each page.
+    filters=(
+        ListFilter("org_unit_id", UUID, "org_unit_id = :org_unit_id"),
+        ListFilter("location_id", UUID, "location_id = :location_id"),
+        ListFilter("status_code", str, "status_id = :status_code", lookup=INSTRUMENT_STATUS_CODE),
+        ListFilter("instrument_model_id", UUID, "instrument_model_id = :instrument_model_id"),
+        ListFilter(
+            "instrument_type_id",
+            UUID,
+            "instrument_model_id IN "
+            "(SELECT id FROM metrology.instrument_model WHERE instrument_type_id = :instrument_type_id)",
+        ),
+        ListFilter("installed_from", datetime, "installed_at >= :installed_from", "Installed at or after"),
+        ListFilter("installed_to", datetime, "installed_at < :installed_to", "Installed before"),
+    ),
+    expansions=(
+        Expansion("model", "instrument_model_id", "metrology.instrument_model", InstrumentModelOut),
+        Expansion("location", "location_id", "metrology.location", LocationOut),
+        Expansion("org_unit", "org_unit_id", "metrology.org_unit", OrgUnitOut),
+        Expansion("status", "status_id", "metrology.instrument_status", CodeNameOut),
+    ),
+    org_unit_counts=True,
+)
+
+DOCUMENT = TableSpec(
+    path="/documents",
+    table="metrology.document",
+    entity="document",
+    plural="documents",
+    out_model=DocumentOut,
+    create_model=DocumentCreate,
+    update_model=DocumentUpdate,
+    keyset=Keyset((("created_at", datetime), ("id", UUID)), descending=True),
+    code_lookups=(
+        CodeLookup("document_type_code", "document_type_id", "document_type", "Unknown document_type_code"),
+    ),
+)
+
+# Events are created through fn_register_check_event(s) only
+CHECK_EVENT = TableSpec(
+    path="/check-events",
+    table="metrology.check_event",
+    entity="check_event",
+    plural="check_events",
+    out_model=CheckEventOut,
+    keyset=Keyset((("check_date", date), ("created_at", datetime), ("id", UUID)), descending=True),
+    expansions=(
+        Expansion("instrument", "instrument_id", "metrology.instrument", InstrumentOut),
+        Expansion("check_type", "check_type_id", "metrology.check_type", CheckTypeOut),
+        Expansion("lab", "lab_id", "metrology.lab", LabOut),
+        Expansion("specialist", "specialist_id", "metrology.specialist", SpecialistOut),
+        Expansion("result_status", "result_status_id", "metrology.check_result_status", CodeNameOut),
+    ),
+    deletable=False,
+)
+
+CHECK_TYPE = TableSpec(
+    path="/check-types",
+    table="metrology.check_type",
+    entity="check_type",
+    plural="check_types",
+    out_model=CheckTypeOut,
+    create_model=CheckTypeCreate,
+    update_model=CheckTypeUpdate,
+    keyset=Keyset((("code", str),)),
+    code_lookups=(CodeLookup("kind_code", "check_kind_id", "check_kind", "Unknown kind_code"),),
+    versioned=True,
+)
+
+CHECK_REQUIREMENT = TableSpec(
+    path="/check-requirements",
+    table="metrology.check_requirement",
+    entity="check_requirement",
+    plural="check_requirements",
+    out_model=CheckRequirementOut,
+    create_model=CheckRequirementCreate,
+    update_model=CheckRequirementUpdate,
+    keyset=Keyset((("instrument_model_id", UUID), ("check_type_id", UUID))),
+)
+
+CHECK_PLAN = TableSpec(
+    path="/check-plans",
+    table="metrology.check_plan",
+    entity="check_plan",
+    plural="check_plans",
+    out_model=CheckPlanOut,
+    create_model=CheckPlanCreate,
+    update_model=CheckPlanUpdate,
+    keyset=Keyset((("due_date", date), ("id", UUID)), descending=True),
+    code_lookups=(CodeLookup("status_code", "status_id", "check_plan_status", "Unknown status_code"),),
+    create_defaults=(("status_id", "check_plan_status", "PLANNED"),),
+    expansions=(
+        Expansion("instrument", "instrument_id", "metrology.instrument", InstrumentOut),
+        Expansion("check_type", "check_type_id", "metrology.check_type", CheckTypeOut),
+        Expansion("planned_lab", "planned_lab_id", "metrology.lab", LabOut),
+        Expansion("planned_specialist", "planned_specialist_id", "metrology.specialist", SpecialistOut),
+        Expansion("status", "status_id", "metrology.check_plan_status", CodeNameOut),
+    ),
+)
+
+TABLE_SPECS = (
+    ORG_UNIT,
+    LOCATION,
+    LAB,
+    SPECIALIST,
+    INSTRUMENT_TYPE,
+    INSTRUMENT_MODEL,
+    INSTRUMENT,
+    DOCUMENT,
+    CHECK_EVENT,
+    CHECK_TYPE,
+    CHECK_REQUIREMENT,
+    CHECK_PLAN,
+)
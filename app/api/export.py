@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import csv
+import io
+from collections.abc import AsyncIterator
+from datetime import date, datetime
+from typing import Any, Literal
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from app.db import checkout
+
+router = APIRouter(prefix="/export")
+
+ExportFormat = Literal["ndjson", "csv"]
+
+# Rows fetched per server-side cursor round trip
+_STREAM_BATCH_ROWS = 2000
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+INSTRUMENT_COLUMNS = (
+    "id",
+    "instrument_model_id",
+    "inventory_no",
+    "serial_no",
+    "org_unit_id",
+    "location_id",
+    "status_id",
+    "installed_at",
+)
+CHECK_EVENT_COLUMNS = (
+    "id",
+    "instrument_id",
+    "check_plan_id",
+    "check_type_id",
+    "lab_id",
+    "specialist_id",
+    "check_date",
+    "result_status_id",
+    "protocol_no",
+    "next_due_date",
+    "notes",
+    "created_at",
+)
+AUDIT_COLUMNS = ("id", "at", "db_user", "action", "table_name", "row_id", "old_row", "new_row")
+
+
+def _export_sql(fmt: ExportFormat, columns: tuple[str, ...], from_sql: str, where: list[str], order_by: str) -> str:
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    page_sql = f"SELECT {', '.join(columns)} {from_sql} {where_sql} ORDER BY {order_by}"
+    if fmt == "ndjson":
+        # Postgres renders each row as a JSON document; Python only forwards strings
+        return f"SELECT row_to_json(t)::text FROM ({page_sql}) t"
+    # Text values avoid building uuid/date/dict objects per cell
+    return f"SELECT {', '.join(f'{c}::text' for c in columns)} FROM ({page_sql}) t"
+
+
+async def _stream_rows(
+    fmt: ExportFormat, columns: tuple[str, ...], sql: str, params: dict[str, Any]
+) -> AsyncIterator[str]:
+    # The connection is owned by the generator: request-scoped dependencies are
+    # released before a StreamingResponse body is sent.
+    async with checkout() as conn:
+        result = await conn.stream(text(sql).execution_options(yield_per=_STREAM_BATCH_ROWS), params)
+        if fmt == "ndjson":
+            async for batch in result.scalars().partitions():
+                yield "\n".join(batch) + "\n"
+            return
+
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(columns)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        async for batch in result.partitions():
+            writer.writerows(batch)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+
+
+def _export_response(
+    name: str,
+    fmt: ExportFormat,
+    columns: tuple[str, ...],
+    *,
+    from_sql: str,
+    order_by: str,
+    where: list[str] | None = None,
+    params: dict[str, Any] | None = None,
+) -> StreamingResponse:
+    sql = _export_sql(fmt, columns, from_sql, where or [], order_by)
+    return StreamingResponse(
+        _stream_rows(fmt, columns, sql, params or {}),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/instruments")
+async def export_instruments(format: ExportFormat = Query(default="ndjson")):
+    return _export_response(
+        "instruments",
+        format,
+        INSTRUMENT_COLUMNS,
+        from_sql="FROM metrology.instrument",
+        order_by="inventory_no",
+    )
+
+
+@router.get("/check-events")
+async def export_check_events(
+    format: ExportFormat = Query(default="ndjson"),
+    from_date: date | None = Query(default=None),
+    to_date: date | None = Query(default=None),
+):
+    where = []
+    params: dict = {}
+    if from_date:
+        where.append("check_date >= :from_date")
+        params["from_date"] = from_date
+    if to_date:
+        where.append("check_date <= :to_date")
+        params["to_date"] = to_date
+
+    return _export_response(
+        "check-events",
+        format,
+        CHECK_EVENT_COLUMNS,
+        from_sql="FROM metrology.check_event",
+        order_by="check_date DESC, created_at DESC, id DESC",
+        where=where,
+        params=params,
+    )
+
+
+@router.get("/audit")
+async def export_audit(
+    format: ExportFormat = Query(default="ndjson"),
+    table_name: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+):
+    where = []
+    params: dict = {}
+    if table_name:
+        where.append("table_name = :table_name")
+        params["table_name"] = table_name
+    if since:
+        where.append('"at" >= :since')
+        params["since"] = since
+    if until:
+        where.append('"at" < :until')
+        params["until"] = until
+
+    return _export_response(
+        "audit",
+        format,
+        AUDIT_COLUMNS,
+        from_sql="FROM metrology.audit_log",
+        order_by="at DESC, id DESC",
+        where=where,
+        params=params,
+    )
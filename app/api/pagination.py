@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_DECODERS: dict[type, Any] = {
+    str: str,
+    UUID: UUID,
+    date: date.fromisoformat,
+    datetime: datetime.fromisoformat,
+}
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """
+    Sort key of a list endpoint, usable for keyset (cursor) pagination.
+
+    The key must be unique (append `id` as a tie-breaker when the natural sort is not),
+    and all columns are sorted in the same direction so a row comparison can be used.
+    """
+
+    columns: tuple[tuple[str, type], ...]
+    descending: bool = False
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return tuple(name for name, _ in self.columns)
+
+    def order_by_sql(self) -> str:
+        direction = " DESC" if self.descending else ""
+        return ", ".join(f"{name}{direction}" for name in self.names)
+
+    def after_sql(self) -> str:
+        op = "<" if self.descending else ">"
+        cols = ", ".join(self.names)
+        binds = ", ".join(f":_cursor_{i}" for i in range(len(self.columns)))
+        return f"({cols}) {op} ({binds})"
+
+    def encode(self, values: Any) -> str:
+        raw = [v.isoformat() if isinstance(v, (date, datetime)) else str(v) for v in values]
+        return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def encode_row(self, row: dict[str, Any]) -> str:
+        return self.encode(row[name] for name in self.names)
+
+    def decode(self, cursor: str) -> dict[str, Any]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(raw, list) or len(raw) != len(self.columns):
+                raise ValueError("cursor arity mismatch")
+            return {
+                f"_cursor_{i}": _DECODERS[typ](value)
+                for i, ((_, typ), value) in enumerate(zip(self.columns, raw))
+            }
+        except (ValueError, TypeError, binascii.Error) as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
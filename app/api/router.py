@@ -1,788 +1,289 @@
 from __future__ import annotations
 
+import csv
+import io
+import json
+from contextlib import AsyncExitStack
 from datetime import date, datetime
+from decimal import Decimal
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from pydantic import ValidationError
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncConnection
 
-from app.db import get_conn
+from app.api.conditional import etag_matches, fetch_data_version, not_modified, set_etag
+from app.api.counts import COUNT_DESCRIPTION, CountMode, estimate_count, set_total_count
+from app.api.crud import (
+    CURSOR_DESCRIPTION,
+    fetch_all,
+    fetch_one,
+    fetch_page,
+    fetch_page_json,
+    json_timestamp_sql,
+    register_crud,
+    sql,
+)
+from app.api.entities import TABLE_SPECS
+from app.api.pagination import Keyset
+from app.cache import report_cache
+from app.db import get_read_conn, read_conn
+from app.jobs import enqueue_plan_job, fetch_plan_job, plan_jobs
+from app.refdata import CHANGED_US_SQL, DataVersion, refdata
 from app.schemas import (
     AuditRowOut,
-    CheckEventOut,
-    CheckPlanCreate,
-    CheckPlanOut,
-    CheckPlanUpdate,
-    CheckRequirementCreate,
-    CheckRequirementOut,
-    CheckRequirementUpdate,
-    CheckTypeCreate,
-    CheckTypeOut,
-    CheckTypeUpdate,
     DecommissionInstrumentIn,
-    DocumentCreate,
-    DocumentOut,
-    DocumentUpdate,
     GeneratePlansIn,
-    GeneratePlansOut,
+    InstrumentBulkOut,
+    InstrumentBulkRowError,
     InstrumentCreate,
-    InstrumentModelCreate,
-    InstrumentModelOut,
-    InstrumentModelUpdate,
-    InstrumentOut,
-    InstrumentUpdate,
-    InstrumentTypeCreate,
-    InstrumentTypeOut,
-    InstrumentTypeUpdate,
-    LabCreate,
-    LabOut,
-    LabUpdate,
-    LocationCreate,
-    LocationOut,
-    LocationUpdate,
-    OrgUnitCreate,
-    OrgUnitOut,
-    OrgUnitUpdate,
+    InstrumentFullOut,
+    PlanJobOut,
     RegisterCheckEventIn,
     RegisterCheckEventOut,
-    SpecialistCreate,
-    SpecialistOut,
-    SpecialistUpdate,
+    RegisterCheckEventsBatchIn,
+    RegisterCheckEventsBatchOut,
+    SearchHitOut,
 )
+from app.settings import settings
+from app.transactions import TransactionRunner, get_tx
 
 router = APIRouter()
 
+AUDIT_KEYSET = Keyset((("at", datetime), ("id", UUID)), descending=True)
+
+
+BULK_MAX_ROWS = 100_000
+
+_BULK_STAGE_COLUMNS = (
+    "row_no",
+    "instrument_model_id",
+    "inventory_no",
+    "serial_no",
+    "range_min",
+    "range_max",
+    "range_unit",
+    "error_limit",
+    "error_unit",
+    "accuracy_class",
+    "org_unit_id",
+    "location_id",
+    "installed_at",
+    "status_id",
+)
 
-async def _fetch_all(conn: AsyncConnection, stmt: str, params: dict) -> list[dict]:
-    res = await conn.execute(text(stmt), params)
-    return [dict(r._mapping) for r in res.fetchall()]
-
-
-async def _fetch_one(conn: AsyncConnection, stmt: str, params: dict) -> dict | None:
-    res = await conn.execute(text(stmt), params)
-    row = res.fetchone()
-    return dict(row._mapping) if row else None
-
-
-def _build_update_sql(
-    *,
-    table: str,
-    id_name: str,
-    id_value: Any,
-    data: dict[str, Any],
-    allowed_cols: set[str],
-    returning_cols: str,
-) -> tuple[str, dict[str, Any]]:
-    patch = {k: v for k, v in data.items() if k in allowed_cols}
-    if not patch:
-        raise HTTPException(status_code=400, detail="No fields to update")
-
-    set_sql = ", ".join([f"{col} = :{col}" for col in patch.keys()])
-    params = {**patch, id_name: id_value}
-    sql = f"UPDATE {table} SET {set_sql} WHERE {id_name} = :{id_name} RETURNING {returning_cols}"
-    return sql, params
-
-
-@router.post("/org-units", response_model=OrgUnitOut)
-async def create_org_unit(payload: OrgUnitCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.org_unit(code, name, parent_id)
-            VALUES (:code, :name, :parent_id)
-            RETURNING id, code, name, parent_id
-            """,
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/org-units", response_model=list[OrgUnitOut])
-async def list_org_units(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        "SELECT id, code, name, parent_id FROM metrology.org_unit ORDER BY code LIMIT :limit OFFSET :offset",
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/org-units/{org_unit_id}", response_model=OrgUnitOut)
-async def get_org_unit(org_unit_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        "SELECT id, code, name, parent_id FROM metrology.org_unit WHERE id=:id",
-        {"id": org_unit_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="org_unit not found")
-    return row
-
-
-@router.patch("/org-units/{org_unit_id}", response_model=OrgUnitOut)
-async def update_org_unit(org_unit_id: UUID, payload: OrgUnitUpdate, conn: AsyncConnection = Depends(get_conn)):
-    data = payload.model_dump(exclude_unset=True)
-    sql, params = _build_update_sql(
-        table="metrology.org_unit",
-        id_name="id",
-        id_value=org_unit_id,
-        data=data,
-        allowed_cols={"code", "name", "parent_id"},
-        returning_cols="id, code, name, parent_id",
-    )
-    async with conn.begin():
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="org_unit not found")
-        return row
-
-
-@router.delete("/org-units/{org_unit_id}")
-async def delete_org_unit(org_unit_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.org_unit WHERE id=:id RETURNING id",
-            {"id": org_unit_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="org_unit not found")
-        return {"status": "ok"}
-
-
-@router.post("/locations", response_model=LocationOut)
-async def create_location(payload: LocationCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.location(org_unit_id, code, name)
-            VALUES (:org_unit_id, :code, :name)
-            RETURNING id, org_unit_id, code, name
-            """,
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/locations", response_model=list[LocationOut])
-async def list_locations(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        "SELECT id, org_unit_id, code, name FROM metrology.location ORDER BY code LIMIT :limit OFFSET :offset",
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/locations/{location_id}", response_model=LocationOut)
-async def get_location(location_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        "SELECT id, org_unit_id, code, name FROM metrology.location WHERE id=:id",
-        {"id": location_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="location not found")
-    return row
-
-
-@router.patch("/locations/{location_id}", response_model=LocationOut)
-async def update_location(location_id: UUID, payload: LocationUpdate, conn: AsyncConnection = Depends(get_conn)):
-    data = payload.model_dump(exclude_unset=True)
-    sql, params = _build_update_sql(
-        table="metrology.location",
-        id_name="id",
-        id_value=location_id,
-        data=data,
-        allowed_cols={"org_unit_id", "code", "name"},
-        returning_cols="id, org_unit_id, code, name",
-    )
-    async with conn.begin():
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="location not found")
-        return row
-
-
-@router.delete("/locations/{location_id}")
-async def delete_location(location_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.location WHERE id=:id RETURNING id",
-            {"id": location_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="location not found")
-        return {"status": "ok"}
-
-
-@router.post("/labs", response_model=LabOut)
-async def create_lab(payload: LabCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.lab(code, name, accreditation_no, contacts)
-            VALUES (:code, :name, :accreditation_no, :contacts::jsonb)
-            RETURNING id, code, name, accreditation_no, contacts
-            """,
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/labs", response_model=list[LabOut])
-async def list_labs(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        "SELECT id, code, name, accreditation_no, contacts FROM metrology.lab ORDER BY code LIMIT :limit OFFSET :offset",
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/labs/{lab_id}", response_model=LabOut)
-async def get_lab(lab_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        "SELECT id, code, name, accreditation_no, contacts FROM metrology.lab WHERE id=:id",
-        {"id": lab_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="lab not found")
-    return row
-
-
-@router.patch("/labs/{lab_id}", response_model=LabOut)
-async def update_lab(lab_id: UUID, payload: LabUpdate, conn: AsyncConnection = Depends(get_conn)):
-    data = payload.model_dump(exclude_unset=True)
-    allowed = {"code", "name", "accreditation_no", "contacts"}
-    patch = {k: v for k, v in data.items() if k in allowed}
-    if not patch:
-        raise HTTPException(status_code=400, detail="No fields to update")
-
-    sets = []
-    for k in patch.keys():
-        if k == "contacts":
-            sets.append("contacts = :contacts::jsonb")
-        else:
-            sets.append(f"{k} = :{k}")
-    set_sql = ", ".join(sets)
-
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            f"""
-            UPDATE metrology.lab
-            SET {set_sql}
-            WHERE id = :id
-            RETURNING id, code, name, accreditation_no, contacts
-            """,
-            {**patch, "id": lab_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="lab not found")
-        return row
-
-
-@router.delete("/labs/{lab_id}")
-async def delete_lab(lab_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.lab WHERE id=:id RETURNING id",
-            {"id": lab_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="lab not found")
-        return {"status": "ok"}
-
-
-@router.post("/specialists", response_model=SpecialistOut)
-async def create_specialist(payload: SpecialistCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.specialist(lab_id, full_name, position, email, phone)
-            VALUES (:lab_id, :full_name, :position, :email, :phone)
-            RETURNING id, lab_id, full_name, position, email, phone
-            """,
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/specialists", response_model=list[SpecialistOut])
-async def list_specialists(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        "SELECT id, lab_id, full_name, position, email, phone FROM metrology.specialist ORDER BY full_name LIMIT :limit OFFSET :offset",
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/specialists/{specialist_id}", response_model=SpecialistOut)
-async def get_specialist(specialist_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        "SELECT id, lab_id, full_name, position, email, phone FROM metrology.specialist WHERE id=:id",
-        {"id": specialist_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="specialist not found")
-    return row
-
-
-@router.patch("/specialists/{specialist_id}", response_model=SpecialistOut)
-async def update_specialist(
-    specialist_id: UUID, payload: SpecialistUpdate, conn: AsyncConnection = Depends(get_conn)
-):
-    data = payload.model_dump(exclude_unset=True)
-    sql, params = _build_update_sql(
-        table="metrology.specialist",
-        id_name="id",
-        id_value=specialist_id,
-        data=data,
-        allowed_cols={"lab_id", "full_name", "position", "email", "phone"},
-        returning_cols="id, lab_id, full_name, position, email, phone",
-    )
-    async with conn.begin():
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="specialist not found")
-        return row
-
-
-@router.delete("/specialists/{specialist_id}")
-async def delete_specialist(specialist_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.specialist WHERE id=:id RETURNING id",
-            {"id": specialist_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="specialist not found")
-        return {"status": "ok"}
-
-
-@router.post("/instrument-types", response_model=InstrumentTypeOut)
-async def create_instrument_type(payload: InstrumentTypeCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.instrument_type(code, name)
-            VALUES (:code, :name)
-            RETURNING id, code, name
-            """,
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/instrument-types", response_model=list[InstrumentTypeOut])
-async def list_instrument_types(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        "SELECT id, code, name FROM metrology.instrument_type ORDER BY code LIMIT :limit OFFSET :offset",
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/instrument-types/{instrument_type_id}", response_model=InstrumentTypeOut)
-async def get_instrument_type(instrument_type_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        "SELECT id, code, name FROM metrology.instrument_type WHERE id=:id",
-        {"id": instrument_type_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="instrument_type not found")
-    return row
-
-
-@router.patch("/instrument-types/{instrument_type_id}", response_model=InstrumentTypeOut)
-async def update_instrument_type(
-    instrument_type_id: UUID, payload: InstrumentTypeUpdate, conn: AsyncConnection = Depends(get_conn)
-):
-    data = payload.model_dump(exclude_unset=True)
-    sql, params = _build_update_sql(
-        table="metrology.instrument_type",
-        id_name="id",
-        id_value=instrument_type_id,
-        data=data,
-        allowed_cols={"code", "name"},
-        returning_cols="id, code, name",
-    )
-    async with conn.begin():
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="instrument_type not found")
-        return row
-
-
-@router.delete("/instrument-types/{instrument_type_id}")
-async def delete_instrument_type(instrument_type_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.instrument_type WHERE id=:id RETURNING id",
-            {"id": instrument_type_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="instrument_type not found")
-        return {"status": "ok"}
-
-
-@router.post("/instrument-models", response_model=InstrumentModelOut)
-async def create_instrument_model(payload: InstrumentModelCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.instrument_model(instrument_type_id, manufacturer, model_name, description)
-            VALUES (:instrument_type_id, :manufacturer, :model_name, :description)
-            RETURNING id, instrument_type_id, manufacturer, model_name, description
-            """,
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/instrument-models", response_model=list[InstrumentModelOut])
-async def list_instrument_models(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT id, instrument_type_id, manufacturer, model_name, description
-        FROM metrology.instrument_model
-        ORDER BY manufacturer, model_name
-        LIMIT :limit OFFSET :offset
-        """,
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/instrument-models/{instrument_model_id}", response_model=InstrumentModelOut)
-async def get_instrument_model(instrument_model_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        """
-        SELECT id, instrument_type_id, manufacturer, model_name, description
-        FROM metrology.instrument_model
-        WHERE id=:id
-        """,
-        {"id": instrument_model_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="instrument_model not found")
-    return row
-
-
-@router.patch("/instrument-models/{instrument_model_id}", response_model=InstrumentModelOut)
-async def update_instrument_model(
-    instrument_model_id: UUID, payload: InstrumentModelUpdate, conn: AsyncConnection = Depends(get_conn)
-):
-    data = payload.model_dump(exclude_unset=True)
-    sql, params = _build_update_sql(
-        table="metrology.instrument_model",
-        id_name="id",
-        id_value=instrument_model_id,
-        data=data,
-        allowed_cols={"instrument_type_id", "manufacturer", "model_name", "description"},
-        returning_cols="id, instrument_type_id, manufacturer, model_name, description",
-    )
-    async with conn.begin():
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="instrument_model not found")
-        return row
-
-
-@router.delete("/instrument-models/{instrument_model_id}")
-async def delete_instrument_model(instrument_model_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.instrument_model WHERE id=:id RETURNING id",
-            {"id": instrument_model_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="instrument_model not found")
-        return {"status": "ok"}
-
-
-@router.post("/instruments", response_model=InstrumentOut)
-async def create_instrument(payload: InstrumentCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        status_row = await _fetch_one(
-            conn,
-            "SELECT id FROM metrology.instrument_status WHERE code=:code",
-            {"code": payload.status_code},
-        )
-        if not status_row:
-            raise HTTPException(status_code=400, detail="Unknown instrument status_code")
 
-        data = payload.model_dump()
-        data["status_id"] = status_row["id"]
+def _parse_bulk_rows(body: bytes, content_type: str) -> list[dict[str, Any]]:
+    try:
+        text_body = body.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8") from exc
+
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(text_body))
+        return [{k: (v if v != "" else None) for k, v in r.items() if k} for r in reader]
+    if "ndjson" in content_type or "jsonl" in content_type:
+        rows = []
+        for line_no, line in enumerate(text_body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_no}") from exc
+        return rows
+    raise HTTPException(status_code=415, detail="Use text/csv or application/x-ndjson")
+
+
+def _to_numeric(value: float | None) -> Decimal | None:
+    return Decimal(repr(value)) if value is not None else None
+
+
+@router.post(
+    "/instruments/bulk",
+    response_model=InstrumentBulkOut,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_create_instruments(request: Request, tx: TransactionRunner = Depends(get_tx())):
+    raw_rows = _parse_bulk_rows(await request.body(), request.headers.get("content-type", ""))
+    if len(raw_rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per request")
+
+    errors: list[InstrumentBulkRowError] = []
+    valid: list[tuple[int, InstrumentCreate]] = []
+    for row_no, raw in enumerate(raw_rows, start=1):
+        try:
+            valid.append((row_no, InstrumentCreate.model_validate(raw)))
+        except ValidationError as exc:
+            first = exc.errors()[0]
+            detail = ".".join(str(p) for p in first["loc"]) + ": " + first["msg"] if first["loc"] else first["msg"]
+            errors.append(InstrumentBulkRowError(row=row_no, error="validation_error", detail=detail))
+    rejected = len(errors)
+
+    # May run more than once (see app.transactions), so it only returns what it found
+    async def insert(conn: AsyncConnection) -> tuple[int, list[InstrumentBulkRowError], list[InstrumentBulkRowError]]:
+        inserted = 0
+        unknown: list[InstrumentBulkRowError] = []
+        failed: list[InstrumentBulkRowError] = []
+        status_ids = await refdata.codes(conn, "instrument_status")
+        records = []
+        for row_no, item in valid:
+            status_id = status_ids.get(item.status_code)
+            if status_id is None:
+                unknown.append(InstrumentBulkRowError(row=row_no, error="unknown_status_code"))
+                continue
+            records.append(
+                (
+                    row_no,
+                    item.instrument_model_id,
+                    item.inventory_no,
+                    item.serial_no,
+                    _to_numeric(item.range_min),
+                    _to_numeric(item.range_max),
+                    item.range_unit,
+                    _to_numeric(item.error_limit),
+                    item.error_unit,
+                    item.accuracy_class,
+                    item.org_unit_id,
+                    item.location_id,
+                    item.installed_at,
+                    status_id,
+                )
+            )
 
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.instrument(
-              instrument_model_id, inventory_no, serial_no,
-              range_min, range_max, range_unit,
-              error_limit, error_unit, accuracy_class,
-              org_unit_id, location_id, installed_at, status_id
+        if records:
+            await conn.execute(
+                text(
+                    """
+                    CREATE TEMP TABLE instrument_bulk_stage (
+                      row_no integer PRIMARY KEY,
+                      instrument_model_id uuid NOT NULL,
+                      inventory_no text NOT NULL,
+                      serial_no text,
+                      range_min numeric,
+                      range_max numeric,
+                      range_unit text,
+                      error_limit numeric,
+                      error_unit text,
+                      accuracy_class text,
+                      org_unit_id uuid NOT NULL,
+                      location_id uuid NOT NULL,
+                      installed_at timestamptz,
+                      status_id uuid NOT NULL,
+                      error text
+                    ) ON COMMIT DROP
+                    """
+                )
             )
-            VALUES (
-              :instrument_model_id, :inventory_no, :serial_no,
-              :range_min, :range_max, :range_unit,
-              :error_limit, :error_unit, :accuracy_class,
-              :org_unit_id, :location_id, :installed_at, :status_id
+            raw_conn = await conn.get_raw_connection()
+            await raw_conn.driver_connection.copy_records_to_table(
+                "instrument_bulk_stage", records=records, columns=_BULK_STAGE_COLUMNS
             )
-            RETURNING id, instrument_model_id, inventory_no, serial_no, org_unit_id, location_id, status_id, installed_at
-            """,
-            data,
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/instruments", response_model=list[InstrumentOut])
-async def list_instruments(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT id, instrument_model_id, inventory_no, serial_no, org_unit_id, location_id, status_id, installed_at
-        FROM metrology.instrument
-        ORDER BY inventory_no
-        LIMIT :limit OFFSET :offset
-        """,
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/instruments/{instrument_id}", response_model=InstrumentOut)
-async def get_instrument(instrument_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        """
-        SELECT id, instrument_model_id, inventory_no, serial_no, org_unit_id, location_id, status_id, installed_at
-        FROM metrology.instrument
-        WHERE id=:id
-        """,
-        {"id": instrument_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="instrument not found")
-    return row
 
+            # Check constraints set-based up front, so one bad row does not abort the batch
+            await conn.execute(
+                text(
+                    """
+                    UPDATE instrument_bulk_stage s
+                       SET error = c.error
+                    FROM (
+                      SELECT
+                        s.row_no,
+                        CASE
+                          WHEN m.id IS NULL THEN 'fk_instrument_model'
+                          WHEN ou.id IS NULL THEN 'fk_instrument_org_unit'
+                          WHEN loc.id IS NULL THEN 'fk_instrument_location'
+                          WHEN loc.org_unit_id <> s.org_unit_id THEN 'location_org_unit_mismatch'
+                          WHEN s.range_min > s.range_max THEN 'ck_range_order'
+                          WHEN i.id IS NOT NULL THEN 'uq_instrument_inventory'
+                          WHEN row_number() OVER (PARTITION BY s.inventory_no ORDER BY s.row_no) > 1
+                            THEN 'uq_instrument_inventory'
+                        END AS error
+                      FROM instrument_bulk_stage s
+                      LEFT JOIN metrology.instrument_model m ON m.id = s.instrument_model_id
+                      LEFT JOIN metrology.org_unit ou ON ou.id = s.org_unit_id
+                      LEFT JOIN metrology.location loc ON loc.id = s.location_id
+                      LEFT JOIN metrology.instrument i ON i.inventory_no = s.inventory_no
+                    ) c
+                    WHERE c.row_no = s.row_no
+                      AND c.error IS NOT NULL
+                    """
+                )
+            )
 
-@router.patch("/instruments/{instrument_id}", response_model=InstrumentOut)
-async def update_instrument(instrument_id: UUID, payload: InstrumentUpdate, conn: AsyncConnection = Depends(get_conn)):
-    data = payload.model_dump(exclude_unset=True)
-    async with conn.begin():
-        if "status_code" in data:
-            status_row = await _fetch_one(
+            # Rows that lose a race with a concurrent insert are reported, not raised
+            row = await fetch_one(
                 conn,
-                "SELECT id FROM metrology.instrument_status WHERE code=:code",
-                {"code": data["status_code"]},
+                """
+                WITH ins AS (
+                  INSERT INTO metrology.instrument(
+                    instrument_model_id, inventory_no, serial_no,
+                    range_min, range_max, range_unit,
+                    error_limit, error_unit, accuracy_class,
+                    org_unit_id, location_id, installed_at, status_id
+                  )
+                  SELECT
+                    instrument_model_id, inventory_no, serial_no,
+                    range_min, range_max, range_unit,
+                    error_limit, error_unit, accuracy_class,
+                    org_unit_id, location_id, installed_at, status_id
+                  FROM instrument_bulk_stage
+                  WHERE error IS NULL
+                  ORDER BY row_no
+                  ON CONFLICT ON CONSTRAINT uq_instrument_inventory DO NOTHING
+                  RETURNING inventory_no
+                ),
+                lost AS (
+                  UPDATE instrument_bulk_stage s
+                     SET error = 'uq_instrument_inventory'
+                  WHERE s.error IS NULL
+                    AND NOT EXISTS (SELECT 1 FROM ins WHERE ins.inventory_no = s.inventory_no)
+                )
+                SELECT count(*) AS inserted FROM ins
+                """,
+                {},
             )
-            if not status_row:
-                raise HTTPException(status_code=400, detail="Unknown instrument status_code")
-            data.pop("status_code", None)
-            data["status_id"] = status_row["id"]
-
-        sql, params = _build_update_sql(
-            table="metrology.instrument",
-            id_name="id",
-            id_value=instrument_id,
-            data=data,
-            allowed_cols={
-                "instrument_model_id",
-                "inventory_no",
-                "serial_no",
-                "range_min",
-                "range_max",
-                "range_unit",
-                "error_limit",
-                "error_unit",
-                "accuracy_class",
-                "org_unit_id",
-                "location_id",
-                "installed_at",
-                "status_id",
-            },
-            returning_cols="id, instrument_model_id, inventory_no, serial_no, org_unit_id, location_id, status_id, installed_at",
-        )
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="instrument not found")
-        return row
-
-
-@router.delete("/instruments/{instrument_id}")
-async def delete_instrument(instrument_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.instrument WHERE id=:id RETURNING id",
-            {"id": instrument_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="instrument not found")
-        return {"status": "ok"}
-
-
-@router.post("/documents", response_model=DocumentOut)
-async def create_document(payload: DocumentCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        doc_type = await _fetch_one(
-            conn,
-            "SELECT id FROM metrology.document_type WHERE code=:code",
-            {"code": payload.document_type_code},
-        )
-        if not doc_type:
-            raise HTTPException(status_code=400, detail="Unknown document_type_code")
-
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.document(document_type_id, title, storage_ref, sha256)
-            VALUES (:document_type_id, :title, :storage_ref, :sha256)
-            RETURNING id, document_type_id, title, storage_ref, sha256, created_at
-            """,
-            {
-                "document_type_id": doc_type["id"],
-                "title": payload.title,
-                "storage_ref": payload.storage_ref,
-                "sha256": payload.sha256,
-            },
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/documents", response_model=list[DocumentOut])
-async def list_documents(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT id, document_type_id, title, storage_ref, sha256, created_at
-        FROM metrology.document
-        ORDER BY created_at DESC
-        LIMIT :limit OFFSET :offset
-        """,
-        {"limit": limit, "offset": offset},
-    )
-
+            assert row is not None
+            inserted = row["inserted"]
 
-@router.get("/documents/{document_id}", response_model=DocumentOut)
-async def get_document(document_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        """
-        SELECT id, document_type_id, title, storage_ref, sha256, created_at
-        FROM metrology.document
-        WHERE id=:id
-        """,
-        {"id": document_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="document not found")
-    return row
-
-
-@router.patch("/documents/{document_id}", response_model=DocumentOut)
-async def update_document(document_id: UUID, payload: DocumentUpdate, conn: AsyncConnection = Depends(get_conn)):
-    data = payload.model_dump(exclude_unset=True)
-    async with conn.begin():
-        if "document_type_code" in data:
-            doc_type = await _fetch_one(
+            rows = await fetch_all(
                 conn,
-                "SELECT id FROM metrology.document_type WHERE code=:code",
-                {"code": data["document_type_code"]},
+                "SELECT row_no, error FROM instrument_bulk_stage WHERE error IS NOT NULL",
+                {},
             )
-            if not doc_type:
-                raise HTTPException(status_code=400, detail="Unknown document_type_code")
-            data.pop("document_type_code", None)
-            data["document_type_id"] = doc_type["id"]
-
-        sql, params = _build_update_sql(
-            table="metrology.document",
-            id_name="id",
-            id_value=document_id,
-            data=data,
-            allowed_cols={"document_type_id", "title", "storage_ref", "sha256"},
-            returning_cols="id, document_type_id, title, storage_ref, sha256, created_at",
-        )
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="document not found")
-        return row
-
+            failed = [InstrumentBulkRowError(row=r["row_no"], error=r["error"]) for r in rows]
+        return inserted, unknown, failed
 
-@router.delete("/documents/{document_id}")
-async def delete_document(document_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.document WHERE id=:id RETURNING id",
-            {"id": document_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="document not found")
-        return {"status": "ok"}
+    inserted, unknown, failed = await tx.run(insert)
+    rejected += len(unknown)
+    constraint_errors = len(failed)
+    errors += unknown + failed
+    errors.sort(key=lambda e: e.row)
+    return InstrumentBulkOut(
+        received=len(raw_rows),
+        inserted=inserted,
+        rejected=rejected,
+        constraint_errors=constraint_errors,
+        errors=errors,
+    )
 
 
 @router.post("/check-events/register", response_model=RegisterCheckEventOut)
-async def register_check_event(payload: RegisterCheckEventIn, conn: AsyncConnection = Depends(get_conn)):
+async def register_check_event(payload: RegisterCheckEventIn, tx: TransactionRunner = Depends(get_tx())):
     doc_ids = payload.document_ids or []
-    async with conn.begin():
-        row = await _fetch_one(
+
+    async def register(conn: AsyncConnection) -> Any:
+        row = await fetch_one(
             conn,
             """
             SELECT metrology.fn_register_check_event(
@@ -803,336 +304,61 @@ async def register_check_event(payload: RegisterCheckEventIn, conn: AsyncConnect
         assert row is not None
         return row
 
+    return await tx.run(register)
 
-@router.get("/check-events", response_model=list[CheckEventOut])
-async def list_check_events(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT id, instrument_id, check_plan_id, check_type_id, lab_id, specialist_id,
-               check_date, result_status_id, protocol_no, next_due_date, notes, created_at
-        FROM metrology.check_event
-        ORDER BY check_date DESC, created_at DESC
-        LIMIT :limit OFFSET :offset
-        """,
-        {"limit": limit, "offset": offset},
-    )
 
+@router.post("/check-events/register-batch", response_model=RegisterCheckEventsBatchOut)
+async def register_check_events_batch(payload: RegisterCheckEventsBatchIn, tx: TransactionRunner = Depends(get_tx())):
+    events = payload.events
+    doc_event_nos = [no for no, e in enumerate(events, start=1) for _ in e.document_ids or ()]
+    doc_ids = [doc_id for e in events for doc_id in e.document_ids or ()]
 
-@router.get("/check-events/{event_id}", response_model=CheckEventOut)
-async def get_check_event(event_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        """
-        SELECT id, instrument_id, check_plan_id, check_type_id, lab_id, specialist_id,
-               check_date, result_status_id, protocol_no, next_due_date, notes, created_at
-        FROM metrology.check_event
-        WHERE id=:id
-        """,
-        {"id": event_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="check_event not found")
-    return row
-
-
-@router.post("/check-types", response_model=CheckTypeOut)
-async def create_check_type(payload: CheckTypeCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        kind = await _fetch_one(
-            conn,
-            "SELECT id FROM metrology.check_kind WHERE code=:code",
-            {"code": payload.kind_code},
-        )
-        if not kind:
-            raise HTTPException(status_code=400, detail="Unknown kind_code")
-
-        row = await _fetch_one(
+    async def register(conn: AsyncConnection) -> dict:
+        rows = await fetch_all(
             conn,
             """
-            INSERT INTO metrology.check_type(code, name, check_kind_id)
-            VALUES (:code, :name, :check_kind_id)
-            RETURNING id, code, name, check_kind_id
-            """,
-            {"code": payload.code, "name": payload.name, "check_kind_id": kind["id"]},
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/check-types", response_model=list[CheckTypeOut])
-async def list_check_types(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        "SELECT id, code, name, check_kind_id FROM metrology.check_type ORDER BY code LIMIT :limit OFFSET :offset",
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/check-types/{check_type_id}", response_model=CheckTypeOut)
-async def get_check_type(check_type_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        "SELECT id, code, name, check_kind_id FROM metrology.check_type WHERE id=:id",
-        {"id": check_type_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="check_type not found")
-    return row
-
-
-@router.patch("/check-types/{check_type_id}", response_model=CheckTypeOut)
-async def update_check_type(check_type_id: UUID, payload: CheckTypeUpdate, conn: AsyncConnection = Depends(get_conn)):
-    data = payload.model_dump(exclude_unset=True)
-    async with conn.begin():
-        if "kind_code" in data:
-            kind = await _fetch_one(
-                conn,
-                "SELECT id FROM metrology.check_kind WHERE code=:code",
-                {"code": data["kind_code"]},
-            )
-            if not kind:
-                raise HTTPException(status_code=400, detail="Unknown kind_code")
-            data.pop("kind_code", None)
-            data["check_kind_id"] = kind["id"]
-
-        sql, params = _build_update_sql(
-            table="metrology.check_type",
-            id_name="id",
-            id_value=check_type_id,
-            data=data,
-            allowed_cols={"code", "name", "check_kind_id"},
-            returning_cols="id, code, name, check_kind_id",
-        )
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="check_type not found")
-        return row
-
-
-@router.delete("/check-types/{check_type_id}")
-async def delete_check_type(check_type_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.check_type WHERE id=:id RETURNING id",
-            {"id": check_type_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="check_type not found")
-        return {"status": "ok"}
-
-
-@router.post("/check-requirements", response_model=CheckRequirementOut)
-async def create_check_requirement(payload: CheckRequirementCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.check_requirement(
-              instrument_model_id, check_type_id, interval_months, grace_days, is_mandatory, notes
-            )
-            VALUES (
-              :instrument_model_id, :check_type_id, :interval_months, :grace_days, :is_mandatory, :notes
-            )
-            RETURNING id, instrument_model_id, check_type_id, interval_months, grace_days, is_mandatory, notes
-            """,
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/check-requirements", response_model=list[CheckRequirementOut])
-async def list_check_requirements(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT id, instrument_model_id, check_type_id, interval_months, grace_days, is_mandatory, notes
-        FROM metrology.check_requirement
-        ORDER BY instrument_model_id, check_type_id
-        LIMIT :limit OFFSET :offset
-        """,
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/check-requirements/{requirement_id}", response_model=CheckRequirementOut)
-async def get_check_requirement(requirement_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        """
-        SELECT id, instrument_model_id, check_type_id, interval_months, grace_days, is_mandatory, notes
-        FROM metrology.check_requirement
-        WHERE id=:id
-        """,
-        {"id": requirement_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="check_requirement not found")
-    return row
-
-
-@router.patch("/check-requirements/{requirement_id}", response_model=CheckRequirementOut)
-async def update_check_requirement(
-    requirement_id: UUID, payload: CheckRequirementUpdate, conn: AsyncConnection = Depends(get_conn)
-):
-    data = payload.model_dump(exclude_unset=True)
-    sql, params = _build_update_sql(
-        table="metrology.check_requirement",
-        id_name="id",
-        id_value=requirement_id,
-        data=data,
-        allowed_cols={"interval_months", "grace_days", "is_mandatory", "notes"},
-        returning_cols="id, instrument_model_id, check_type_id, interval_months, grace_days, is_mandatory, notes",
-    )
-    async with conn.begin():
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="check_requirement not found")
-        return row
-
-
-@router.delete("/check-requirements/{requirement_id}")
-async def delete_check_requirement(requirement_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.check_requirement WHERE id=:id RETURNING id",
-            {"id": requirement_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="check_requirement not found")
-        return {"status": "ok"}
-
-
-@router.post("/check-plans", response_model=CheckPlanOut)
-async def create_check_plan(payload: CheckPlanCreate, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        status = await _fetch_one(
-            conn,
-            "SELECT id FROM metrology.check_plan_status WHERE code='PLANNED'",
-            {},
-        )
-        if not status:
-            raise HTTPException(status_code=500, detail="check_plan_status not seeded")
-
-        row = await _fetch_one(
-            conn,
-            """
-            INSERT INTO metrology.check_plan(
-              instrument_id, check_type_id, due_date,
-              planned_lab_id, planned_specialist_id, status_id, notes
-            )
-            VALUES (
-              :instrument_id, :check_type_id, :due_date,
-              :planned_lab_id, :planned_specialist_id, :status_id, :notes
+            SELECT event_no, event_id
+            FROM metrology.fn_register_check_events(
+              :instrument_ids,
+              :check_type_ids,
+              :check_dates,
+              :result_codes,
+              :lab_ids,
+              :specialist_ids,
+              :check_plan_ids,
+              :protocol_nos,
+              :notes,
+              :document_event_nos,
+              :document_ids
             )
-            RETURNING id, instrument_id, check_type_id, due_date, planned_lab_id, planned_specialist_id, status_id, created_at, notes
+            ORDER BY event_no
             """,
-            {**payload.model_dump(), "status_id": status["id"]},
-        )
-        assert row is not None
-        return row
-
-
-@router.get("/check-plans", response_model=list[CheckPlanOut])
-async def list_check_plans(
-    limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0, le=1_000_000),
-    conn: AsyncConnection = Depends(get_conn),
-):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT id, instrument_id, check_type_id, due_date, planned_lab_id, planned_specialist_id,
-               status_id, created_at, notes
-        FROM metrology.check_plan
-        ORDER BY due_date DESC
-        LIMIT :limit OFFSET :offset
-        """,
-        {"limit": limit, "offset": offset},
-    )
-
-
-@router.get("/check-plans/{plan_id}", response_model=CheckPlanOut)
-async def get_check_plan(plan_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    row = await _fetch_one(
-        conn,
-        """
-        SELECT id, instrument_id, check_type_id, due_date, planned_lab_id, planned_specialist_id,
-               status_id, created_at, notes
-        FROM metrology.check_plan
-        WHERE id=:id
-        """,
-        {"id": plan_id},
-    )
-    if not row:
-        raise HTTPException(status_code=404, detail="check_plan not found")
-    return row
-
-
-@router.patch("/check-plans/{plan_id}", response_model=CheckPlanOut)
-async def update_check_plan(plan_id: UUID, payload: CheckPlanUpdate, conn: AsyncConnection = Depends(get_conn)):
-    data = payload.model_dump(exclude_unset=True)
-    async with conn.begin():
-        if "status_code" in data:
-            status = await _fetch_one(
-                conn,
-                "SELECT id FROM metrology.check_plan_status WHERE code=:code",
-                {"code": data["status_code"]},
-            )
-            if not status:
-                raise HTTPException(status_code=400, detail="Unknown status_code")
-            data.pop("status_code", None)
-            data["status_id"] = status["id"]
-
-        sql, params = _build_update_sql(
-            table="metrology.check_plan",
-            id_name="id",
-            id_value=plan_id,
-            data=data,
-            allowed_cols={"due_date", "planned_lab_id", "planned_specialist_id", "notes", "status_id"},
-            returning_cols="id, instrument_id, check_type_id, due_date, planned_lab_id, planned_specialist_id, status_id, created_at, notes",
+            {
+                "instrument_ids": [e.instrument_id for e in events],
+                "check_type_ids": [e.check_type_id for e in events],
+                "check_dates": [e.check_date for e in events],
+                "result_codes": [e.result_code for e in events],
+                "lab_ids": [e.lab_id for e in events],
+                "specialist_ids": [e.specialist_id for e in events],
+                "check_plan_ids": [e.check_plan_id for e in events],
+                "protocol_nos": [e.protocol_no for e in events],
+                "notes": [e.notes for e in events],
+                "document_event_nos": doc_event_nos if doc_ids else None,
+                "document_ids": doc_ids if doc_ids else None,
+            },
         )
-        row = await _fetch_one(conn, sql, params)
-        if not row:
-            raise HTTPException(status_code=404, detail="check_plan not found")
-        return row
+        return {"event_ids": [r["event_id"] for r in rows]}
 
-
-@router.delete("/check-plans/{plan_id}")
-async def delete_check_plan(plan_id: UUID, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "DELETE FROM metrology.check_plan WHERE id=:id RETURNING id",
-            {"id": plan_id},
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="check_plan not found")
-        return {"status": "ok"}
+    return await tx.run(register)
 
 
 @router.post("/instruments/{instrument_id}/decommission")
 async def decommission_instrument(
     instrument_id: UUID,
     payload: DecommissionInstrumentIn,
-    conn: AsyncConnection = Depends(get_conn),
+    tx: TransactionRunner = Depends(get_tx()),
 ):
-    async with conn.begin():
+    async def decommission(conn: AsyncConnection) -> dict:
         await conn.execute(
             text(
                 """
@@ -1151,50 +377,219 @@ async def decommission_instrument(
         )
         return {"status": "ok"}
 
+    return await tx.run(decommission)
+
+
+# The whole instrument card as one JSON document; keys follow InstrumentFullOut
+_INSTRUMENT_FULL_SQL = f"""
+    SELECT json_build_object(
+      'id', i.id,
+      'inventory_no', i.inventory_no,
+      'serial_no', i.serial_no,
+      'range_min', i.range_min,
+      'range_max', i.range_max,
+      'range_unit', i.range_unit,
+      'error_limit', i.error_limit,
+      'error_unit', i.error_unit,
+      'accuracy_class', i.accuracy_class,
+      'installed_at', {json_timestamp_sql('i.installed_at')},
+      'decommissioned_at', {json_timestamp_sql('i.decommissioned_at')},
+      'decommission_reason', i.decommission_reason,
+      'replaced_by_instrument_id', i.replaced_by_instrument_id,
+      'status', json_build_object('id', st.id, 'code', st.code, 'name', st.name),
+      'model', json_build_object(
+        'id', m.id,
+        'instrument_type_id', m.instrument_type_id,
+        'manufacturer', m.manufacturer,
+        'model_name', m.model_name,
+        'description', m.description
+      ),
+      'type', json_build_object('id', t.id, 'code', t.code, 'name', t.name),
+      'location', json_build_object('id', l.id, 'org_unit_id', l.org_unit_id, 'code', l.code, 'name', l.name),
+      'org_unit', json_build_object('id', ou.id, 'code', ou.code, 'name', ou.name, 'parent_id', ou.parent_id),
+      'next_due', nd.items,
+      'recent_events', ev.items,
+      'open_plans', pl.items,
+      'status_history', sh.items
+    )::text
+    FROM metrology.instrument i
+    JOIN metrology.instrument_status st ON st.id = i.status_id
+    JOIN metrology.instrument_model m ON m.id = i.instrument_model_id
+    JOIN metrology.instrument_type t ON t.id = m.instrument_type_id
+    JOIN metrology.location l ON l.id = i.location_id
+    JOIN metrology.org_unit ou ON ou.id = i.org_unit_id
+    CROSS JOIN LATERAL (
+      SELECT coalesce(json_agg(json_build_object(
+        'check_type_id', v.check_type_id,
+        'check_type_code', v.check_type_code,
+        'check_type_name', v.check_type_name,
+        'last_check_date', v.last_check_date,
+        'next_due_date', v.next_due_date,
+        'days_to_due', v.days_to_due
+      ) ORDER BY v.next_due_date, v.check_type_code), '[]') AS items
+      FROM metrology.v_instrument_check_next_due v
+      -- The bind, not i.id, so the filter reaches the view's GROUP BY over check_event
+      WHERE v.instrument_id = :id
+    ) nd
+    CROSS JOIN LATERAL (
+      SELECT coalesce(json_agg(json_build_object(
+        'id', e.id,
+        'instrument_id', e.instrument_id,
+        'check_plan_id', e.check_plan_id,
+        'check_type_id', e.check_type_id,
+        'lab_id', e.lab_id,
+        'specialist_id', e.specialist_id,
+        'check_date', e.check_date,
+        'result_status_id', e.result_status_id,
+        'protocol_no', e.protocol_no,
+        'next_due_date', e.next_due_date,
+        'notes', e.notes,
+        'created_at', {json_timestamp_sql('e.created_at')},
+        'result_code', rs.code
+      ) ORDER BY e.check_date DESC, e.created_at DESC, e.id DESC), '[]') AS items
+      FROM (
+        SELECT *
+        FROM metrology.check_event ce
+        WHERE ce.instrument_id = i.id
+        ORDER BY ce.check_date DESC, ce.created_at DESC, ce.id DESC
+        LIMIT :events
+      ) e
+      JOIN metrology.check_result_status rs ON rs.id = e.result_status_id
+    ) ev
+    CROSS JOIN LATERAL (
+      SELECT coalesce(json_agg(json_build_object(
+        'id', p.id,
+        'instrument_id', p.instrument_id,
+        'check_type_id', p.check_type_id,
+        'due_date', p.due_date,
+        'planned_lab_id', p.planned_lab_id,
+        'planned_specialist_id', p.planned_specialist_id,
+        'status_id', p.status_id,
+        'created_at', {json_timestamp_sql('p.created_at')},
+        'notes', p.notes
+      ) ORDER BY p.due_date, p.id), '[]') AS items
+      FROM metrology.check_plan p
+      JOIN metrology.check_plan_status ps ON ps.id = p.status_id
+      WHERE p.instrument_id = i.id AND ps.code = 'PLANNED'
+    ) pl
+    CROSS JOIN LATERAL (
+      SELECT coalesce(json_agg(json_build_object(
+        'id', h.id,
+        'status_code', hs.code,
+        'valid_from', {json_timestamp_sql('h.valid_from')},
+        'valid_to', {json_timestamp_sql('h.valid_to')},
+        'reason', h.reason
+      ) ORDER BY h.valid_from DESC, h.id), '[]') AS items
+      FROM metrology.instrument_status_history h
+      JOIN metrology.instrument_status hs ON hs.id = h.status_id
+      WHERE h.instrument_id = i.id
+    ) sh
+    WHERE i.id = :id
+"""
+
+
+@router.get("/instruments/{instrument_id}/full", response_model=InstrumentFullOut)
+async def get_instrument_full(
+    instrument_id: UUID,
+    events: int = Query(default=10, ge=0, le=100, description="Most recent check events to include"),
+    conn: AsyncConnection = Depends(get_read_conn),
+):
+    res = await conn.execute(sql(_INSTRUMENT_FULL_SQL), {"id": instrument_id, "events": events})
+    body = res.scalar_one_or_none()
+    if body is None:
+        raise HTTPException(status_code=404, detail="instrument not found")
+    if settings.json_passthrough_validate:
+        InstrumentFullOut.model_validate_json(body)
+    return Response(content=body, media_type="application/json")
 
-@router.post("/plans/generate", response_model=GeneratePlansOut)
-async def generate_plans(payload: GeneratePlansIn, conn: AsyncConnection = Depends(get_conn)):
-    async with conn.begin():
-        row = await _fetch_one(
-            conn,
-            "SELECT metrology.fn_generate_check_plan(:from_date, :to_date) AS inserted",
-            payload.model_dump(),
-        )
-        assert row is not None
-        return row
+
+@router.post("/plans/generate", response_model=PlanJobOut, status_code=202)
+async def generate_plans(payload: GeneratePlansIn, response: Response, tx: TransactionRunner = Depends(get_tx())):
+    """Queue plan generation for the range; progress and inserted counts are at GET /jobs/{job_id}."""
+    if payload.to_date < payload.from_date:
+        raise HTTPException(status_code=400, detail="to_date is before from_date")
+
+    async def enqueue(conn: AsyncConnection) -> dict | None:
+        job_id = await enqueue_plan_job(conn, payload.from_date, payload.to_date, payload.partitions)
+        return await fetch_plan_job(conn, job_id)
+
+    job = await tx.run(enqueue)
+    assert job is not None
+    job_id = job["id"]
+    plan_jobs.wake()
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=PlanJobOut)
+async def get_job(job_id: UUID, conn: AsyncConnection = Depends(get_read_conn)):
+    job = await fetch_plan_job(conn, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+async def _render_mview_report(conn: AsyncConnection, mview: str) -> tuple[DataVersion, bytes]:
+    # One statement, one snapshot: the generation is exactly the one the body was built from
+    res = await conn.execute(
+        sql(
+            f"""
+            SELECT coalesce(v.version, 0) AS version, coalesce(v.changed_us, 0) AS changed_us, r.body
+            FROM (
+              SELECT coalesce(json_agg(t ORDER BY t.next_due_date, t.inventory_no), '[]')::text AS body
+              FROM metrology.{mview} t
+            ) r
+            LEFT JOIN (
+              SELECT version, {CHANGED_US_SQL} AS changed_us FROM metrology.data_version WHERE name = :name
+            ) v ON true
+            """
+        ),
+        {"name": mview},
+    )
+    row = res.one()
+    return DataVersion(row.version, row.changed_us), row.body.encode()
+
+
+async def _mview_report(request: Request, mview: str, if_none_match: str | None) -> Response:
+    # Both the ETag and the cached body follow the mview refresh generation. While the
+    # NOTIFY listener is up that generation is known in process, and a hit or a 304
+    # never checks out a connection.
+    async with AsyncExitStack() as stack:
+        conn = None
+        current = refdata.data_version(mview)
+        if current is None:
+            conn = await stack.enter_async_context(read_conn(request))
+            current = await fetch_data_version(conn, mview)
+        if etag_matches(if_none_match, current.etag(mview)):
+            return not_modified(current.etag(mview))
+        entry = report_cache.get(mview, current)
+        if entry is None:
+            if conn is None:
+                conn = await stack.enter_async_context(read_conn(request))
+            # A lagging standby may render an older generation: served under its own tag, never cached over a newer one
+            entry = await _render_mview_report(conn, mview)
+            report_cache.put(mview, *entry)
+    generation, body = entry
+    response = Response(content=body, media_type="application/json")
+    set_etag(response, generation.etag(mview))
+    return response
 
 
 @router.get("/reports/due-30d")
-async def report_due_30d(conn: AsyncConnection = Depends(get_conn)):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT *
-        FROM metrology.mv_instruments_due_30d
-        ORDER BY next_due_date, inventory_no
-        """,
-        {},
-    )
+async def report_due_30d(request: Request, if_none_match: str | None = Header(default=None)):
+    return await _mview_report(request, "mv_instruments_due_30d", if_none_match)
 
 
 @router.get("/reports/overdue")
-async def report_overdue(conn: AsyncConnection = Depends(get_conn)):
-    return await _fetch_all(
-        conn,
-        """
-        SELECT *
-        FROM metrology.mv_instruments_overdue
-        ORDER BY next_due_date, inventory_no
-        """,
-        {},
-    )
+async def report_overdue(request: Request, if_none_match: str | None = Header(default=None)):
+    return await _mview_report(request, "mv_instruments_overdue", if_none_match)
 
 
 @router.get("/reports/by-lab")
 async def report_by_lab(
     from_date: date | None = Query(default=None),
     to_date: date | None = Query(default=None),
-    conn: AsyncConnection = Depends(get_conn),
+    conn: AsyncConnection = Depends(get_read_conn),
 ):
     where = []
     params: dict = {}
@@ -1206,7 +601,7 @@ async def report_by_lab(
         params["to_date"] = to_date
     where_sql = ("WHERE " + " AND ".join(where)) if where else ""
 
-    return await _fetch_all(
+    return await fetch_all(
         conn,
         f"""
         SELECT
@@ -1228,8 +623,8 @@ async def report_by_lab(
 
 
 @router.get("/reports/by-org-unit")
-async def report_by_org_unit(conn: AsyncConnection = Depends(get_conn)):
-    return await _fetch_all(
+async def report_by_org_unit(conn: AsyncConnection = Depends(get_read_conn)):
+    return await fetch_all(
         conn,
         """
         SELECT
@@ -1246,17 +641,77 @@ async def report_by_org_unit(conn: AsyncConnection = Depends(get_conn)):
     )
 
 
+# Nearest trigram matches pulled per instrument column before ranking (GiST KNN, migration 0015):
+# bounds the work when a short q ("GEN-0") matches a large part of the table, yet keeps the best
+# hits, since each of the top `limit` is among the top `limit` of its better-scoring column.
+# An exact inventory number always ranks.
+SEARCH_CANDIDATES = 200
+
+_SEARCH_SQL = """
+    WITH instrument_hits AS (
+      SELECT
+        i.id,
+        i.inventory_no AS label,
+        i.serial_no AS detail,
+        greatest(word_similarity(:q, i.inventory_no), coalesce(word_similarity(:q, i.serial_no), 0)) AS score
+      FROM (
+        SELECT id FROM metrology.instrument WHERE inventory_no = :q
+        UNION
+        (
+          SELECT id FROM metrology.instrument WHERE :q <% inventory_no
+          ORDER BY :q <<-> inventory_no LIMIT :candidates
+        )
+        UNION
+        (
+          SELECT id FROM metrology.instrument WHERE :q <% serial_no
+          ORDER BY :q <<-> serial_no LIMIT :candidates
+        )
+      ) c
+      JOIN metrology.instrument i ON i.id = c.id
+      ORDER BY score DESC, i.inventory_no
+      LIMIT :limit
+    ),
+    model_hits AS (
+      SELECT
+        m.id,
+        m.model_name AS label,
+        m.manufacturer AS detail,
+        greatest(word_similarity(:q, m.manufacturer), word_similarity(:q, m.model_name)) AS score
+      FROM metrology.instrument_model m
+      WHERE :q <% m.manufacturer OR :q <% m.model_name
+      ORDER BY score DESC, m.manufacturer, m.model_name
+      LIMIT :limit
+    )
+    SELECT 'instrument' AS type, id, label, detail, score FROM instrument_hits
+    UNION ALL
+    SELECT 'instrument_model', id, label, detail, score FROM model_hits
+    ORDER BY score DESC, type, label
+"""
+
+
+@router.get("/search", response_model=list[SearchHitOut])
+async def search(
+    q: str = Query(min_length=3, max_length=128, description="Part of an inventory/serial number or model name"),
+    limit: int = Query(default=10, ge=1, le=50, description="Maximum hits per type"),
+    conn: AsyncConnection = Depends(get_read_conn),
+):
+    return await fetch_all(conn, _SEARCH_SQL, {"q": q, "limit": limit, "candidates": SEARCH_CANDIDATES})
+
+
 @router.get("/audit", response_model=list[AuditRowOut])
 async def list_audit(
+    response: Response,
     table_name: str | None = Query(default=None),
     row_id: UUID | None = Query(default=None),
     since: datetime | None = Query(default=None),
     until: datetime | None = Query(default=None),
     limit: int = Query(default=200, ge=1, le=2000),
-    conn: AsyncConnection = Depends(get_conn),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
+    count: CountMode | None = Query(default=None, description=COUNT_DESCRIPTION),
+    conn: AsyncConnection = Depends(get_read_conn),
 ):
     where = []
-    params: dict = {"limit": limit}
+    params: dict = {}
     if table_name:
         where.append("table_name = :table_name")
         params["table_name"] = table_name
@@ -1270,18 +725,25 @@ async def list_audit(
         where.append('"at" < :until')
         params["until"] = until
 
-    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
-
-    return await _fetch_all(
-        conn,
-        f"""
-        SELECT id, at, db_user, action, table_name, row_id, old_row, new_row
-        FROM metrology.audit_log
-        {where_sql}
-        ORDER BY at DESC
-        LIMIT :limit
-        """,
-        params,
-    )
-
-
+    page = {
+        "select_sql": "SELECT id, at, db_user, action, table_name, row_id, old_row, new_row FROM metrology.audit_log",
+        "keyset": AUDIT_KEYSET,
+        "limit": limit,
+        "offset": 0,
+        "cursor": cursor,
+        "where": where,
+        "params": params,
+    }
+    if settings.json_passthrough:
+        result = await fetch_page_json(conn, out_model=AuditRowOut, **page)
+    else:
+        result = await fetch_page(conn, response, **page)
+    target = result if isinstance(result, Response) else response
+    # audit_log has no counter (migration 0016): exact falls back to the estimate too
+    if count is not None:
+        set_total_count(target, await estimate_count(conn, "metrology.audit_log", where, params), "estimate")
+    return result
+
+
+# Plain create/list/get/update/delete routes for every entity
+cruds = register_crud(router, TABLE_SPECS)
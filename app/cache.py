@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from app.refdata import DataVersion
+from app.settings import settings
+
+
+class ByteLRUCache:
+    """
+    In-process cache of pre-serialized response bodies, bounded by total body size.
+
+    Every entry is stored with the data generation it was built from. A lookup only hits
+    an entry at least as new as the generation it asks for, so a refresh invalidates
+    without a sweep; an entry is never replaced by an older body (e.g. one rendered on a
+    lagging standby), so readers on different generations do not evict each other.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[DataVersion, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, generation: DataVersion) -> tuple[DataVersion, bytes] | None:
+        """The entry and the generation it was built from, if that is not older than `generation`."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < generation:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, generation: DataVersion, body: bytes) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > generation:
+                return
+            self._drop(key)
+        if len(body) > self.max_bytes:
+            return
+        self._entries[key] = (generation, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _drop(self, key: Hashable) -> None:
+        _, body = self._entries.pop(key)
+        self.size -= len(body)
+
+
+report_cache = ByteLRUCache(settings.report_cache_max_bytes)
@@ -1,19 +1,204 @@
 from __future__ import annotations
 
+import logging
+import re
+import time
 from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
 
+from app.metrics import POOL_CHECKOUT_SECONDS, POOL_CHECKOUT_TIMEOUTS, POOL_WAITING, instrument_pool, observe_query
+from app.querylog import log_slow_query
 from app.settings import settings
 
-engine = create_async_engine(
-    settings.database_url_async,
-    pool_pre_ping=True,
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={"statement_cache_size": settings.db_statement_cache_size},
+    )
+
+
+def _instrument(bind: AsyncEngine, pool: str) -> None:
+    """Time every statement, attributed to the route that issued it (see app.metrics)."""
+
+    @event.listens_for(bind.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        _conn: Any, _cursor: Any, _statement: str, _parameters: Any, context: Any, _executemany: bool
+    ) -> None:
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(bind.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        _conn: Any, _cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        seconds = time.perf_counter() - context._query_started
+        method, route = observe_query(seconds)
+        if seconds * 1000 >= settings.slow_query_ms:
+            log_slow_query(bind, pool, statement, parameters, context, executemany, seconds, method, route)
+
+    instrument_pool(bind, pool)
+
+
+engine = _create_engine(settings.database_url_async)
+replica_engine = _create_engine(settings.database_url_async_replica) if settings.database_url_async_replica else None
+_instrument(engine, "primary")
+if replica_engine is not None:
+    _instrument(replica_engine, "replica")
+
+# Read-your-writes: responses to writes carry the primary WAL position, clients echo it back
+LAST_WRITE_LSN_HEADER = "X-Last-Write-LSN"
+LAST_WRITE_LSN_COOKIE = "last_write_lsn"
+_LSN_RE = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+      WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+      ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
 )
+# coalesce() keeps the check true when the "replica" URL points at a primary (dev setups)
+_REPLAYED_SQL = text("SELECT coalesce(pg_last_wal_replay_lsn(), pg_current_wal_lsn()) >= CAST(:lsn AS pg_lsn)")
+
+
+@dataclass
+class PoolStats:
+    """Checkout counters for connections taken through `checkout()`."""
+
+    pool: str
+    waiting: int = 0
+    checkouts: int = 0
+    timeouts: int = 0
+    checkout_seconds_total: float = 0.0
+    checkout_seconds_max: float = 0.0
+
+    def enter(self) -> None:
+        self.waiting += 1
+        POOL_WAITING.labels(self.pool).inc()
+
+    def leave(self) -> None:
+        self.waiting -= 1
+        POOL_WAITING.labels(self.pool).dec()
+
+    def timeout(self) -> None:
+        self.timeouts += 1
+        POOL_CHECKOUT_TIMEOUTS.labels(self.pool).inc()
+
+    def observe(self, seconds: float) -> None:
+        POOL_CHECKOUT_SECONDS.labels(self.pool).observe(seconds)
+        self.checkouts += 1
+        self.checkout_seconds_total += seconds
+        self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+
+
+pool_stats = PoolStats("primary")
+replica_pool_stats = PoolStats("replica")
+
+
+@dataclass
+class ReplicaHealth:
+    """Last measured standby lag; re-measured at most once per check interval."""
+
+    lag_seconds: float = 0.0
+    reachable: bool = True
+    checked_at: float = float("-inf")
+
+    @property
+    def usable(self) -> bool:
+        return self.reachable and self.lag_seconds <= settings.replica_max_lag_seconds
+
+    def due(self, now: float) -> bool:
+        return now - self.checked_at >= settings.replica_lag_check_interval_seconds
+
+
+replica_health = ReplicaHealth()
+
+
+@asynccontextmanager
+async def checkout(bind: AsyncEngine = engine, stats: PoolStats = pool_stats) -> AsyncIterator[AsyncConnection]:
+    # Latency covers the wait for a free slot, connect/pre-ping included
+    started = time.perf_counter()
+    stats.enter()
+    try:
+        conn = await bind.connect().start()
+    except PoolTimeoutError:
+        stats.timeout()
+        raise
+    finally:
+        stats.leave()
+    stats.observe(time.perf_counter() - started)
+    async with conn:
+        yield conn
+
+
+async def get_conn(request: Request) -> AsyncIterator[AsyncConnection]:
+    async with checkout() as conn:
+        yield conn
+        # Only reached when the handler succeeded
+        if replica_engine is not None and request.method not in _SAFE_METHODS:
+            request.state.last_write_lsn = await conn.scalar(text("SELECT pg_current_wal_lsn()::text"))
+
+
+def last_write_lsn(request: Request) -> str | None:
+    lsn = request.headers.get(LAST_WRITE_LSN_HEADER) or request.cookies.get(LAST_WRITE_LSN_COOKIE)
+    return lsn if lsn and _LSN_RE.match(lsn) else None
+
+
+async def _checkout_replica(stack: AsyncExitStack, lsn: str | None) -> AsyncConnection | None:
+    assert replica_engine is not None
+    now = time.monotonic()
+    due = replica_health.due(now)
+    if not due and not replica_health.usable:
+        return None
+    if due:
+        # Claimed up front so concurrent requests keep using the previous reading
+        replica_health.checked_at = now
+    try:
+        async with AsyncExitStack() as replica_stack:
+            conn = await replica_stack.enter_async_context(checkout(replica_engine, replica_pool_stats))
+            if due:
+                replica_health.lag_seconds = float(await conn.scalar(_REPLICA_LAG_SQL))
+                replica_health.reachable = True
+            if not replica_health.usable:
+                return None
+            if lsn is not None and not await conn.scalar(_REPLAYED_SQL, {"lsn": lsn}):
+                return None
+            stack.push_async_exit(replica_stack.pop_all())
+            return conn
+    except (OSError, SQLAlchemyError) as exc:
+        logger.warning("replica unavailable, reading from primary: %s", exc)
+        replica_health.reachable = False
+        replica_health.checked_at = now
+        return None
 
 
-async def get_conn() -> AsyncIterator[AsyncConnection]:
-    async with engine.connect() as conn:
+async def get_read_conn(request: Request) -> AsyncIterator[AsyncConnection]:
+    """Connection for read-only handlers: the standby when it is close enough, else the primary."""
+    async with AsyncExitStack() as stack:
+        conn = None
+        if replica_engine is not None:
+            conn = await _checkout_replica(stack, last_write_lsn(request))
+        if conn is None:
+            conn = await stack.enter_async_context(checkout())
         yield conn
 
 
+# get_read_conn for handlers that need a connection only on some paths, e.g. a cache miss
+read_conn = asynccontextmanager(get_read_conn)
@@ -4,6 +4,14 @@ from typing import Any
 
 from sqlalchemy.exc import DBAPIError, IntegrityError
 
+# serialization_failure, deadlock_detected: the server aborted the transaction to resolve
+# a conflict with a concurrent one, and running it again is expected to succeed
+RETRYABLE_SQLSTATES = frozenset({"40001", "40P01"})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, DBAPIError) and getattr(exc.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+
 
 def translate_db_error(exc: Exception) -> tuple[int, dict[str, Any]]:
     """
@@ -41,6 +49,12 @@ def translate_db_error(exc: Exception) -> tuple[int, dict[str, Any]]:
         # Fallback for other integrity issues
         return 400, {"error": "integrity_error", "constraint": constraint}
 
+    if is_retryable(exc):
+        # Still conflicting after app.transactions ran out of retries; the client may try again
+        sqlstate = exc.orig.sqlstate  # type: ignore[attr-defined]
+        error = "serialization_failure" if sqlstate == "40001" else "deadlock_detected"
+        return 409, {"error": error, "retryable": True}
+
     if isinstance(exc, DBAPIError):
         return 500, payload
 
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db import checkout
+from app.errors import is_retryable
+from app.metrics import PLAN_JOB_CHUNK_SECONDS, PLAN_JOB_CHUNKS, TX_RETRIES
+from app.settings import settings
+from app.transactions import retry_delay
+
+logger = logging.getLogger(__name__)
+
+# Tables and fn_generate_check_plan_range: see migration 0013
+_INSERT_JOB_SQL = text("INSERT INTO metrology.plan_job(from_date, to_date) VALUES (:from_date, :to_date) RETURNING id")
+# Every chunk_size-th instrument id opens a chunk that runs up to the next one. The first chunk
+# starts at the smallest uuid and the last one is open-ended, so instruments added after
+# enqueueing still fall into some chunk.
+_INSERT_CHUNKS_SQL = text(
+    """
+    INSERT INTO metrology.plan_job_chunk(job_id, chunk_no, lower_id, upper_id)
+    SELECT
+      :job_id,
+      s.chunk_no,
+      CASE WHEN s.chunk_no = 0 THEN CAST('00000000-0000-0000-0000-000000000000' AS uuid) ELSE s.id END,
+      lead(s.id) OVER (ORDER BY s.chunk_no)
+    FROM (
+      SELECT
+        id,
+        (row_number() OVER (ORDER BY id) - 1) / :chunk_size AS chunk_no,
+        (row_number() OVER (ORDER BY id) - 1) % :chunk_size = 0 AS opens_chunk
+      FROM metrology.instrument
+    ) s
+    WHERE s.opens_chunk
+    """
+)
+_INSERT_SINGLE_CHUNK_SQL = text(
+    """
+    INSERT INTO metrology.plan_job_chunk(job_id, chunk_no, lower_id, upper_id)
+    VALUES (:job_id, 0, CAST('00000000-0000-0000-0000-000000000000' AS uuid), NULL)
+    """
+)
+# Chunk k starts at bounds[k] and runs up to the next bound; the last one is open-ended
+_INSERT_PARTITIONS_SQL = text(
+    """
+    INSERT INTO metrology.plan_job_chunk(job_id, chunk_no, lower_id, upper_id)
+    SELECT :job_id, b.ord - 1, b.lower_id, lead(b.lower_id) OVER (ORDER BY b.ord)
+    FROM unnest(CAST(:bounds AS uuid[])) WITH ORDINALITY AS b(lower_id, ord)
+    """
+)
+_JOB_SQL = text(
+    """
+    SELECT
+      j.id, j.status, j.from_date, j.to_date,
+      count(c.chunk_no) AS chunks_total,
+      count(c.done_at) AS chunks_done,
+      coalesce(sum(c.inserted), 0) AS inserted,
+      j.error, j.created_at, j.started_at, j.finished_at
+    FROM metrology.plan_job j
+    LEFT JOIN metrology.plan_job_chunk c ON c.job_id = j.id
+    WHERE j.id = :id
+    GROUP BY j.id
+    """
+)
+
+# Oldest job first; chunks locked by another worker are skipped, not waited for
+_CLAIM_SQL = text(
+    """
+    SELECT c.job_id, c.chunk_no, c.lower_id, c.upper_id, j.from_date, j.to_date
+    FROM metrology.plan_job_chunk c
+    JOIN metrology.plan_job j ON j.id = c.job_id
+    WHERE c.done_at IS NULL AND j.status IN ('queued', 'running')
+    ORDER BY j.created_at, c.job_id, c.chunk_no
+    LIMIT 1
+    FOR UPDATE OF c SKIP LOCKED
+    """
+)
+_RECLAIM_SQL = text(
+    """
+    SELECT c.job_id, c.chunk_no, c.lower_id, c.upper_id, j.from_date, j.to_date
+    FROM metrology.plan_job_chunk c
+    JOIN metrology.plan_job j ON j.id = c.job_id
+    WHERE c.job_id = :job_id AND c.chunk_no = :chunk_no AND c.done_at IS NULL AND j.status IN ('queued', 'running')
+    FOR UPDATE OF c SKIP LOCKED
+    """
+)
+_GENERATE_SQL = text("SELECT metrology.fn_generate_check_plan_range(:from_date, :to_date, :lower_id, :upper_id)")
+_CHUNK_DONE_SQL = text(
+    """
+    UPDATE metrology.plan_job_chunk SET inserted = :inserted, done_at = now()
+    WHERE job_id = :job_id AND chunk_no = :chunk_no
+    """
+)
+# Runs after the chunk commits, so the worker finishing the last chunk always sees the rest done
+_PROGRESS_SQL = text(
+    """
+    UPDATE metrology.plan_job j
+    SET status = CASE WHEN p.pending THEN 'running' ELSE 'done' END,
+        started_at = coalesce(j.started_at, :started_at),
+        finished_at = CASE WHEN p.pending THEN NULL ELSE now() END
+    FROM (
+      SELECT EXISTS (
+        SELECT 1 FROM metrology.plan_job_chunk WHERE job_id = :job_id AND done_at IS NULL
+      ) AS pending
+    ) p
+    WHERE j.id = :job_id AND j.status IN ('queued', 'running')
+    """
+)
+_FAIL_SQL = text(
+    """
+    UPDATE metrology.plan_job
+    SET status = 'failed', error = :error, started_at = coalesce(started_at, :started_at), finished_at = now()
+    WHERE id = :job_id AND status IN ('queued', 'running')
+    """
+)
+
+
+def partition_bounds(partitions: int) -> list[UUID]:
+    """Lower bounds of `partitions` equal slices of the uuid space."""
+    # Instrument ids are random (v4) uuids, so equal slices hold about equal numbers of instruments
+    return [UUID(int=(k << 128) // partitions) for k in range(partitions)]
+
+
+async def enqueue_plan_job(
+    conn: AsyncConnection, from_date: date, to_date: date, partitions: int | None = None
+) -> UUID:
+    """
+    Insert a job and its chunk queue; call inside the caller's transaction.
+
+    Chunks hold `plan_job_chunk_size` instruments each, or with `partitions` given, one
+    slice of the id space each; then no instrument needs to be read to enqueue.
+    """
+    job_id = await conn.scalar(_INSERT_JOB_SQL, {"from_date": from_date, "to_date": to_date})
+    if partitions is not None:
+        await conn.execute(_INSERT_PARTITIONS_SQL, {"job_id": job_id, "bounds": partition_bounds(partitions)})
+        return job_id
+    res = await conn.execute(_INSERT_CHUNKS_SQL, {"job_id": job_id, "chunk_size": settings.plan_job_chunk_size})
+    if not res.rowcount:
+        # No instruments yet: one open-ended chunk still runs the job to completion
+        await conn.execute(_INSERT_SINGLE_CHUNK_SQL, {"job_id": job_id})
+    return job_id
+
+
+async def fetch_plan_job(conn: AsyncConnection, job_id: UUID) -> dict | None:
+    row = (await conn.execute(_JOB_SQL, {"id": job_id})).first()
+    return dict(row._mapping) if row else None
+
+
+class PlanJobRunner:
+    """
+    Background workers that drain the plan generation queue.
+
+    Each app process runs `settings.plan_job_workers` of them. A chunk is claimed with
+    FOR UPDATE SKIP LOCKED and generated in the same transaction, so any number of workers
+    across processes share the queue without blocking each other or doing a chunk twice.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"plan-job-worker-{n}") for n in range(settings.plan_job_workers)
+        ]
+
+    async def stop(self) -> None:
+        # A cancelled chunk transaction rolls back and its chunk goes back to the queue
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self) -> None:
+        """Start idle workers on a job enqueued by this process without waiting for the next poll."""
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def _work(self) -> None:
+        while True:
+            # Taken before looking for work, so a wake() in between is not lost
+            wakeup = self._wakeup
+            try:
+                busy = await self.run_chunk()
+            except Exception:
+                # Database unreachable and the like; the worker must outlive it
+                logger.exception("plan job worker error")
+                busy = False
+            if not busy:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), settings.plan_job_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_chunk(self) -> bool:
+        """Claim and generate one chunk; False when there is nothing to claim."""
+        started = time.perf_counter()
+        started_at = datetime.now(timezone.utc)
+        key: dict[str, Any] | None = None
+        async with checkout() as conn:
+            for attempt in range(1, settings.plan_job_max_attempts + 1):
+                chunk = None
+                try:
+                    async with conn.begin():
+                        # A retry goes back to the same chunk, unless another worker took it meanwhile
+                        chunk = (await conn.execute(_CLAIM_SQL if key is None else _RECLAIM_SQL, key)).first()
+                        if chunk is None:
+                            return key is not None
+                        key = {"job_id": chunk.job_id, "chunk_no": chunk.chunk_no}
+                        inserted = await conn.scalar(
+                            _GENERATE_SQL,
+                            {
+                                "from_date": chunk.from_date,
+                                "to_date": chunk.to_date,
+                                "lower_id": chunk.lower_id,
+                                "upper_id": chunk.upper_id,
+                            },
+                        )
+                        await conn.execute(_CHUNK_DONE_SQL, {**key, "inserted": inserted})
+                    break
+                except SQLAlchemyError as exc:
+                    if chunk is None:
+                        raise
+                    if is_retryable(exc) and attempt < settings.plan_job_max_attempts:
+                        # Another transaction won a conflict on check_plan; the chunk alone is re-run
+                        PLAN_JOB_CHUNKS.labels("retried").inc()
+                        TX_RETRIES.labels("plan_job_chunk", exc.orig.sqlstate).inc()  # type: ignore[union-attr]
+                        await asyncio.sleep(retry_delay(attempt))
+                        continue
+                    PLAN_JOB_CHUNKS.labels("failed").inc()
+                    logger.warning("plan job %s chunk %s failed: %s", chunk.job_id, chunk.chunk_no, exc)
+                    error = str(getattr(exc, "orig", None) or exc).splitlines()[0][:1000]
+                    async with conn.begin():
+                        await conn.execute(_FAIL_SQL, {**key, "error": error, "started_at": started_at})
+                    return True
+
+            PLAN_JOB_CHUNKS.labels("done").inc()
+            PLAN_JOB_CHUNK_SECONDS.observe(time.perf_counter() - started)
+            async with conn.begin():
+                await conn.execute(_PROGRESS_SQL, {"job_id": key["job_id"], "started_at": started_at})
+        return True
+
+
+plan_jobs = PlanJobRunner()
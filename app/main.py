@@ -1,31 +1,79 @@
 from __future__ import annotations
 
+import math
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from app.api.admin import router as admin_router
+from app.api.export import router as export_router
 from app.api.router import router as api_router
+from app.db import LAST_WRITE_LSN_COOKIE, LAST_WRITE_LSN_HEADER
 from app.errors import translate_db_error
+from app.jobs import plan_jobs
+from app.metrics import DB_ERRORS, MetricsMiddleware
+from app.refdata import refdata
+from app.settings import settings
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    await refdata.start()
+    await plan_jobs.start()
+    yield
+    await plan_jobs.stop()
+    await refdata.stop()
+
 
 app = FastAPI(
     title="Metrology DB-first API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router)
+app.include_router(export_router)
+app.include_router(admin_router)
+
+# A standby whose lag reading is within the limit has replayed anything older than this,
+# so the cookie only needs to outlive one lag limit plus one stale lag reading.
+_LAST_WRITE_LSN_MAX_AGE_S = math.ceil(settings.replica_max_lag_seconds + settings.replica_lag_check_interval_seconds)
+
+
+@app.middleware("http")
+async def expose_last_write_lsn(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    response = await call_next(request)
+    lsn = getattr(request.state, "last_write_lsn", None)
+    if lsn:
+        response.headers[LAST_WRITE_LSN_HEADER] = lsn
+        response.set_cookie(LAST_WRITE_LSN_COOKIE, lsn, max_age=_LAST_WRITE_LSN_MAX_AGE_S, httponly=True, samesite="lax")
+    return response
+
+
+# Added last so it is the outermost layer and times everything else
+app.add_middleware(MetricsMiddleware)
+
+
+def _db_error_response(exc: Exception) -> JSONResponse:
+    status, payload = translate_db_error(exc)
+    DB_ERRORS.labels(payload["error"]).inc()
+    headers = {"Retry-After": "1"} if payload.get("retryable") else None
+    return JSONResponse(status_code=status, content=payload, headers=headers)
 
 
 @app.exception_handler(IntegrityError)
 async def handle_integrity_error(_: Request, exc: IntegrityError) -> JSONResponse:
-    status, payload = translate_db_error(exc)
-    return JSONResponse(status_code=status, content=payload)
+    return _db_error_response(exc)
 
 
 @app.exception_handler(SQLAlchemyError)
 async def handle_sqlalchemy_error(_: Request, exc: SQLAlchemyError) -> JSONResponse:
-    status, payload = translate_db_error(exc)
-    return JSONResponse(status_code=status, content=payload)
+    return _db_error_response(exc)
 
 
 @app.get("/health")
@@ -33,3 +81,8 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Fast endpoints sit in the low milliseconds; reports and bulk imports run for seconds
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency until the last body byte is sent",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in database statements per request",
+    ["method", "route"],
+    buckets=_LATENCY_BUCKETS,
+)
+QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Single statement execution time, by the route that issued it",
+    ["route"],
+    buckets=_LATENCY_BUCKETS,
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Wait for a pooled connection, connect and pre-ping included",
+    ["pool"],
+    buckets=_LATENCY_BUCKETS,
+)
+POOL_CHECKOUT_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "QueuePool limit timeouts", ["pool"])
+POOL_WAITING = Gauge("db_pool_waiting", "Tasks waiting for a pooled connection", ["pool"])
+POOL_CONNECTIONS = Gauge("db_pool_connections", "Pooled connections by state", ["pool", "state"])
+DB_ERRORS = Counter("db_errors_total", "Database errors turned into HTTP responses", ["error"])
+TX_RETRIES = Counter(
+    "db_tx_retries_total", "Transactions re-run after a serialization failure or deadlock", ["operation", "sqlstate"]
+)
+TX_RETRIES_EXHAUSTED = Counter(
+    "db_tx_retries_exhausted_total",
+    "Retryable transaction failures given up on, by what ran out (attempts or budget)",
+    ["operation", "reason"],
+)
+TX_RETRY_BUDGET_TOKENS = Gauge("db_tx_retry_budget_tokens", "Retries currently allowed by the retry budget")
+PLAN_JOB_CHUNKS = Counter("plan_job_chunks_total", "Plan generation chunks run by the job workers", ["outcome"])
+PLAN_JOB_CHUNK_SECONDS = Histogram(
+    "plan_job_chunk_duration_seconds",
+    "Claim, generate and commit of one plan generation chunk",
+    buckets=_LATENCY_BUCKETS,
+)
+
+_UNMATCHED_ROUTE = "unmatched"
+
+
+@dataclass
+class _DbUsage:
+    scope: Scope
+    seconds: float = 0.0
+
+
+# Set per request by MetricsMiddleware; statements outside a request are not attributed
+_db_usage: ContextVar[_DbUsage | None] = ContextVar("metrics_db_usage", default=None)
+
+
+def _route_label(scope: Scope) -> str:
+    # Route templates only: raw paths carry ids and would explode label cardinality
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or _UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streamed responses are timed to their last byte."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        usage = _DbUsage(scope)
+        token = _db_usage.set(usage)
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            _db_usage.reset(token)
+            route = _route_label(scope)
+            REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+            REQUEST_DB_SECONDS.labels(scope["method"], route).observe(usage.seconds)
+
+
+def observe_query(seconds: float) -> tuple[str, str]:
+    """Record one statement against the current request; returns its (method, route)."""
+    usage = _db_usage.get()
+    if usage is None:
+        QUERY_SECONDS.labels(_UNMATCHED_ROUTE).observe(seconds)
+        return "", _UNMATCHED_ROUTE
+    usage.seconds += seconds
+    route = _route_label(usage.scope)
+    QUERY_SECONDS.labels(route).observe(seconds)
+    return usage.scope["method"], route
+
+
+def instrument_pool(engine: AsyncEngine, pool: str) -> None:
+    queue_pool: Any = engine.pool
+    POOL_CONNECTIONS.labels(pool, "checked_out").set_function(queue_pool.checkedout)
+    POOL_CONNECTIONS.labels(pool, "checked_in").set_function(queue_pool.checkedin)
+    POOL_CONNECTIONS.labels(pool, "overflow").set_function(lambda: max(queue_pool.overflow(), 0))
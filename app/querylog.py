@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.settings import settings
+
+# One JSON document per record, so log shippers can index the fields
+logger = logging.getLogger("app.slow_query")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Strong references to running EXPLAIN tasks; the loop itself only keeps weak ones
+_explain_tasks: set[asyncio.Task] = set()
+
+
+def _fingerprint(statement: str) -> str:
+    # Dynamically built statements (optional filters, PATCH column sets) get one id per variant
+    return hashlib.sha1(statement.encode()).hexdigest()[:12]
+
+
+def log_slow_query(
+    engine: AsyncEngine,
+    pool: str,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+    seconds: float,
+    method: str,
+    route: str,
+) -> None:
+    normalized = _WHITESPACE_RE.sub(" ", statement).strip()
+    query_id = _fingerprint(normalized)
+    entry = {
+        "event": "slow_query",
+        "query_id": query_id,
+        "duration_ms": round(seconds * 1000, 3),
+        "method": method,
+        "route": route,
+        "pool": pool,
+        "rowcount": getattr(context, "rowcount", None),
+        # Values may be personal data; only their number is logged
+        "param_count": len(parameters) if parameters is not None and not executemany else None,
+        "statement": normalized,
+    }
+    logger.warning(json.dumps(entry, default=str))
+
+    if _should_explain(context, executemany):
+        task = asyncio.get_running_loop().create_task(
+            _explain(engine, statement, tuple(parameters or ()), query_id, route)
+        )
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
+
+
+def _should_explain(context: Any, executemany: bool) -> bool:
+    if settings.slow_query_explain_sample_rate <= 0 or executemany:
+        return False
+    # Streaming exports are slow by design and hold a server-side cursor
+    options = context.execution_options
+    if options.get("stream_results") or options.get("yield_per"):
+        return False
+    if len(_explain_tasks) >= settings.slow_query_explain_max_concurrent:
+        return False
+    return random.random() < settings.slow_query_explain_sample_rate
+
+
+async def _explain(engine: AsyncEngine, statement: str, parameters: tuple, query_id: str, route: str) -> None:
+    """
+    Re-run the statement under EXPLAIN ANALYZE on a separate pooled connection.
+
+    The transaction is READ ONLY and always rolled back, so a sampled write fails
+    instead of being applied twice; only its log entry is lost.
+    """
+    try:
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver: Any = raw.driver_connection
+            tx = driver.transaction(readonly=True)
+            await tx.start()
+            try:
+                await driver.execute(f"SET LOCAL statement_timeout = {int(settings.slow_query_explain_timeout_ms)}")
+                plan = await driver.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", *parameters)
+            finally:
+                await tx.rollback()
+    except Exception as exc:  # noqa: BLE001 - diagnostics must never break the app
+        logger.info(json.dumps({"event": "slow_query_plan_failed", "query_id": query_id, "error": str(exc)}))
+        return
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    logger.warning(json.dumps({"event": "slow_query_plan", "query_id": query_id, "route": route, "plan": plan}))
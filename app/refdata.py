@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db import engine
+
+logger = logging.getLogger(__name__)
+
+# Fired by statement-level triggers on the lookup tables (see migration 0007)
+REFDATA_CHANNEL = "metrology_refdata"
+
+REFDATA_TABLES = frozenset(
+    {
+        "instrument_status",
+        "check_result_status",
+        "check_kind",
+        "check_plan_status",
+        "document_type",
+    }
+)
+
+# Fired by metrology.fn_bump_data_version with "<name> <version> <changed_us>" (see migration 0014)
+DATA_VERSION_CHANNEL = "metrology_data_version"
+# changed_at as the integer the NOTIFY payload carries, so both sources give the same tag
+CHANGED_US_SQL = "(extract(epoch FROM changed_at) * 1000000)::bigint"
+
+_RECONNECT_DELAY_MAX_S = 30.0
+# Unknown codes come from client input: at most one forced reload per table this often
+_MISS_RELOAD_INTERVAL_S = 1.0
+
+
+class DataVersion(NamedTuple):
+    """A metrology.data_version generation; later generations compare greater."""
+
+    version: int
+    changed_us: int
+
+    def etag(self, name: str) -> str:
+        # changed_at keeps tags unique should the counter ever be reset
+        return f'"{name}.{self.version}.{self.changed_us}"' if self.version else f'"{name}.0"'
+
+
+class RefDataCache:
+    """
+    In-process code -> id cache for the small lookup tables, and the latest
+    metrology.data_version generation of every name.
+
+    Both are only trusted while the LISTEN connection is alive; otherwise every
+    lookup goes to the database, so a lost notification can never serve stale data.
+    """
+
+    def __init__(self) -> None:
+        self._codes: dict[str, dict[str, UUID]] = {}
+        # Bumped on every invalidation so a load racing with a NOTIFY is not cached
+        self._generation = 0
+        self._miss_reloaded_at: dict[str, float] = {}
+        self._versions: dict[str, DataVersion] = {}
+        self._listener: asyncpg.Connection | None = None
+        self._reconnect_task: asyncio.Task | None = None
+        self._stopping = False
+
+    @property
+    def active(self) -> bool:
+        return self._listener is not None and not self._listener.is_closed()
+
+    async def start(self) -> None:
+        self._stopping = False
+        try:
+            await self._listen()
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+            logger.warning("refdata cache disabled, LISTEN failed: %s", exc)
+            self._schedule_reconnect()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        listener, self._listener = self._listener, None
+        self._codes.clear()
+        self._versions.clear()
+        if listener is not None and not listener.is_closed():
+            await listener.close()
+
+    async def codes(self, conn: AsyncConnection, table: str) -> dict[str, UUID]:
+        if table not in REFDATA_TABLES:
+            raise ValueError(f"not a reference table: {table}")
+        cached = self._codes.get(table)
+        if cached is not None and self.active:
+            return cached
+        generation = self._generation
+        res = await conn.execute(text(f"SELECT code, id FROM metrology.{table}"))
+        loaded = {code: id_ for code, id_ in res.fetchall()}
+        if self.active and generation == self._generation:
+            self._codes[table] = loaded
+        return loaded
+
+    async def id_for(self, conn: AsyncConnection, table: str, code: str) -> UUID | None:
+        id_ = (await self.codes(conn, table)).get(code)
+        if id_ is None and self.active:
+            # A code added moments ago may not have been announced yet; the NOTIFY covers
+            # anything later, so bogus codes cannot turn every lookup into a reload
+            now = time.monotonic()
+            if now - self._miss_reloaded_at.get(table, -_MISS_RELOAD_INTERVAL_S) >= _MISS_RELOAD_INTERVAL_S:
+                self._miss_reloaded_at[table] = now
+                self._codes.pop(table, None)
+                id_ = (await self.codes(conn, table)).get(code)
+        return id_
+
+    def data_version(self, name: str) -> DataVersion | None:
+        """The latest committed generation of `name`, or None while it cannot be trusted."""
+        if not self.active:
+            return None
+        return self._versions.get(name, DataVersion(0, 0))
+
+    def _saw_version(self, name: str, version: DataVersion) -> None:
+        # The startup load can race a NOTIFY: never step back
+        current = self._versions.get(name)
+        if current is None or version > current:
+            self._versions[name] = version
+
+    async def _listen(self) -> None:
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        listener = await asyncpg.connect(dsn)
+        try:
+            await listener.add_listener(REFDATA_CHANNEL, self._on_notify)
+            await listener.add_listener(DATA_VERSION_CHANNEL, self._on_data_version)
+            # Reload everything: anything cached before LISTEN may have missed a change
+            self._generation += 1
+            generation = self._generation
+            loaded = {
+                table: {r["code"]: r["id"] for r in await listener.fetch(f"SELECT code, id FROM metrology.{table}")}
+                for table in REFDATA_TABLES
+            }
+            self._codes = loaded if generation == self._generation else {}
+            self._versions = {}
+            for r in await listener.fetch(
+                f"SELECT name, version, {CHANGED_US_SQL} AS changed_us FROM metrology.data_version"
+            ):
+                self._saw_version(r["name"], DataVersion(r["version"], r["changed_us"]))
+        except BaseException:
+            await listener.close()
+            raise
+        listener.add_termination_listener(self._on_terminated)
+        self._listener = listener
+
+    def _on_notify(self, _conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        self._generation += 1
+        self._codes.pop(payload, None)
+
+    def _on_data_version(self, _conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        name, version, changed_us = payload.split(" ")
+        self._saw_version(name, DataVersion(int(version), int(changed_us)))
+
+    def _on_terminated(self, _conn: Any) -> None:
+        self._listener = None
+        self._generation += 1
+        self._codes.clear()
+        self._versions.clear()
+        if not self._stopping:
+            logger.warning("refdata LISTEN connection lost, cache bypassed until reconnect")
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = 1.0
+        while not self._stopping:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+                return
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning("refdata LISTEN reconnect failed: %s", exc)
+                delay = min(delay * 2, _RECONNECT_DELAY_MAX_S)
+
+
+refdata = RefDataCache()
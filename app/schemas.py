@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from datetime import date, datetime
-from typing import Any, Literal
+from typing import Any, Generic, Literal, TypeVar
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+OutT = TypeVar("OutT", bound=BaseModel)
+
 
 class OrgUnitCreate(BaseModel):
     code: str = Field(min_length=1, max_length=64)
@@ -173,6 +175,20 @@ class InstrumentOut(BaseModel):
     installed_at: datetime | None
 
 
+class InstrumentBulkRowError(BaseModel):
+    row: int
+    error: str
+    detail: str | None = None
+
+
+class InstrumentBulkOut(BaseModel):
+    received: int
+    inserted: int
+    rejected: int
+    constraint_errors: int
+    errors: list[InstrumentBulkRowError]
+
+
 class DocumentCreate(BaseModel):
     document_type_code: Literal["PROTOCOL", "CERTIFICATE", "OTHER"] = "PROTOCOL"
     title: str = Field(min_length=1, max_length=256)
@@ -213,6 +229,14 @@ class RegisterCheckEventOut(BaseModel):
     event_id: UUID
 
 
+class RegisterCheckEventsBatchIn(BaseModel):
+    events: list[RegisterCheckEventIn] = Field(min_length=1, max_length=5000)
+
+
+class RegisterCheckEventsBatchOut(BaseModel):
+    event_ids: list[UUID]
+
+
 class CheckEventOut(BaseModel):
     id: UUID
     instrument_id: UUID
@@ -302,6 +326,58 @@ class CheckPlanOut(BaseModel):
     notes: str | None
 
 
+class CodeNameOut(BaseModel):
+    id: UUID
+    code: str
+    name: str
+
+
+class NextDueOut(BaseModel):
+    check_type_id: UUID
+    check_type_code: str
+    check_type_name: str
+    last_check_date: date | None
+    next_due_date: date | None
+    days_to_due: int | None
+
+
+class InstrumentEventOut(CheckEventOut):
+    result_code: str
+
+
+class StatusHistoryOut(BaseModel):
+    id: UUID
+    status_code: str
+    valid_from: datetime
+    valid_to: datetime | None
+    reason: str | None
+
+
+class InstrumentFullOut(BaseModel):
+    id: UUID
+    inventory_no: str
+    serial_no: str | None
+    range_min: float | None
+    range_max: float | None
+    range_unit: str | None
+    error_limit: float | None
+    error_unit: str | None
+    accuracy_class: str | None
+    installed_at: datetime | None
+    decommissioned_at: datetime | None
+    decommission_reason: str | None
+    replaced_by_instrument_id: UUID | None
+    status: CodeNameOut
+    model: InstrumentModelOut
+    type: InstrumentTypeOut
+    location: LocationOut
+    org_unit: OrgUnitOut
+    next_due: list[NextDueOut]
+    recent_events: list[InstrumentEventOut]
+    open_plans: list[CheckPlanOut]
+    status_history: list[StatusHistoryOut]
+
+
 class DecommissionInstrumentIn(BaseModel):
     reason: str = Field(min_length=1, max_length=1024)
     replaced_by_instrument_id: UUID | None = None
@@ -310,10 +386,31 @@ class DecommissionInstrumentIn(BaseModel):
 class GeneratePlansIn(BaseModel):
     from_date: date
     to_date: date
-
-
-class GeneratePlansOut(BaseModel):
+    # Split the job into this many equal slices of the instrument id space instead of fixed-size chunks
+    partitions: int | None = Field(
+        default=None,
+        ge=1,
+        le=1024,
+        description=(
+            "Split the job into this many equal slices of the instrument ids. Slices run in parallel only up "
+            "to the number of job workers (PLAN_JOB_WORKERS per API process, 2 by default); the rest wait "
+            "in the queue, so more partitions than workers adds no speed"
+        ),
+    )
+
+
+class PlanJobOut(BaseModel):
+    id: UUID
+    status: Literal["queued", "running", "done", "failed"]
+    from_date: date
+    to_date: date
+    chunks_total: int
+    chunks_done: int
     inserted: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
 
 
 class AuditRowOut(BaseModel):
@@ -327,3 +424,44 @@ class AuditRowOut(BaseModel):
     new_row: dict[str, Any] | None
 
 
+class LookupIn(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=5000)
+
+
+class LookupOut(BaseModel, Generic[OutT]):
+    items: list[OutT]
+    missing: list[UUID]
+
+
+class SearchHitOut(BaseModel):
+    type: Literal["instrument", "instrument_model"]
+    id: UUID
+    label: str
+    detail: str | None
+    score: float
+
+
+class PoolStatusOut(BaseModel):
+    pool_size: int
+    max_overflow: int
+    timeout_s: float
+    recycle_s: int
+    pre_ping: bool
+    statement_cache_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    waiting: int
+    checkouts: int
+    checkout_timeouts: int
+    checkout_latency_avg_ms: float
+    checkout_latency_max_ms: float
+
+
+class ReportCacheOut(BaseModel):
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
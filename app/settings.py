@@ -1,14 +1,71 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+IsolationLevel = Literal["READ COMMITTED", "REPEATABLE READ", "SERIALIZABLE"]
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=None, extra="ignore")
 
     database_url_async: str
+    # Hot standby for read-only endpoints; reads stay on the primary when unset
+    database_url_async_replica: str | None = None
+    # Reads fall back to the primary while the standby is further behind than this
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 1.0
 
+    # Connection pool (SQLAlchemy QueuePool); env: DB_POOL_SIZE, DB_MAX_OVERFLOW, ...
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    # Seconds after which a connection is replaced on checkout; -1 disables
+    db_pool_recycle: int = -1
+    # Pessimistic disconnect handling: one extra round trip per checkout.
+    # Turn off and rely on db_pool_recycle when the network is reliable.
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statement cache per connection; 0 when behind PgBouncer (transaction mode)
+    db_statement_cache_size: int = 100
 
-settings = Settings()
+    # List endpoints return JSON rendered by Postgres instead of validating rows in Python
+    json_passthrough: bool = True
+    # Validate every passthrough body against its *Out schema (dev/CI; costs what passthrough saves)
+    json_passthrough_validate: bool = False
+
+    # Serialized /reports/* bodies kept in process, evicted least recently used first
+    report_cache_max_bytes: int = 64 * 1024 * 1024
 
+    # Statements at least this slow are written to the "app.slow_query" log
+    slow_query_ms: float = 500.0
+    # Share of slow statements re-run under EXPLAIN (ANALYZE, BUFFERS) in a rolled-back transaction
+    slow_query_explain_sample_rate: float = 0.0
+    slow_query_explain_max_concurrent: int = 2
+    slow_query_explain_timeout_ms: int = 30_000
 
+    # Plan generation job workers per process; each holds a primary pool connection while it runs a chunk.
+    # 0 leaves the queue to other processes.
+    plan_job_workers: int = 2
+    # Instruments per queue chunk, i.e. per worker transaction
+    plan_job_chunk_size: int = 1000
+    # Idle workers look for chunks queued by other processes this often
+    plan_job_poll_seconds: float = 2.0
+    # Chunk runs lost to a serialization failure or deadlock are retried (tx_retry_backoff_*);
+    # the job fails once a chunk has used up its attempts
+    plan_job_max_attempts: int = 5
+
+    # Write transactions (app.transactions). Isolation per "METHOD /route/{template}", e.g.
+    # TX_ISOLATION='{"POST /check-events/register": "SERIALIZABLE"}'; unlisted routes use their default.
+    tx_isolation: dict[str, IsolationLevel] = {}
+    # Runs of a transaction aborted by a serialization failure or deadlock, the first one included
+    tx_max_attempts: int = 5
+    # Retry n waits a random time up to min(backoff_max, backoff * 2^(n-1))
+    tx_retry_backoff_s: float = 0.02
+    tx_retry_backoff_max_s: float = 1.0
+    # Each transaction earns this many retries, up to tx_retry_budget_max banked per process
+    tx_retry_budget_ratio: float = 0.2
+    tx_retry_budget_max: float = 20.0
+
+
+settings = Settings()
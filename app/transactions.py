@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db import get_conn
+from app.errors import is_retryable
+from app.metrics import TX_RETRIES, TX_RETRIES_EXHAUSTED, TX_RETRY_BUDGET_TOKENS
+from app.settings import IsolationLevel, settings
+
+T = TypeVar("T")
+
+
+class RetryBudget:
+    """
+    Caps retries at a share of the transactions run: each one earns `ratio` tokens, a retry spends one.
+
+    Under sustained contention retries then add at most `ratio` extra load instead of multiplying
+    it. The bucket starts full and holds `capacity` tokens, so occasional conflicts are always retried.
+    """
+
+    def __init__(self, ratio: float, capacity: float) -> None:
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+
+    def deposit(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+retry_budget = RetryBudget(settings.tx_retry_budget_ratio, settings.tx_retry_budget_max)
+TX_RETRY_BUDGET_TOKENS.set_function(lambda: retry_budget.tokens)
+
+
+def retry_delay(attempt: int) -> float:
+    # Full jitter: transactions that collided once spread out instead of colliding again
+    return random.uniform(0, min(settings.tx_retry_backoff_max_s, settings.tx_retry_backoff_s * 2 ** (attempt - 1)))
+
+
+async def run_transaction(
+    conn: AsyncConnection,
+    fn: Callable[[AsyncConnection], Awaitable[T]],
+    *,
+    isolation: IsolationLevel | None = None,
+    operation: str = "",
+) -> T:
+    """
+    Run `fn` in a transaction, re-running it while it fails with a serialization failure or deadlock.
+
+    `fn` may run several times, so it must keep its state local to one call. Other errors, and
+    retryable ones once attempts or the retry budget run out, propagate after the rollback.
+    """
+    retry_budget.deposit()
+    for attempt in range(1, settings.tx_max_attempts + 1):
+        try:
+            async with conn.begin():
+                if isolation is not None:
+                    await conn.execute(text(f"SET TRANSACTION ISOLATION LEVEL {isolation}"))
+                return await fn(conn)
+        except DBAPIError as exc:
+            if not is_retryable(exc):
+                raise
+            if attempt == settings.tx_max_attempts:
+                TX_RETRIES_EXHAUSTED.labels(operation, "attempts").inc()
+                raise
+            if not retry_budget.withdraw():
+                TX_RETRIES_EXHAUSTED.labels(operation, "budget").inc()
+                raise
+            TX_RETRIES.labels(operation, exc.orig.sqlstate).inc()  # type: ignore[union-attr]
+            await asyncio.sleep(retry_delay(attempt))
+    raise AssertionError("unreachable")
+
+
+@dataclass(frozen=True)
+class TransactionRunner:
+    """A request's write connection, with the isolation level configured for its route."""
+
+    conn: AsyncConnection
+    isolation: IsolationLevel | None
+    operation: str
+
+    async def run(self, fn: Callable[[AsyncConnection], Awaitable[T]]) -> T:
+        return await run_transaction(self.conn, fn, isolation=self.isolation, operation=self.operation)
+
+
+def get_tx(isolation: IsolationLevel | None = None) -> Callable[..., Awaitable[TransactionRunner]]:
+    """
+    Dependency for write handlers; `isolation` is the route's default.
+
+    settings.tx_isolation overrides it per "METHOD /route/{template}", so a route can be moved to a
+    stricter level by configuration alone: conflicts this causes are retried, not returned.
+    """
+
+    async def dependency(request: Request, conn: AsyncConnection = Depends(get_conn)) -> TransactionRunner:
+        route = request.scope.get("route")
+        operation = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        return TransactionRunner(conn, settings.tx_isolation.get(operation, isolation), operation)
+
+    return dependency
@@ -0,0 +1,432 @@
+"""
+HTTP load benchmark for the API.
+
+Drives a weighted mix of real routes with concurrent async clients and reports
+throughput, p50/p95/p99 latency and error rate per route:
+
+    python -m bench.http_load --start --concurrency 32 --duration 60 --output bench/results/run.json
+    python -m bench.http_load --base-url http://localhost:8000 --baseline bench/results/run.json
+
+--start runs app.main:app under uvicorn with the current environment, so point
+DATABASE_URL_ASYNC at a database filled by bench.datagen. Ids used by the get_* and
+write routes are sampled before the run starts with TABLESAMPLE SYSTEM over --dsn, so
+they are spread over the whole table rather than the first page of keyset order.
+
+generate_plans is off by default (enable it with --mix generate_plans=1): every hit queues
+a job over the whole fleet whose workers keep loading the database after the response.
+When enabled, its latency runs from the POST until GET /jobs/{id} reports the job finished.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+import psycopg
+
+# Sampled ids the route builders draw from
+Context = dict[str, list[str]]
+RequestArgs = tuple[str, str, dict[str, Any] | None, dict[str, Any] | None]
+# Waits for the work a request started to finish; returns the (status, ok) to record
+Follow = Callable[[httpx.AsyncClient, httpx.Response], Awaitable[tuple[str, bool]]]
+
+_JOB_POLL_S = 0.2
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    weight: float
+    build: Callable[[Context, random.Random], RequestArgs]
+    write: bool = False
+    # Context keys the route cannot be built without
+    needs: tuple[str, ...] = ()
+    follow: Follow | None = None
+
+
+def _get(path: str, **params: Any) -> Callable[[Context, random.Random], RequestArgs]:
+    return lambda _ctx, _rng: ("GET", path, params or None, None)
+
+
+def _get_one(path: str, key: str) -> Callable[[Context, random.Random], RequestArgs]:
+    return lambda ctx, rng: ("GET", f"{path}/{rng.choice(ctx[key])}", None, None)
+
+
+def _register_check_event(ctx: Context, rng: random.Random) -> RequestArgs:
+    body = {
+        "instrument_id": rng.choice(ctx["instruments"]),
+        "check_type_id": rng.choice(ctx["check_types"]),
+        "check_date": date.today().isoformat(),
+        "result_code": rng.choices(("PASSED", "FAILED"), weights=(0.95, 0.05))[0],
+        "lab_id": rng.choice(ctx["labs"]),
+        "protocol_no": f"BENCH-{rng.getrandbits(48):012x}",
+    }
+    return "POST", "/check-events/register", None, body
+
+
+def _generate_plans(_ctx: Context, rng: random.Random) -> RequestArgs:
+    start = date.today() + timedelta(days=rng.randrange(60))
+    body = {"from_date": start.isoformat(), "to_date": (start + timedelta(days=7)).isoformat()}
+    return "POST", "/plans/generate", None, body
+
+
+async def _await_plan_job(client: httpx.AsyncClient, resp: httpx.Response) -> tuple[str, bool]:
+    # 202 with Location: /jobs/{id}; the job is what is being measured, not the enqueue
+    location = resp.headers["Location"]
+    while True:
+        job = await client.get(location)
+        if job.status_code >= 400:
+            return str(job.status_code), False
+        status = job.json()["status"]
+        if status in ("done", "failed"):
+            return f"job_{status}", status == "done"
+        await asyncio.sleep(_JOB_POLL_S)
+
+
+def _report_by_lab(_ctx: Context, rng: random.Random) -> RequestArgs:
+    since = date.today() - timedelta(days=rng.choice((30, 90, 365)))
+    return "GET", "/reports/by-lab", {"from_date": since.isoformat()}, None
+
+
+def _search(_ctx: Context, rng: random.Random) -> RequestArgs:
+    # Partial bench.datagen inventory number
+    return "GET", "/search", {"q": f"{rng.randrange(10**6):06d}"}, None
+
+
+ROUTES = (
+    Route("list_instruments", 10, _get("/instruments", limit=100)),
+    Route("list_check_events", 8, _get("/check-events", limit=100)),
+    Route("list_check_plans", 6, _get("/check-plans", limit=100)),
+    Route("list_labs", 3, _get("/labs")),
+    Route("list_check_types", 3, _get("/check-types")),
+    Route("get_instrument", 20, _get_one("/instruments", "instruments"), needs=("instruments",)),
+    Route("get_check_event", 10, _get_one("/check-events", "check_events"), needs=("check_events",)),
+    Route("get_check_plan", 6, _get_one("/check-plans", "check_plans"), needs=("check_plans",)),
+    Route("get_lab", 3, _get_one("/labs", "labs"), needs=("labs",)),
+    Route("report_due_30d", 6, _get("/reports/due-30d")),
+    Route("report_overdue", 6, _get("/reports/overdue")),
+    Route("report_by_lab", 2, _report_by_lab),
+    Route("report_by_org_unit", 2, _get("/reports/by-org-unit")),
+    Route("list_audit", 4, _get("/audit", limit=200)),
+    Route("search", 4, _search),
+    Route(
+        "register_check_event",
+        10,
+        _register_check_event,
+        write=True,
+        needs=("instruments", "check_types", "labs"),
+    ),
+    # Opt-in, see the module docstring
+    Route("generate_plans", 0, _generate_plans, write=True, follow=_await_plan_job),
+)
+
+# Context key -> table sampled for it
+SAMPLES = {
+    "instruments": "instrument",
+    "check_events": "check_event",
+    "check_plans": "check_plan",
+    "labs": "lab",
+    "check_types": "check_type",
+}
+# Rows drawn per wanted id: SYSTEM samples whole pages, whose rows are far from independent
+_OVERSAMPLE = 4
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+
+    def record(self, seconds: float, status: str, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, duration: float) -> dict[str, Any]:
+        ms = sorted(s * 1000 for s in self.latencies)
+        n = len(ms)
+        return {
+            "requests": n,
+            "throughput_rps": round(n / duration, 2),
+            "errors": self.errors,
+            "error_rate": round(self.errors / n, 4) if n else 0.0,
+            "p50_ms": _percentile(ms, 50),
+            "p95_ms": _percentile(ms, 95),
+            "p99_ms": _percentile(ms, 99),
+            "max_ms": round(ms[-1], 2) if ms else None,
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+def _percentile(sorted_ms: list[float], pct: float) -> float | None:
+    if not sorted_ms:
+        return None
+    # Nearest rank
+    rank = max(1, -(-len(sorted_ms) * pct // 100))
+    return round(sorted_ms[int(rank) - 1], 2)
+
+
+def discover(dsn: str, sample_size: int, seed: int) -> Context:
+    """Ids spread over each table: random pages (TABLESAMPLE SYSTEM), then random rows of those."""
+    ctx: Context = {}
+    rng = random.Random(seed)
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for key, table in SAMPLES.items():
+            row = conn.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass", (f"metrology.{table}",)
+            ).fetchone()
+            estimate = row[0] if row else -1
+            # Never analyzed (-1) or small: take every page
+            percent = 100.0 if estimate <= 0 else min(100.0, 100.0 * sample_size * _OVERSAMPLE / estimate)
+            ids = [
+                str(id_)
+                for (id_,) in conn.execute(
+                    f"SELECT id FROM metrology.{table} TABLESAMPLE SYSTEM (%s) REPEATABLE (%s)", (percent, seed)
+                )
+            ]
+            ctx[key] = rng.sample(ids, min(sample_size, len(ids)))
+    return ctx
+
+
+async def _client_loop(
+    client: httpx.AsyncClient,
+    routes: Sequence[Route],
+    ctx: Context,
+    rng: random.Random,
+    measure_from: float,
+    deadline: float,
+    stats: dict[str, RouteStats],
+) -> None:
+    weights = [r.weight for r in routes]
+    while (now := time.perf_counter()) < deadline:
+        route = rng.choices(routes, weights=weights)[0]
+        method, path, params, body = route.build(ctx, rng)
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, path, params=params, json=body)
+            status, ok = str(resp.status_code), resp.status_code < 400
+            if ok and route.follow is not None:
+                status, ok = await route.follow(client, resp)
+        except httpx.HTTPError as exc:
+            status, ok = type(exc).__name__, False
+        elapsed = time.perf_counter() - started
+        if now >= measure_from:
+            stats[route.name].record(elapsed, status, ok)
+
+
+async def run(args: argparse.Namespace, routes: Sequence[Route]) -> dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        ctx = await asyncio.to_thread(discover, args.dsn, args.sample_size, args.seed)
+        routes = [r for r in routes if all(ctx.get(key) for key in r.needs)]
+        stats = {r.name: RouteStats() for r in routes}
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        deadline = measure_from + args.duration
+        await asyncio.gather(
+            *(
+                _client_loop(client, routes, ctx, random.Random(f"{args.seed}:{n}"), measure_from, deadline, stats)
+                for n in range(args.concurrency)
+            )
+        )
+
+    total = RouteStats()
+    for s in stats.values():
+        total.latencies.extend(s.latencies)
+        total.errors += s.errors
+        for status, n in s.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + n
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "commit": _git_commit(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+            "mix": {r.name: r.weight for r in routes},
+            "samples": {key: len(ids) for key, ids in ctx.items()},
+        },
+        "total": total.summary(args.duration),
+        "routes": {name: s.summary(args.duration) for name, s in stats.items()},
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any], threshold_pct: float) -> list[str]:
+    """Print per-route deltas against a stored run; returns the regressions beyond the threshold."""
+    regressions = []
+    rows = [("total", result["total"], baseline["total"])]
+    rows += [
+        (name, current, baseline["routes"][name])
+        for name, current in result["routes"].items()
+        if name in baseline["routes"]
+    ]
+    print(f"\n{'vs baseline':24} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err rate':>9}")
+    for name, cur, base in rows:
+        deltas = {
+            "throughput_rps": _delta(cur["throughput_rps"], base["throughput_rps"]),
+            "p50_ms": _delta(cur["p50_ms"], base["p50_ms"]),
+            "p95_ms": _delta(cur["p95_ms"], base["p95_ms"]),
+            "p99_ms": _delta(cur["p99_ms"], base["p99_ms"]),
+        }
+        error_delta = cur["error_rate"] - base["error_rate"]
+        print(
+            f"{name:24} "
+            + " ".join(f"{d:>+7.1f}%" if d is not None else f"{'-':>8}" for d in deltas.values())
+            + f" {error_delta * 100:>+7.2f}pp"
+        )
+        if (deltas["throughput_rps"] or 0) < -threshold_pct:
+            regressions.append(f"{name}: throughput {deltas['throughput_rps']:+.1f}%")
+        if (deltas["p95_ms"] or 0) > threshold_pct:
+            regressions.append(f"{name}: p95 {deltas['p95_ms']:+.1f}%")
+        if error_delta > 0.01:
+            regressions.append(f"{name}: error rate {error_delta * 100:+.2f}pp")
+    return regressions
+
+
+def _delta(current: float | None, base: float | None) -> float | None:
+    if current is None or not base:
+        return None
+    return (current - base) / base * 100
+
+
+def print_summary(result: dict[str, Any]) -> None:
+    print(f"{'route':24} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, s in [*result["routes"].items(), ("total", result["total"])]:
+        p = [f"{s[k]:>8.1f}" if s[k] is not None else f"{'-':>8}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{name:24} {s['requests']:>9} {s['throughput_rps']:>8.1f} {' '.join(p)} {s['error_rate']:>7.2%}")
+
+
+def start_server(args: argparse.Namespace) -> subprocess.Popen:
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(args.port),
+        "--workers",
+        str(args.server_workers),
+        "--no-access-log",
+    ]
+    server = subprocess.Popen(cmd, env=os.environ.copy())
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{args.base_url}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("uvicorn did not become healthy within 30s")
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("--base-url", default=None, help="default: http://127.0.0.1:<port>")
+    parser.add_argument(
+        "--dsn",
+        default=os.environ.get("DATABASE_URL_SYNC", "").replace("postgresql+psycopg://", "postgresql://"),
+        help="libpq connection string ids are sampled from (default: DATABASE_URL_SYNC)",
+    )
+    parser.add_argument("--start", action="store_true", help="start app.main:app under uvicorn for the run")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds run before measuring")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout, seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sample-size", type=int, default=1000, help="ids sampled per entity")
+    parser.add_argument(
+        "--mix",
+        action="append",
+        default=[],
+        metavar="ROUTE=WEIGHT",
+        help="override a route weight, 0 disables it (repeatable); generate_plans defaults to 0",
+    )
+    parser.add_argument("--read-only", action="store_true", help="skip register_check_event and generate_plans")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare with a stored JSON result")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold, percent")
+    parser.add_argument(
+        "--fail-on-regression", action="store_true", help="exit with status 1 if the baseline comparison regresses"
+    )
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        parser.error("--dsn or DATABASE_URL_SYNC is required")
+    args.base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+    return args
+
+
+def _routes(args: argparse.Namespace) -> list[Route]:
+    overrides = {}
+    names = {r.name for r in ROUTES}
+    for item in args.mix:
+        name, _, weight = item.partition("=")
+        if name not in names:
+            raise SystemExit(f"unknown route in --mix: {name} (known: {', '.join(sorted(names))})")
+        overrides[name] = float(weight)
+    routes = []
+    for r in ROUTES:
+        weight = overrides.get(r.name, r.weight)
+        if weight > 0 and not (args.read_only and r.write):
+            routes.append(Route(r.name, weight, r.build, r.write, r.needs, r.follow))
+    return routes
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = _parse_args(argv)
+    routes = _routes(args)
+    server = start_server(args) if args.start else None
+    try:
+        result = asyncio.run(run(args, routes))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_summary(result)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+-- Списание случайного прибора из «горячего» набора: UPDATE той же строки, на которую ссылаются
+-- регистрируемые поверки, плюс запись истории статусов триггером.
+\set n random(0, :hot - 1)
+SELECT metrology.fn_decommission_instrument(i.id, 'pgbench', NULL)
+FROM metrology.instrument i
+WHERE i.inventory_no = 'GEN-' || lpad(CAST(:n AS text), 9, '0');
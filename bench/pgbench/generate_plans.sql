@@ -0,0 +1,6 @@
+-- Генерация планов на недельное окно в ближайшие 30 дней: окна параллельных клиентов пересекаются.
+\set day random(0, 30)
+SELECT metrology.fn_generate_check_plan(
+  current_date + CAST(:day AS int),
+  current_date + CAST(:day AS int) + 7
+);
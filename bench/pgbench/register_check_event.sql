@@ -0,0 +1,29 @@
+-- Регистрация поверки по случайному прибору из «горячего» набора (инвентарные номера bench.datagen).
+-- Переменные: hot — размер горячего набора, labs — число лабораторий.
+\set n random(0, :hot - 1)
+\set lab random(0, :labs - 1)
+\set passed random(1, 100)
+SELECT metrology.fn_register_check_event(
+  i.id,
+  r.check_type_id,
+  current_date,
+  CASE WHEN CAST(:passed AS int) <= 95 THEN 'PASSED' ELSE 'FAILED' END,
+  l.id,
+  NULL,
+  NULL,
+  'PGBENCH',
+  NULL,
+  NULL
+)
+FROM metrology.instrument i
+CROSS JOIN LATERAL (
+  SELECT check_type_id
+  FROM metrology.check_requirement
+  WHERE instrument_model_id = i.instrument_model_id
+  ORDER BY check_type_id
+  LIMIT 1
+) r
+CROSS JOIN LATERAL (
+  SELECT id FROM metrology.lab ORDER BY code LIMIT 1 OFFSET CAST(:lab AS int)
+) l
+WHERE i.inventory_no = 'GEN-' || lpad(CAST(:n AS text), 9, '0');
@@ -2,6 +2,9 @@
 -- В psql просто выполните эти команды отдельно (без BEGIN/COMMIT вокруг).
 
 REFRESH MATERIALIZED VIEW CONCURRENTLY metrology.mv_instruments_due_30d;
+-- Новая версия данных: API перестаёт отвечать 304 на старый ETag
+SELECT metrology.fn_bump_data_version('mv_instruments_due_30d');
 REFRESH MATERIALIZED VIEW CONCURRENTLY metrology.mv_instruments_overdue;
+SELECT metrology.fn_bump_data_version('mv_instruments_overdue');
 
 
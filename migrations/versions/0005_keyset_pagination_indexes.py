@@ -0,0 +1,62 @@
+"""indexes matching keyset (cursor) pagination sort keys
+
+Revision ID: 0005_keyset_pagination_indexes
+Revises: 0004_stored_programs
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0005_keyset_pagination_indexes"
+down_revision = "0004_stored_programs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        -- Every list endpoint pages by a unique sort key: (natural order, id).
+        -- The indexes below let each page be a single index range scan.
+        CREATE INDEX IF NOT EXISTS ix_location_code_id ON metrology.location(code, id);
+        CREATE INDEX IF NOT EXISTS ix_specialist_full_name_id ON metrology.specialist(full_name, id);
+        CREATE INDEX IF NOT EXISTS ix_instrument_model_sort
+          ON metrology.instrument_model(manufacturer, model_name, id);
+        CREATE INDEX IF NOT EXISTS ix_document_created_at_id ON metrology.document(created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS ix_check_event_sort
+          ON metrology.check_event(check_date DESC, created_at DESC, id DESC);
+
+        -- Supersede single-column indexes with their keyset-complete versions
+        CREATE INDEX IF NOT EXISTS ix_check_plan_due_date_id ON metrology.check_plan(due_date DESC, id DESC);
+        DROP INDEX IF EXISTS metrology.ix_check_plan_due_date;
+
+        CREATE INDEX IF NOT EXISTS ix_audit_log_at_id ON metrology.audit_log(at DESC, id DESC);
+        DROP INDEX IF EXISTS metrology.ix_audit_log_at;
+
+        CREATE INDEX IF NOT EXISTS ix_audit_log_table_at_id ON metrology.audit_log(table_name, at DESC, id DESC);
+        DROP INDEX IF EXISTS metrology.ix_audit_log_table_at;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_audit_log_table_at ON metrology.audit_log(table_name, at DESC);
+        DROP INDEX IF EXISTS metrology.ix_audit_log_table_at_id;
+
+        CREATE INDEX IF NOT EXISTS ix_audit_log_at ON metrology.audit_log(at DESC);
+        DROP INDEX IF EXISTS metrology.ix_audit_log_at_id;
+
+        CREATE INDEX IF NOT EXISTS ix_check_plan_due_date ON metrology.check_plan(due_date);
+        DROP INDEX IF EXISTS metrology.ix_check_plan_due_date_id;
+
+        DROP INDEX IF EXISTS metrology.ix_check_event_sort;
+        DROP INDEX IF EXISTS metrology.ix_document_created_at_id;
+        DROP INDEX IF EXISTS metrology.ix_instrument_model_sort;
+        DROP INDEX IF EXISTS metrology.ix_specialist_full_name_id;
+        DROP INDEX IF EXISTS metrology.ix_location_code_id;
+        """
+    )
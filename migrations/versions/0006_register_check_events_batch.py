@@ -0,0 +1,150 @@
+"""stored programs: set-based batch registration of check events
+
+Revision ID: 0006_register_check_events_batch
+Revises: 0005_keyset_pagination_indexes
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0006_register_check_events_batch"
+down_revision = "0005_keyset_pagination_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        -- ===== Register a batch of check events (plan/fact, docs) =====
+        -- Parallel arrays describe one event per position; documents are passed as
+        -- (event_no, document_id) pairs where event_no is the 1-based event position.
+        CREATE OR REPLACE FUNCTION metrology.fn_register_check_events(
+          p_instrument_ids uuid[],
+          p_check_type_ids uuid[],
+          p_check_dates date[],
+          p_result_codes text[],
+          p_lab_ids uuid[],
+          p_specialist_ids uuid[],
+          p_check_plan_ids uuid[],
+          p_protocol_nos text[],
+          p_notes text[],
+          p_document_event_nos integer[] DEFAULT NULL,
+          p_document_ids uuid[] DEFAULT NULL
+        )
+        RETURNS TABLE(event_no integer, event_id uuid)
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+          v_n integer := coalesce(cardinality(p_instrument_ids), 0);
+          v_event_ids uuid[];
+          v_unknown text;
+          v_done_status uuid;
+        BEGIN
+          IF EXISTS (
+            SELECT 1
+            FROM unnest(ARRAY[
+              cardinality(p_check_type_ids),
+              cardinality(p_check_dates),
+              cardinality(p_result_codes),
+              cardinality(p_lab_ids),
+              cardinality(p_specialist_ids),
+              cardinality(p_check_plan_ids),
+              cardinality(p_protocol_nos),
+              cardinality(p_notes)
+            ]) AS c(n)
+            WHERE coalesce(c.n, 0) <> v_n
+          ) THEN
+            RAISE EXCEPTION 'Event input arrays must have equal length';
+          END IF;
+
+          IF coalesce(cardinality(p_document_event_nos), 0) <> coalesce(cardinality(p_document_ids), 0) THEN
+            RAISE EXCEPTION 'Document input arrays must have equal length';
+          END IF;
+
+          SELECT u.code INTO v_unknown
+          FROM unnest(p_result_codes) AS u(code)
+          LEFT JOIN metrology.check_result_status rs ON rs.code = u.code
+          WHERE rs.id IS NULL
+          LIMIT 1;
+
+          IF FOUND THEN
+            RAISE EXCEPTION 'Unknown result code: %', v_unknown;
+          END IF;
+
+          -- Ids are assigned up front so the result keeps the input order
+          v_event_ids := ARRAY(SELECT gen_random_uuid() FROM generate_series(1, v_n));
+
+          INSERT INTO metrology.check_event(
+            id,
+            instrument_id,
+            check_plan_id,
+            check_type_id,
+            lab_id,
+            specialist_id,
+            check_date,
+            result_status_id,
+            protocol_no,
+            notes
+          )
+          SELECT
+            e.id,
+            e.instrument_id,
+            e.check_plan_id,
+            e.check_type_id,
+            e.lab_id,
+            e.specialist_id,
+            e.check_date,
+            rs.id,
+            e.protocol_no,
+            e.notes
+          FROM unnest(
+            v_event_ids,
+            p_instrument_ids,
+            p_check_type_ids,
+            p_check_dates,
+            p_result_codes,
+            p_lab_ids,
+            p_specialist_ids,
+            p_check_plan_ids,
+            p_protocol_nos,
+            p_notes
+          ) WITH ORDINALITY AS e(
+            id, instrument_id, check_type_id, check_date, result_code,
+            lab_id, specialist_id, check_plan_id, protocol_no, notes, ord
+          )
+          JOIN metrology.check_result_status rs ON rs.code = e.result_code
+          ORDER BY e.ord;
+
+          IF p_document_ids IS NOT NULL THEN
+            INSERT INTO metrology.check_event_document(check_event_id, document_id)
+            SELECT v_event_ids[d.ord], d.document_id
+            FROM unnest(p_document_event_nos, p_document_ids) AS d(ord, document_id);
+          END IF;
+
+          v_done_status := metrology.fn_check_plan_status_id('DONE');
+
+          UPDATE metrology.check_plan
+            SET status_id = v_done_status
+          WHERE id IN (SELECT unnest(p_check_plan_ids));
+
+          RETURN QUERY
+          SELECT o::integer, v_event_ids[o]
+          FROM generate_subscripts(v_event_ids, 1) AS o
+          ORDER BY o;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DROP FUNCTION IF EXISTS metrology.fn_register_check_events(
+          uuid[], uuid[], date[], text[], uuid[], uuid[], uuid[], text[], text[], integer[], uuid[]
+        );
+        """
+    )
@@ -0,0 +1,55 @@
+"""triggers: NOTIFY on lookup table changes (app reference-data cache invalidation)
+
+Revision ID: 0007_refdata_notify
+Revises: 0006_register_check_events_batch
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0007_refdata_notify"
+down_revision = "0006_register_check_events_batch"
+branch_labels = None
+depends_on = None
+
+LOOKUP_TABLES = (
+    "instrument_status",
+    "check_result_status",
+    "check_kind",
+    "check_plan_status",
+    "document_type",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        -- Payload is the table name; the API drops its cached code -> id map for it
+        CREATE OR REPLACE FUNCTION metrology.trg_notify_refdata()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          PERFORM pg_notify('metrology_refdata', TG_TABLE_NAME);
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    for table in LOOKUP_TABLES:
+        op.execute(
+            f"""
+            DROP TRIGGER IF EXISTS trg_notify_refdata ON metrology.{table};
+            CREATE TRIGGER trg_notify_refdata
+              AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON metrology.{table}
+              FOR EACH STATEMENT EXECUTE FUNCTION metrology.trg_notify_refdata();
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in LOOKUP_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_notify_refdata ON metrology.{table};")
+    op.execute("DROP FUNCTION IF EXISTS metrology.trg_notify_refdata();")
@@ -0,0 +1,111 @@
+"""data versions: change counters for conditional GET (reference tables, report mviews)
+
+Revision ID: 0008_data_version
+Revises: 0007_refdata_notify
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0008_data_version"
+down_revision = "0007_refdata_notify"
+branch_labels = None
+depends_on = None
+
+# Tables whose list endpoints answer If-None-Match from the counter
+VERSIONED_TABLES = (
+    "instrument_type",
+    "check_type",
+    "lab",
+)
+VERSIONED_MVIEWS = (
+    "mv_instruments_due_30d",
+    "mv_instruments_overdue",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS metrology.data_version (
+          name text PRIMARY KEY,
+          version bigint NOT NULL DEFAULT 0,
+          changed_at timestamptz NOT NULL DEFAULT now()
+        );
+
+        CREATE OR REPLACE FUNCTION metrology.fn_bump_data_version(p_name text)
+        RETURNS bigint
+        LANGUAGE sql
+        AS $$
+          INSERT INTO metrology.data_version(name, version)
+          VALUES (p_name, 1)
+          ON CONFLICT (name) DO UPDATE
+            SET version = metrology.data_version.version + 1,
+                changed_at = now()
+          RETURNING version;
+        $$;
+
+        -- Statement-level: one bump per statement however many rows it touched
+        CREATE OR REPLACE FUNCTION metrology.trg_bump_data_version()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          PERFORM metrology.fn_bump_data_version(TG_TABLE_NAME);
+          RETURN NULL;
+        END;
+        $$;
+
+        -- Materialized view contents only change on refresh
+        CREATE OR REPLACE PROCEDURE metrology.sp_refresh_due_mviews()
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          REFRESH MATERIALIZED VIEW metrology.mv_instruments_due_30d;
+          PERFORM metrology.fn_bump_data_version('mv_instruments_due_30d');
+          REFRESH MATERIALIZED VIEW metrology.mv_instruments_overdue;
+          PERFORM metrology.fn_bump_data_version('mv_instruments_overdue');
+        END;
+        $$;
+        """
+    )
+    for name in VERSIONED_TABLES + VERSIONED_MVIEWS:
+        op.execute(
+            f"""
+            INSERT INTO metrology.data_version(name, version)
+            VALUES ('{name}', 1)
+            ON CONFLICT (name) DO NOTHING;
+            """
+        )
+    for table in VERSIONED_TABLES:
+        op.execute(
+            f"""
+            DROP TRIGGER IF EXISTS trg_bump_data_version ON metrology.{table};
+            CREATE TRIGGER trg_bump_data_version
+              AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON metrology.{table}
+              FOR EACH STATEMENT EXECUTE FUNCTION metrology.trg_bump_data_version();
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_bump_data_version ON metrology.{table};")
+    op.execute(
+        """
+        CREATE OR REPLACE PROCEDURE metrology.sp_refresh_due_mviews()
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          REFRESH MATERIALIZED VIEW metrology.mv_instruments_due_30d;
+          REFRESH MATERIALIZED VIEW metrology.mv_instruments_overdue;
+        END;
+        $$;
+
+        DROP FUNCTION IF EXISTS metrology.trg_bump_data_version();
+        DROP FUNCTION IF EXISTS metrology.fn_bump_data_version(text);
+        DROP TABLE IF EXISTS metrology.data_version;
+        """
+    )
@@ -0,0 +1,59 @@
+"""indexes matching the filtered instrument list: (filter column, inventory_no)
+
+Revision ID: 0009_instrument_filter_indexes
+Revises: 0008_data_version
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0009_instrument_filter_indexes"
+down_revision = "0008_data_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        -- GET /instruments filters by one of these columns and pages by inventory_no:
+        -- equality on the leading column plus the sort key keeps each page an index range scan.
+        -- instrument_type_id (a set of model ids) and the installed_at range cannot be read in
+        -- inventory_no order: their pages read every match and sort it.
+        CREATE INDEX IF NOT EXISTS ix_instrument_status_inventory ON metrology.instrument(status_id, inventory_no);
+        CREATE INDEX IF NOT EXISTS ix_instrument_installed_at ON metrology.instrument(installed_at);
+
+        -- Supersede single-column FK indexes with their sort-complete versions
+        CREATE INDEX IF NOT EXISTS ix_instrument_org_unit_inventory
+          ON metrology.instrument(org_unit_id, inventory_no);
+        DROP INDEX IF EXISTS metrology.ix_instrument_org_unit_id;
+
+        CREATE INDEX IF NOT EXISTS ix_instrument_location_inventory
+          ON metrology.instrument(location_id, inventory_no);
+        DROP INDEX IF EXISTS metrology.ix_instrument_location_id;
+
+        CREATE INDEX IF NOT EXISTS ix_instrument_model_inventory
+          ON metrology.instrument(instrument_model_id, inventory_no);
+        DROP INDEX IF EXISTS metrology.ix_instrument_model_id;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_instrument_model_id ON metrology.instrument(instrument_model_id);
+        DROP INDEX IF EXISTS metrology.ix_instrument_model_inventory;
+
+        CREATE INDEX IF NOT EXISTS ix_instrument_location_id ON metrology.instrument(location_id);
+        DROP INDEX IF EXISTS metrology.ix_instrument_location_inventory;
+
+        CREATE INDEX IF NOT EXISTS ix_instrument_org_unit_id ON metrology.instrument(org_unit_id);
+        DROP INDEX IF EXISTS metrology.ix_instrument_org_unit_inventory;
+
+        DROP INDEX IF EXISTS metrology.ix_instrument_installed_at;
+        DROP INDEX IF EXISTS metrology.ix_instrument_status_inventory;
+        """
+    )
@@ -0,0 +1,44 @@
+"""pg_trgm GIN indexes for fuzzy search over instruments and models
+
+Revision ID: 0010_trigram_search
+Revises: 0009_instrument_filter_indexes
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0010_trigram_search"
+down_revision = "0009_instrument_filter_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+        -- GET /search: `q <% column` (word similarity) is answered from these indexes
+        CREATE INDEX IF NOT EXISTS ix_instrument_inventory_no_trgm
+          ON metrology.instrument USING gin (inventory_no gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS ix_instrument_serial_no_trgm
+          ON metrology.instrument USING gin (serial_no gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS ix_instrument_model_manufacturer_trgm
+          ON metrology.instrument_model USING gin (manufacturer gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS ix_instrument_model_model_name_trgm
+          ON metrology.instrument_model USING gin (model_name gin_trgm_ops);
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DROP INDEX IF EXISTS metrology.ix_instrument_model_model_name_trgm;
+        DROP INDEX IF EXISTS metrology.ix_instrument_model_manufacturer_trgm;
+        DROP INDEX IF EXISTS metrology.ix_instrument_serial_no_trgm;
+        DROP INDEX IF EXISTS metrology.ix_instrument_inventory_no_trgm;
+        """
+    )
@@ -0,0 +1,35 @@
+"""index for per-instrument status history (instrument card)
+
+Revision ID: 0011_instrument_card_indexes
+Revises: 0010_trigram_search
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0011_instrument_card_indexes"
+down_revision = "0010_trigram_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        -- GET /instruments/{id}/full reads the whole history of one instrument, newest first;
+        -- uq_ish_one_open only covers the open row. Events and plans are already served by
+        -- ix_check_event_instrument_date and uq_check_plan (both lead with instrument_id).
+        CREATE INDEX IF NOT EXISTS ix_ish_instrument_valid_from
+          ON metrology.instrument_status_history(instrument_id, valid_from DESC);
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DROP INDEX IF EXISTS metrology.ix_ish_instrument_valid_from;
+        """
+    )
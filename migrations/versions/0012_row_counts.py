@@ -0,0 +1,191 @@
+"""row counts: trigger-maintained table and per-org-unit totals for X-Total-Count
+
+Revision ID: 0012_row_counts
+Revises: 0011_instrument_card_indexes
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0012_row_counts"
+down_revision = "0011_instrument_card_indexes"
+branch_labels = None
+depends_on = None
+
+# Tables whose list endpoints answer count=exact from the counters
+COUNTED_TABLES = (
+    "org_unit",
+    "location",
+    "lab",
+    "specialist",
+    "instrument_type",
+    "instrument_model",
+    "document",
+    "check_event",
+    "check_type",
+    "check_requirement",
+    "check_plan",
+    "audit_log",
+)
+# Counted per org_unit_id; the table total is the sum over org units
+ORG_UNIT_COUNTED_TABLES = ("instrument",)
+# Concurrent writers spread their deltas over this many rows per key
+COUNTER_SLOTS = 16
+
+
+def _rebuild_sql(table: str) -> str:
+    org_unit = "org_unit_id" if table in ORG_UNIT_COUNTED_TABLES else "NULL::uuid"
+    group_by = " GROUP BY org_unit_id" if table in ORG_UNIT_COUNTED_TABLES else ""
+    return f"""
+          LOCK TABLE metrology.{table} IN SHARE MODE;
+          DELETE FROM metrology.row_count WHERE table_name = '{table}';
+          INSERT INTO metrology.row_count(table_name, org_unit_id, slot, n)
+          SELECT '{table}', {org_unit}, 0, count(*) FROM metrology.{table}{group_by};
+    """
+
+
+def upgrade() -> None:
+    rebuild = "".join(_rebuild_sql(t) for t in COUNTED_TABLES + ORG_UNIT_COUNTED_TABLES)
+    op.execute(
+        f"""
+        -- Deltas land in one of COUNTER_SLOTS rows chosen by backend pid, so concurrent
+        -- inserts into the same table rarely wait on each other's counter row lock.
+        -- A total is sum(n) over the slots of one (table_name, org_unit_id) key.
+        CREATE TABLE IF NOT EXISTS metrology.row_count (
+          table_name text NOT NULL,
+          org_unit_id uuid NULL,
+          slot smallint NOT NULL,
+          n bigint NOT NULL,
+          CONSTRAINT uq_row_count UNIQUE NULLS NOT DISTINCT (table_name, org_unit_id, slot)
+        );
+
+        -- Statement-level with transition tables: one upsert per statement however many rows it touched
+        CREATE OR REPLACE FUNCTION metrology.trg_row_count()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+          v_delta bigint;
+        BEGIN
+          IF TG_OP = 'TRUNCATE' THEN
+            DELETE FROM metrology.row_count WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+          ELSIF TG_OP = 'INSERT' THEN
+            SELECT count(*) INTO v_delta FROM new_rows;
+          ELSE
+            SELECT -count(*) INTO v_delta FROM old_rows;
+          END IF;
+
+          IF v_delta <> 0 THEN
+            INSERT INTO metrology.row_count AS c (table_name, org_unit_id, slot, n)
+            VALUES (TG_TABLE_NAME, NULL, pg_backend_pid() % {COUNTER_SLOTS}, v_delta)
+            ON CONFLICT (table_name, org_unit_id, slot) DO UPDATE SET n = c.n + EXCLUDED.n;
+          END IF;
+          RETURN NULL;
+        END;
+        $$;
+
+        -- Same, keyed by org_unit_id; updates only write when an instrument moved between org units
+        CREATE OR REPLACE FUNCTION metrology.trg_row_count_by_org_unit()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'TRUNCATE' THEN
+            DELETE FROM metrology.row_count WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+          END IF;
+
+          -- Ordered by key so two statements upserting the same org units lock them in the same order
+          IF TG_OP = 'INSERT' THEN
+            INSERT INTO metrology.row_count AS c (table_name, org_unit_id, slot, n)
+            SELECT TG_TABLE_NAME, org_unit_id, pg_backend_pid() % {COUNTER_SLOTS}, count(*)
+            FROM new_rows GROUP BY org_unit_id ORDER BY org_unit_id
+            ON CONFLICT (table_name, org_unit_id, slot) DO UPDATE SET n = c.n + EXCLUDED.n;
+          ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO metrology.row_count AS c (table_name, org_unit_id, slot, n)
+            SELECT TG_TABLE_NAME, org_unit_id, pg_backend_pid() % {COUNTER_SLOTS}, -count(*)
+            FROM old_rows GROUP BY org_unit_id ORDER BY org_unit_id
+            ON CONFLICT (table_name, org_unit_id, slot) DO UPDATE SET n = c.n + EXCLUDED.n;
+          ELSE
+            INSERT INTO metrology.row_count AS c (table_name, org_unit_id, slot, n)
+            SELECT TG_TABLE_NAME, d.org_unit_id, pg_backend_pid() % {COUNTER_SLOTS}, sum(d.n)
+            FROM (
+              SELECT org_unit_id, 1 AS n FROM new_rows
+              UNION ALL
+              SELECT org_unit_id, -1 FROM old_rows
+            ) d
+            GROUP BY d.org_unit_id
+            HAVING sum(d.n) <> 0
+            ORDER BY d.org_unit_id
+            ON CONFLICT (table_name, org_unit_id, slot) DO UPDATE SET n = c.n + EXCLUDED.n;
+          END IF;
+          RETURN NULL;
+        END;
+        $$;
+
+        -- Recount from the tables, e.g. after a bulk load with triggers disabled
+        CREATE OR REPLACE FUNCTION metrology.fn_rebuild_row_counts()
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          {rebuild}
+        END;
+        $$;
+        """
+    )
+    for table in COUNTED_TABLES + ORG_UNIT_COUNTED_TABLES:
+        fn = "trg_row_count_by_org_unit" if table in ORG_UNIT_COUNTED_TABLES else "trg_row_count"
+        # Transition tables allow a single event per trigger
+        op.execute(
+            f"""
+            DROP TRIGGER IF EXISTS trg_row_count_ins ON metrology.{table};
+            CREATE TRIGGER trg_row_count_ins
+              AFTER INSERT ON metrology.{table}
+              REFERENCING NEW TABLE AS new_rows
+              FOR EACH STATEMENT EXECUTE FUNCTION metrology.{fn}();
+            DROP TRIGGER IF EXISTS trg_row_count_del ON metrology.{table};
+            CREATE TRIGGER trg_row_count_del
+              AFTER DELETE ON metrology.{table}
+              REFERENCING OLD TABLE AS old_rows
+              FOR EACH STATEMENT EXECUTE FUNCTION metrology.{fn}();
+            DROP TRIGGER IF EXISTS trg_row_count_trunc ON metrology.{table};
+            CREATE TRIGGER trg_row_count_trunc
+              AFTER TRUNCATE ON metrology.{table}
+              FOR EACH STATEMENT EXECUTE FUNCTION metrology.{fn}();
+            """
+        )
+    for table in ORG_UNIT_COUNTED_TABLES:
+        op.execute(
+            f"""
+            DROP TRIGGER IF EXISTS trg_row_count_upd ON metrology.{table};
+            CREATE TRIGGER trg_row_count_upd
+              AFTER UPDATE ON metrology.{table}
+              REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+              FOR EACH STATEMENT EXECUTE FUNCTION metrology.trg_row_count_by_org_unit();
+            """
+        )
+    op.execute("SELECT metrology.fn_rebuild_row_counts();")
+
+
+def downgrade() -> None:
+    for table in COUNTED_TABLES + ORG_UNIT_COUNTED_TABLES:
+        op.execute(
+            f"""
+            DROP TRIGGER IF EXISTS trg_row_count_upd ON metrology.{table};
+            DROP TRIGGER IF EXISTS trg_row_count_trunc ON metrology.{table};
+            DROP TRIGGER IF EXISTS trg_row_count_del ON metrology.{table};
+            DROP TRIGGER IF EXISTS trg_row_count_ins ON metrology.{table};
+            """
+        )
+    op.execute(
+        """
+        DROP FUNCTION IF EXISTS metrology.fn_rebuild_row_counts();
+        DROP FUNCTION IF EXISTS metrology.trg_row_count_by_org_unit();
+        DROP FUNCTION IF EXISTS metrology.trg_row_count();
+        DROP TABLE IF EXISTS metrology.row_count;
+        """
+    )
@@ -0,0 +1,134 @@
+"""plan generation jobs: job table, chunked instrument queue, per-range generator
+
+Revision ID: 0013_plan_jobs
+Revises: 0012_row_counts
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0013_plan_jobs"
+down_revision = "0012_row_counts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS metrology.plan_job (
+          id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+          from_date date NOT NULL,
+          to_date date NOT NULL,
+          status text NOT NULL DEFAULT 'queued',
+          error text NULL,
+          created_at timestamptz NOT NULL DEFAULT now(),
+          started_at timestamptz NULL,
+          finished_at timestamptz NULL,
+          CONSTRAINT ck_plan_job_status CHECK (status IN ('queued', 'running', 'done', 'failed')),
+          CONSTRAINT ck_plan_job_range CHECK (to_date >= from_date)
+        );
+
+        -- One row per slice of instruments by id: [lower_id, upper_id), upper_id NULL for the last slice.
+        -- Workers claim pending chunks with FOR UPDATE SKIP LOCKED; the claim lives as long as the
+        -- transaction that generates the chunk, so a crashed worker's chunk is simply claimable again.
+        CREATE TABLE IF NOT EXISTS metrology.plan_job_chunk (
+          job_id uuid NOT NULL,
+          chunk_no integer NOT NULL,
+          lower_id uuid NOT NULL,
+          upper_id uuid NULL,
+          inserted integer NULL,
+          done_at timestamptz NULL,
+          CONSTRAINT pk_plan_job_chunk PRIMARY KEY (job_id, chunk_no),
+          CONSTRAINT fk_plan_job_chunk_job
+            FOREIGN KEY (job_id) REFERENCES metrology.plan_job(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS ix_plan_job_chunk_pending
+          ON metrology.plan_job_chunk(job_id, chunk_no) WHERE done_at IS NULL;
+        CREATE INDEX IF NOT EXISTS ix_plan_job_active
+          ON metrology.plan_job(created_at) WHERE status IN ('queued', 'running');
+
+        -- fn_generate_check_plan restricted to one id range of instruments. The candidate query is
+        -- v_instrument_check_next_due inlined, so the range reaches the check_event scan
+        -- (ix_check_event_instrument_date) instead of being applied after the aggregate.
+        CREATE OR REPLACE FUNCTION metrology.fn_generate_check_plan_range(
+          p_from date,
+          p_to date,
+          p_lower_id uuid,
+          p_upper_id uuid
+        )
+        RETURNS integer
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+          v_planned_status uuid;
+          v_active_status uuid;
+          v_inserted integer;
+        BEGIN
+          IF p_from IS NULL OR p_to IS NULL OR p_to < p_from THEN
+            RAISE EXCEPTION 'Invalid range';
+          END IF;
+
+          v_planned_status := metrology.fn_check_plan_status_id('PLANNED');
+          v_active_status := metrology.fn_instrument_status_id('ACTIVE');
+
+          IF v_planned_status IS NULL THEN
+            RAISE EXCEPTION 'Plan status not seeded';
+          END IF;
+
+          WITH last_success AS (
+            SELECT
+              ce.instrument_id,
+              ce.check_type_id,
+              max(ce.check_date) AS last_check_date
+            FROM metrology.check_event ce
+            JOIN metrology.check_result_status rs ON rs.id = ce.result_status_id
+            WHERE rs.is_success = true
+              AND ce.instrument_id >= p_lower_id
+              AND (p_upper_id IS NULL OR ce.instrument_id < p_upper_id)
+            GROUP BY ce.instrument_id, ce.check_type_id
+          ),
+          candidates AS (
+            SELECT
+              ce.instrument_id,
+              ce.check_type_id,
+              ce.next_due_date AS due_date
+            FROM last_success ls
+            JOIN metrology.instrument i ON i.id = ls.instrument_id
+            JOIN metrology.check_type ct ON ct.id = ls.check_type_id
+            JOIN metrology.check_event ce
+              ON ce.instrument_id = ls.instrument_id
+             AND ce.check_type_id = ls.check_type_id
+             AND ce.check_date = ls.last_check_date
+            WHERE ce.next_due_date IS NOT NULL
+              AND ce.next_due_date BETWEEN p_from AND p_to
+              AND i.status_id = v_active_status
+          ),
+          ins AS (
+            INSERT INTO metrology.check_plan(
+              instrument_id, check_type_id, due_date, status_id
+            )
+            SELECT c.instrument_id, c.check_type_id, c.due_date, v_planned_status
+            FROM candidates c
+            ON CONFLICT ON CONSTRAINT uq_check_plan DO NOTHING
+            RETURNING 1
+          )
+          SELECT count(*) INTO v_inserted FROM ins;
+
+          RETURN v_inserted;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DROP FUNCTION IF EXISTS metrology.fn_generate_check_plan_range(date, date, uuid, uuid);
+        DROP TABLE IF EXISTS metrology.plan_job_chunk;
+        DROP TABLE IF EXISTS metrology.plan_job;
+        """
+    )
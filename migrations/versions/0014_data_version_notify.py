@@ -0,0 +1,65 @@
+"""data versions: NOTIFY every bump (in-process report generation)
+
+Revision ID: 0014_data_version_notify
+Revises: 0013_plan_jobs
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0014_data_version_notify"
+down_revision = "0013_plan_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        -- Payload is "<name> <version> <changed_at in epoch microseconds>", delivered on commit;
+        -- the API keeps the latest per name and serves cached reports without a query.
+        -- Covers sp_refresh_due_mviews, the concurrent refresh script and the table triggers.
+        CREATE OR REPLACE FUNCTION metrology.fn_bump_data_version(p_name text)
+        RETURNS bigint
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+          v_version bigint;
+          v_changed_at timestamptz;
+        BEGIN
+          INSERT INTO metrology.data_version(name, version)
+          VALUES (p_name, 1)
+          ON CONFLICT (name) DO UPDATE
+            SET version = metrology.data_version.version + 1,
+                changed_at = now()
+          RETURNING version, changed_at INTO v_version, v_changed_at;
+
+          PERFORM pg_notify(
+            'metrology_data_version',
+            p_name || ' ' || v_version || ' ' || (extract(epoch FROM v_changed_at) * 1000000)::bigint
+          );
+          RETURN v_version;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION metrology.fn_bump_data_version(p_name text)
+        RETURNS bigint
+        LANGUAGE sql
+        AS $$
+          INSERT INTO metrology.data_version(name, version)
+          VALUES (p_name, 1)
+          ON CONFLICT (name) DO UPDATE
+            SET version = metrology.data_version.version + 1,
+                changed_at = now()
+          RETURNING version;
+        $$;
+        """
+    )
@@ -0,0 +1,44 @@
+"""GiST trigram indexes on instrument numbers: nearest-match (KNN) search candidates
+
+Revision ID: 0015_trigram_knn
+Revises: 0014_data_version_notify
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0015_trigram_knn"
+down_revision = "0014_data_version_notify"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        -- GET /search caps the instrument candidates it ranks; `ORDER BY q <<-> column LIMIT n` keeps
+        -- the closest ones, which only GiST can return in distance order. It also answers `q <% column`,
+        -- so the GIN indexes from 0010 would be pure write overhead on these columns.
+        CREATE INDEX IF NOT EXISTS ix_instrument_inventory_no_gist_trgm
+          ON metrology.instrument USING gist (inventory_no gist_trgm_ops);
+        CREATE INDEX IF NOT EXISTS ix_instrument_serial_no_gist_trgm
+          ON metrology.instrument USING gist (serial_no gist_trgm_ops);
+        DROP INDEX IF EXISTS metrology.ix_instrument_inventory_no_trgm;
+        DROP INDEX IF EXISTS metrology.ix_instrument_serial_no_trgm;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_instrument_inventory_no_trgm
+          ON metrology.instrument USING gin (inventory_no gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS ix_instrument_serial_no_trgm
+          ON metrology.instrument USING gin (serial_no gin_trgm_ops);
+        DROP INDEX IF EXISTS metrology.ix_instrument_serial_no_gist_trgm;
+        DROP INDEX IF EXISTS metrology.ix_instrument_inventory_no_gist_trgm;
+        """
+    )
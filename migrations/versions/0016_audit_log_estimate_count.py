@@ -0,0 +1,91 @@
+"""row counts: stop counting audit_log (estimate-only X-Total-Count)
+
+Revision ID: 0016_audit_log_estimate_count
+Revises: 0015_trigram_knn
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0016_audit_log_estimate_count"
+down_revision = "0015_trigram_knn"
+branch_labels = None
+depends_on = None
+
+# 0012's lists without audit_log: trg_audit_row is a row trigger issuing one INSERT per audited
+# row, so the "statement-level" counter on audit_log fired once per row, every time on the writer's
+# one slot row (100k counter updates, and dead versions, for a 100k-row bulk import). GET /audit
+# pages by keyset and never needs an exact total.
+COUNTED_TABLES = (
+    "org_unit",
+    "location",
+    "lab",
+    "specialist",
+    "instrument_type",
+    "instrument_model",
+    "document",
+    "check_event",
+    "check_type",
+    "check_requirement",
+    "check_plan",
+)
+ORG_UNIT_COUNTED_TABLES = ("instrument",)
+
+
+def _rebuild_sql(table: str) -> str:
+    org_unit = "org_unit_id" if table in ORG_UNIT_COUNTED_TABLES else "NULL::uuid"
+    group_by = " GROUP BY org_unit_id" if table in ORG_UNIT_COUNTED_TABLES else ""
+    return f"""
+          LOCK TABLE metrology.{table} IN SHARE MODE;
+          DELETE FROM metrology.row_count WHERE table_name = '{table}';
+          INSERT INTO metrology.row_count(table_name, org_unit_id, slot, n)
+          SELECT '{table}', {org_unit}, 0, count(*) FROM metrology.{table}{group_by};
+    """
+
+
+def _rebuild_function(tables: tuple[str, ...]) -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION metrology.fn_rebuild_row_counts()
+        RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          {"".join(_rebuild_sql(t) for t in tables)}
+        END;
+        $$;
+    """
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS trg_row_count_trunc ON metrology.audit_log;
+        DROP TRIGGER IF EXISTS trg_row_count_del ON metrology.audit_log;
+        DROP TRIGGER IF EXISTS trg_row_count_ins ON metrology.audit_log;
+        DELETE FROM metrology.row_count WHERE table_name = 'audit_log';
+        """
+    )
+    op.execute(_rebuild_function(COUNTED_TABLES + ORG_UNIT_COUNTED_TABLES))
+
+
+def downgrade() -> None:
+    op.execute(_rebuild_function(COUNTED_TABLES + ("audit_log",) + ORG_UNIT_COUNTED_TABLES))
+    op.execute(
+        """
+        CREATE TRIGGER trg_row_count_ins
+          AFTER INSERT ON metrology.audit_log
+          REFERENCING NEW TABLE AS new_rows
+          FOR EACH STATEMENT EXECUTE FUNCTION metrology.trg_row_count();
+        CREATE TRIGGER trg_row_count_del
+          AFTER DELETE ON metrology.audit_log
+          REFERENCING OLD TABLE AS old_rows
+          FOR EACH STATEMENT EXECUTE FUNCTION metrology.trg_row_count();
+        CREATE TRIGGER trg_row_count_trunc
+          AFTER TRUNCATE ON metrology.audit_log
+          FOR EACH STATEMENT EXECUTE FUNCTION metrology.trg_row_count();
+
+        SELECT metrology.fn_rebuild_row_counts();
+        """
+    )
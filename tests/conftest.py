@@ -0,0 +1,60 @@
+"""
+Tests marked `db` run against a scratch database migrated to head (`alembic upgrade head`),
+given as an asyncpg URL for the schema owner in TEST_DATABASE_URL_ASYNC; without it they
+are skipped. Each one runs in a transaction with db/seed loaded that is rolled back at the end.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL_ASYNC")
+# app.settings needs a URL at import; the app's own engine is never connected by the tests
+os.environ.setdefault("DATABASE_URL_ASYNC", TEST_DATABASE_URL or "postgresql+asyncpg://test@localhost/test")
+os.environ.setdefault("PLAN_JOB_WORKERS", "0")
+
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+SEED_DIR = Path(__file__).resolve().parent.parent / "db" / "seed"
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "db: needs the database in TEST_DATABASE_URL_ASYNC")
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    if TEST_DATABASE_URL is None:
+        skip = pytest.mark.skip(reason="TEST_DATABASE_URL_ASYNC is not set")
+        for item in items:
+            if "db" in item.keywords:
+                item.add_marker(skip)
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def db() -> AsyncIterator[AsyncConnection]:
+    """A connection inside a transaction that is rolled back, with the demo data loaded."""
+    assert TEST_DATABASE_URL is not None
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            raw = await conn.get_raw_connection()
+            for path in sorted(SEED_DIR.glob("*.sql")):
+                # Seed files are multi-statement scripts: asyncpg runs them unprepared
+                await raw.driver_connection.execute(path.read_text(encoding="utf-8"))
+            try:
+                yield conn
+            finally:
+                await trans.rollback()
+    finally:
+        await engine.dispose()
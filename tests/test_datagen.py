@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import uuid
+
+from bench.datagen import COLUMNS, _parse_args, build_dims, generate_chunk
+
+
+class _Codes(dict):
+    """Lookup ids for whatever codes the generator asks for."""
+
+    def __missing__(self, code: str) -> uuid.UUID:
+        self[code] = uuid.uuid5(uuid.NAMESPACE_OID, code)
+        return self[code]
+
+
+def test_generated_periods_are_well_formed(monkeypatch) -> None:
+    # One year of history makes retirement on the installation day common
+    args = _parse_args(["--dsn", "unused", "--instruments", "5000", "--chunk-size", "1000", "--years", "1"])
+    lookups = {
+        table: _Codes()
+        for table in ("instrument_status", "check_result_status", "check_kind", "check_plan_status", "document_type")
+    }
+    monkeypatch.setattr("bench.datagen.load_lookups", lambda conn: lookups)
+    dims, _ = build_dims(None, args)  # type: ignore[arg-type]
+    instrument = COLUMNS["instrument"]
+    history = COLUMNS["instrument_status_history"]
+    for chunk_no in range(5):
+        batch = generate_chunk(dims, chunk_no)
+        for row in batch.rows["instrument"]:
+            decommissioned_at = row[instrument.index("decommissioned_at")]
+            assert decommissioned_at is None or decommissioned_at >= row[instrument.index("installed_at")]
+        # ck_ish_period is checked even with session_replication_role = replica
+        for row in batch.rows["instrument_status_history"]:
+            valid_to = row[history.index("valid_to")]
+            assert valid_to is None or valid_to >= row[history.index("valid_from")]
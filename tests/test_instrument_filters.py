@@ -0,0 +1,83 @@
+"""Filtered GET /instruments pages backed by a (column, inventory_no) index are read in keyset order, unsorted."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.api.crud import _page_params, _page_sql
+from app.api.router import cruds
+
+pytestmark = [pytest.mark.anyio, pytest.mark.db]
+
+FLEET = 20_000
+
+
+@pytest.fixture
+async def fleet(db: AsyncConnection) -> AsyncConnection:
+    # One instrument in 20 is in repair, another one in 20 belongs to QC: selective, as in production
+    await db.execute(
+        text(
+            "INSERT INTO metrology.location(org_unit_id, code, name) "
+            "SELECT id, 'T-QC-LAB', 'Test QC location' FROM metrology.org_unit WHERE code = 'QC'"
+        )
+    )
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.instrument(instrument_model_id, inventory_no, org_unit_id, location_id, status_id)
+            SELECT m.id, 'T-EXP-' || lpad(g::text, 6, '0'), l.org_unit_id, l.id,
+                   CASE WHEN g % 20 = 0 THEN repair.id ELSE active.id END
+            FROM generate_series(1, :n) g
+            CROSS JOIN metrology.instrument_model m
+            JOIN metrology.location l ON l.code = CASE WHEN g % 20 = 1 THEN 'T-QC-LAB' ELSE 'LINE_1' END
+            CROSS JOIN (SELECT id FROM metrology.instrument_status WHERE code = 'IN_REPAIR') repair
+            CROSS JOIN (SELECT id FROM metrology.instrument_status WHERE code = 'ACTIVE') active
+            WHERE m.manufacturer = 'ACME' AND m.model_name = 'P-100'
+            """
+        ),
+        {"n": FLEET},
+    )
+    await db.execute(text("ANALYZE metrology.instrument"))
+    return db
+
+
+async def _plan(db: AsyncConnection, filters: dict[str, Any], cursor: str | None) -> dict:
+    crud = cruds["instrument"]
+    args = await crud._page_args(db, 50, 0, cursor, filters)
+    where, params = _page_params(args["keyset"], 50, 0, cursor, args["where"], args["params"])
+    stmt = f"EXPLAIN (FORMAT JSON) {_page_sql(args['select_sql'], args['keyset'], where)}"
+    return json.loads((await db.execute(text(stmt), params)).scalar_one())[0]["Plan"]
+
+
+def _nodes(plan: dict) -> list[dict]:
+    return [plan, *(node for child in plan.get("Plans", []) for node in _nodes(child))]
+
+
+@pytest.mark.parametrize(
+    "param, value_sql, index",
+    [
+        ("status_code", "SELECT 'IN_REPAIR'", "ix_instrument_status_inventory"),
+        ("org_unit_id", "SELECT id FROM metrology.org_unit WHERE code = 'QC'", "ix_instrument_org_unit_inventory"),
+        (
+            "location_id",
+            "SELECT id FROM metrology.location WHERE code = 'T-QC-LAB'",
+            "ix_instrument_location_inventory",
+        ),
+    ],
+    ids=["status_code", "org_unit_id", "location_id"],
+)
+@pytest.mark.parametrize("from_middle", [False, True], ids=["first_page", "cursor_page"])
+async def test_filtered_page_is_an_ordered_range_scan(
+    fleet: AsyncConnection, param: str, value_sql: str, index: str, from_middle: bool
+) -> None:
+    filters = {param: await fleet.scalar(text(value_sql))}
+    cursor = cruds["instrument"].spec.keyset.encode(["T-EXP-010000"]) if from_middle else None
+
+    nodes = _nodes(await _plan(fleet, filters, cursor))
+    assert not [n for n in nodes if n["Node Type"] in ("Sort", "Incremental Sort")], nodes
+    assert [n for n in nodes if n.get("Index Name") == index and n["Node Type"] in ("Index Scan", "Index Only Scan")]
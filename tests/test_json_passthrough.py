@@ -0,0 +1,114 @@
+"""Bodies rendered by Postgres (settings.json_passthrough) must equal what the pydantic *Out path returns."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.api.entities import CHECK_EVENT, TABLE_SPECS
+from app.db import get_conn, get_read_conn
+from app.main import app
+from app.schemas import InstrumentFullOut
+from app.settings import settings
+
+pytestmark = [pytest.mark.anyio, pytest.mark.db]
+
+# CheckEventOut first: the list the passthrough was built for
+SPECS = sorted(TABLE_SPECS, key=lambda spec: spec is not CHECK_EVENT)
+# A timestamp rendered with a UTC offset instead of pydantic's "Z"
+_OFFSET_RE = re.compile(r'"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(\.\d+)?[+-]\d\d(:\d\d)?"')
+
+
+@pytest.fixture
+async def client(db: AsyncConnection) -> AsyncIterator[httpx.AsyncClient]:
+    async def conn() -> AsyncIterator[AsyncConnection]:
+        yield db
+
+    # Postgres renders timestamptz in the session TimeZone, so only a non-UTC one shows a divergence
+    await db.execute(text("SET LOCAL TimeZone = 'Europe/Moscow'"))
+    # Rows the demo seed lacks, with both a whole-second and a fractional created_at
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.check_plan(instrument_id, check_type_id, due_date, status_id, created_at)
+            SELECT i.id, ct.id, current_date + 30, ps.id, TIMESTAMPTZ '2026-01-02 03:04:05+00'
+            FROM metrology.instrument i, metrology.check_type ct, metrology.check_plan_status ps
+            WHERE i.inventory_no = 'INV-0001' AND ct.code = 'VERIF' AND ps.code = 'PLANNED'
+            """
+        )
+    )
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.document(document_type_id, title, storage_ref, created_at)
+            SELECT id, 'Протокол PR-001', 's3://docs/pr-001.pdf', TIMESTAMPTZ '2026-01-02 03:04:05.678+00'
+            FROM metrology.document_type WHERE code = 'PROTOCOL'
+            """
+        )
+    )
+    app.dependency_overrides[get_conn] = conn
+    app.dependency_overrides[get_read_conn] = conn
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def _both(
+    client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch, method: str, url: str, **kwargs: Any
+) -> tuple[httpx.Response, httpx.Response]:
+    """The same request with the passthrough on, then off."""
+    responses = []
+    for passthrough in (True, False):
+        monkeypatch.setattr(settings, "json_passthrough", passthrough)
+        response = await client.request(method, url, **kwargs)
+        assert response.status_code == 200, response.text
+        responses.append(response)
+    return responses[0], responses[1]
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.entity)
+async def test_list_matches_pydantic(client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch, spec: Any) -> None:
+    passthrough, pydantic = await _both(client, monkeypatch, "GET", spec.path, params={"limit": 1000})
+    assert passthrough.json(), f"no {spec.entity} rows to compare"
+    assert passthrough.json() == pydantic.json()
+    assert not _OFFSET_RE.search(passthrough.text)
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.entity)
+async def test_ids_and_lookup_match_pydantic(
+    client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch, spec: Any, db: AsyncConnection
+) -> None:
+    ids = [str(i) for i in (await db.execute(text(f"SELECT id FROM {spec.table} ORDER BY id DESC"))).scalars()]
+    ids.append("00000000-0000-0000-0000-000000000000")
+
+    passthrough, pydantic = await _both(client, monkeypatch, "GET", spec.path, params={"ids": ",".join(ids)})
+    assert passthrough.json() == pydantic.json()
+
+    passthrough, pydantic = await _both(client, monkeypatch, "POST", f"{spec.path}/lookup", json={"ids": ids})
+    assert passthrough.json() == pydantic.json()
+    assert not _OFFSET_RE.search(passthrough.text)
+
+
+async def test_audit_matches_pydantic(client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    passthrough, pydantic = await _both(client, monkeypatch, "GET", "/audit", params={"limit": 1000})
+    assert passthrough.json()
+    assert passthrough.json() == pydantic.json()
+
+
+async def test_instrument_full_matches_schema(client: httpx.AsyncClient, db: AsyncConnection) -> None:
+    # No pydantic path to compare with: the body must survive a round trip through the schema unchanged
+    instrument_id = await db.scalar(text("SELECT id FROM metrology.instrument WHERE inventory_no = 'INV-0001'"))
+    response = await client.get(f"/instruments/{instrument_id}/full")
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["open_plans"] and body["recent_events"] and body["status_history"]
+    assert InstrumentFullOut.model_validate(body).model_dump(mode="json") == body
+    assert not _OFFSET_RE.search(response.text)
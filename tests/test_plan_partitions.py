@@ -0,0 +1,82 @@
+"""fn_generate_check_plan_range over partition_bounds(n) must insert exactly what fn_generate_check_plan does."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.jobs import partition_bounds
+
+pytestmark = [pytest.mark.anyio, pytest.mark.db]
+
+FROM_DATE = date.today() - timedelta(days=400)
+TO_DATE = date.today() + timedelta(days=400)
+_PLAN_ROWS_SQL = text("SELECT instrument_id, check_type_id, due_date FROM metrology.check_plan")
+
+
+@pytest.fixture
+async def fleet(db: AsyncConnection) -> AsyncConnection:
+    # Random ids spread the instruments over every slice; due dates fall inside and outside the range
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.instrument(instrument_model_id, inventory_no, org_unit_id, location_id, status_id)
+            SELECT m.id, 'T-PLAN-' || g, l.org_unit_id, l.id, st.id
+            FROM generate_series(1, 60) g, metrology.instrument_model m, metrology.location l,
+                 metrology.instrument_status st
+            WHERE m.manufacturer = 'ACME' AND m.model_name = 'P-100' AND l.code = 'LINE_1' AND st.code = 'ACTIVE'
+            """
+        )
+    )
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.check_event(instrument_id, check_type_id, lab_id, check_date, result_status_id)
+            SELECT i.id, ct.id, lab.id, current_date - (row_number() OVER (ORDER BY i.id))::int * 13, rs.id
+            FROM metrology.instrument i, metrology.check_type ct, metrology.lab, metrology.check_result_status rs
+            WHERE i.inventory_no LIKE 'T-PLAN-%' AND ct.code = 'VERIF' AND lab.code = 'LAB_A'
+              AND rs.code = CASE WHEN right(i.inventory_no, 1) = '7' THEN 'FAILED' ELSE 'PASSED' END
+            """
+        )
+    )
+    return db
+
+
+async def _inserted(db: AsyncConnection, generate: Callable[[], Awaitable[int]]) -> tuple[int, set[tuple]]:
+    """Rows `generate` adds to check_plan, rolled back afterwards, and the count it reported."""
+    before = set((await db.execute(_PLAN_ROWS_SQL)).all())
+    savepoint = await db.begin_nested()
+    try:
+        reported = await generate()
+        after = set((await db.execute(_PLAN_ROWS_SQL)).all())
+    finally:
+        await savepoint.rollback()
+    return reported, after - before
+
+
+@pytest.mark.parametrize("partitions", [1, 2, 3, 8, 16])
+async def test_partitions_match_single_statement(fleet: AsyncConnection, partitions: int) -> None:
+    params = {"from_date": FROM_DATE, "to_date": TO_DATE}
+
+    async def single() -> int:
+        return await fleet.scalar(text("SELECT metrology.fn_generate_check_plan(:from_date, :to_date)"), params)
+
+    async def partitioned() -> int:
+        lowers = partition_bounds(partitions)
+        inserted = 0
+        for lower, upper in zip(lowers, [*lowers[1:], None]):
+            inserted += await fleet.scalar(
+                text("SELECT metrology.fn_generate_check_plan_range(:from_date, :to_date, :lower_id, :upper_id)"),
+                {**params, "lower_id": lower, "upper_id": upper},
+            )
+        return inserted
+
+    single_count, single_rows = await _inserted(fleet, single)
+    assert single_rows, "the range plans nothing; the comparison would be vacuous"
+    partitioned_count, partitioned_rows = await _inserted(fleet, partitioned)
+    assert partitioned_rows == single_rows
+    assert partitioned_count == single_count == len(single_rows)
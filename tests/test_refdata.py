@@ -0,0 +1,79 @@
+"""Code lookups in app.refdata.RefDataCache, on a fake connection with a live listener."""
+
+from __future__ import annotations
+
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+import app.refdata as refdata_module
+from app.refdata import RefDataCache
+
+pytestmark = pytest.mark.anyio
+
+ACTIVE = uuid4()
+
+
+class _Listener:
+    def is_closed(self) -> bool:
+        return False
+
+
+class _Result:
+    def __init__(self, rows: list[tuple]) -> None:
+        self._rows = rows
+
+    def fetchall(self) -> list[tuple]:
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self) -> None:
+        self.rows = [("ACTIVE", ACTIVE)]
+        self.loads = 0
+
+    async def execute(self, stmt: Any, params: Any = None) -> _Result:
+        self.loads += 1
+        return _Result(list(self.rows))
+
+
+@pytest.fixture
+def cache() -> RefDataCache:
+    cache = RefDataCache()
+    cache._listener = _Listener()  # type: ignore[assignment]
+    return cache
+
+
+async def test_hits_do_not_query(cache: RefDataCache) -> None:
+    conn = FakeConn()
+    for _ in range(3):
+        assert await cache.id_for(conn, "instrument_status", "ACTIVE") == ACTIVE  # type: ignore[arg-type]
+    assert conn.loads == 1
+
+
+async def test_unknown_codes_reload_once_per_interval(cache: RefDataCache, monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(refdata_module.time, "monotonic", lambda: now)
+    conn = FakeConn()
+    await cache.codes(conn, "instrument_status")  # type: ignore[arg-type]
+
+    for _ in range(5):
+        assert await cache.id_for(conn, "instrument_status", "BOGUS") is None  # type: ignore[arg-type]
+    assert conn.loads == 2
+
+    # A code added since is found by the next reload the interval allows
+    added = uuid4()
+    conn.rows.append(("NEW", added))
+    assert await cache.id_for(conn, "instrument_status", "NEW") is None  # type: ignore[arg-type]
+    now += refdata_module._MISS_RELOAD_INTERVAL_S
+    assert await cache.id_for(conn, "instrument_status", "NEW") == added  # type: ignore[arg-type]
+    assert conn.loads == 3
+
+
+async def test_inactive_cache_always_queries() -> None:
+    cache = RefDataCache()
+    conn = FakeConn()
+    for _ in range(3):
+        assert await cache.id_for(conn, "instrument_status", "ACTIVE") == ACTIVE  # type: ignore[arg-type]
+    assert conn.loads == 3
@@ -0,0 +1,131 @@
+"""Report bodies cached per mview generation (app.cache), served without a connection on a hit."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+import pytest
+
+import app.api.router as router_module
+from app.cache import ByteLRUCache, report_cache
+from app.main import app
+from app.refdata import DataVersion, refdata
+
+pytestmark = pytest.mark.anyio
+
+MVIEW = "mv_instruments_due_30d"
+V1 = DataVersion(1, 1_000)
+V2 = DataVersion(2, 2_000)
+
+
+def test_older_generation_never_replaces_newer() -> None:
+    cache = ByteLRUCache(1024)
+    cache.put("r", V2, b"new")
+    cache.put("r", V1, b"old")
+    assert cache.get("r", V1) == (V2, b"new")
+    assert cache.get("r", V2) == (V2, b"new")
+
+
+def test_newer_generation_misses_without_evicting() -> None:
+    cache = ByteLRUCache(1024)
+    cache.put("r", V1, b"old")
+    assert cache.get("r", V2) is None
+    # A reader still on V1 (the standby) keeps its hit
+    assert cache.get("r", V1) == (V1, b"old")
+    cache.put("r", V2, b"new")
+    assert cache.get("r", V2) == (V2, b"new")
+    assert cache.size == 3
+
+
+class _Listener:
+    def is_closed(self) -> bool:
+        return False
+
+
+class FakeDB:
+    """Stands in for router.read_conn: counts checkouts and renders at `version`."""
+
+    def __init__(self) -> None:
+        self.version = V1
+        self.checkouts = 0
+        self.statements: list[str] = []
+
+    @asynccontextmanager
+    async def read_conn(self, _request: Any) -> AsyncIterator[FakeDB]:
+        self.checkouts += 1
+        yield self
+
+    async def execute(self, stmt: Any, params: Any = None) -> Any:
+        sql = str(stmt)
+        self.statements.append(sql)
+        row = SimpleNamespace(version=self.version.version, changed_us=self.version.changed_us, body="[]")
+        return SimpleNamespace(one=lambda: row, first=lambda: row)
+
+
+@pytest.fixture
+def fake_db(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeDB]:
+    db = FakeDB()
+    monkeypatch.setattr(router_module, "read_conn", db.read_conn)
+    report_cache.clear()
+    try:
+        yield db
+    finally:
+        report_cache.clear()
+
+
+@pytest.fixture
+def listening(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(refdata, "_listener", _Listener())
+    monkeypatch.setattr(refdata, "_versions", {MVIEW: V1})
+
+
+async def _get(**headers: str) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get("/reports/due-30d", headers=headers)
+
+
+async def test_hits_and_304_do_not_check_out(fake_db: FakeDB, listening: None) -> None:
+    first = await _get()
+    assert first.status_code == 200
+    assert first.headers["ETag"] == V1.etag(MVIEW)
+    assert fake_db.checkouts == 1
+
+    assert (await _get()).content == first.content
+    assert (await _get(**{"If-None-Match": first.headers["ETag"]})).status_code == 304
+    assert fake_db.checkouts == 1
+
+
+async def test_notify_invalidates(fake_db: FakeDB, listening: None) -> None:
+    await _get()
+    fake_db.version = V2
+    refdata._on_data_version(None, 0, "", f"{MVIEW} {V2.version} {V2.changed_us}")
+
+    response = await _get(**{"If-None-Match": V1.etag(MVIEW)})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == V2.etag(MVIEW)
+    assert fake_db.checkouts == 2
+    # Late or replayed notifications never step back
+    refdata._on_data_version(None, 0, "", f"{MVIEW} {V1.version} {V1.changed_us}")
+    assert refdata.data_version(MVIEW) == V2
+
+
+async def test_lagging_render_is_served_under_its_own_tag(fake_db: FakeDB, listening: None) -> None:
+    refdata._on_data_version(None, 0, "", f"{MVIEW} {V2.version} {V2.changed_us}")
+    # The standby has not replayed the refresh yet
+    response = await _get()
+    assert response.headers["ETag"] == V1.etag(MVIEW)
+    assert report_cache.get(MVIEW, V1) == (V1, b"[]")
+
+
+async def test_without_listener_the_generation_is_queried(fake_db: FakeDB) -> None:
+    assert refdata.data_version(MVIEW) is None
+    await _get()
+    response = await _get()
+    assert response.headers["ETag"] == V1.etag(MVIEW)
+    # One connection per request: the generation query, then the cached body
+    assert fake_db.checkouts == 2
+    assert sum("json_agg" in s for s in fake_db.statements) == 1
@@ -0,0 +1,165 @@
+"""The row_count counters behind count=exact (migration 0012) must track count(*) through every kind of write."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.api.counts import exact_count
+from app.api.router import cruds
+
+pytestmark = [pytest.mark.anyio, pytest.mark.db]
+
+TABLES = ("instrument", "check_event", "document")
+# Writes to the counters made by the current transaction so far
+_COUNTER_WRITES_SQL = text(
+    "SELECT n_tup_ins + n_tup_upd FROM pg_stat_xact_user_tables WHERE relid = 'metrology.row_count'::regclass"
+)
+
+
+async def _assert_counts_exact(db: AsyncConnection) -> None:
+    for table in TABLES:
+        actual = await db.scalar(text(f"SELECT count(*) FROM metrology.{table}"))
+        assert await exact_count(db, table) == actual, table
+
+    by_org_unit = dict(
+        (await db.execute(text("SELECT org_unit_id, count(*) FROM metrology.instrument GROUP BY org_unit_id"))).all()
+    )
+    for org_unit_id in (await db.execute(text("SELECT id FROM metrology.org_unit"))).scalars():
+        assert await exact_count(db, "instrument", org_unit_id) == by_org_unit.get(org_unit_id, 0), org_unit_id
+
+
+async def _insert_instruments(db: AsyncConnection, org_unit: str, location: str, prefix: str, n: int) -> None:
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.instrument(instrument_model_id, inventory_no, org_unit_id, location_id, status_id)
+            SELECT m.id, :prefix || g, ou.id, l.id, st.id
+            FROM generate_series(1, :n) g, metrology.instrument_model m, metrology.org_unit ou,
+                 metrology.location l, metrology.instrument_status st
+            WHERE m.manufacturer = 'ACME' AND m.model_name = 'P-100'
+              AND ou.code = :org_unit AND l.org_unit_id = ou.id AND l.code = :location AND st.code = 'ACTIVE'
+            """
+        ),
+        {"prefix": prefix, "n": n, "org_unit": org_unit, "location": location},
+    )
+
+
+async def _insert_events(db: AsyncConnection, inventory_prefix: str) -> None:
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.check_event(instrument_id, check_type_id, lab_id, check_date, result_status_id)
+            SELECT i.id, ct.id, lab.id, current_date - 30, rs.id
+            FROM metrology.instrument i, metrology.check_type ct, metrology.lab, metrology.check_result_status rs
+            WHERE i.inventory_no LIKE :prefix || '%' AND ct.code = 'VERIF' AND lab.code = 'LAB_A' AND rs.code = 'PASSED'
+            """
+        ),
+        {"prefix": inventory_prefix},
+    )
+
+
+async def test_counters_follow_writes(db: AsyncConnection) -> None:
+    await _assert_counts_exact(db)
+
+    # Multi-row statements: one trigger run per statement, over the transition table
+    await db.execute(text("INSERT INTO metrology.org_unit(code, name) VALUES ('T-OU', 'Test unit')"))
+    await db.execute(
+        text(
+            "INSERT INTO metrology.location(org_unit_id, code, name) "
+            "SELECT id, 'T-LOC', 'Test location' FROM metrology.org_unit WHERE code = 'T-OU'"
+        )
+    )
+    await _insert_instruments(db, "T-OU", "T-LOC", "T-INV-", 5)
+    await _insert_instruments(db, "PROD", "LINE_1", "T-PROD-", 3)
+    await _insert_events(db, "T-")
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.document(document_type_id, title, storage_ref)
+            SELECT id, 'Test protocol ' || g, 's3://test/' || g FROM metrology.document_type, generate_series(1, 4) g
+            WHERE code = 'PROTOCOL'
+            """
+        )
+    )
+    await _assert_counts_exact(db)
+
+    # Moving instruments between org units shifts their per-unit counts, not the total
+    await db.execute(
+        text(
+            """
+            UPDATE metrology.instrument i
+            SET org_unit_id = l.org_unit_id, location_id = l.id
+            FROM metrology.location l
+            JOIN metrology.org_unit ou ON ou.id = l.org_unit_id
+            WHERE ou.code = 'PROD' AND l.code = 'LINE_2' AND i.inventory_no IN ('T-INV-1', 'T-INV-2')
+            """
+        )
+    )
+    # An update that leaves org_unit_id alone nets to nothing
+    await db.execute(text("UPDATE metrology.instrument SET serial_no = 'T-SN' WHERE inventory_no LIKE 'T-%'"))
+    await _assert_counts_exact(db)
+
+    await db.execute(
+        text(
+            "DELETE FROM metrology.check_event "
+            "WHERE instrument_id IN (SELECT id FROM metrology.instrument WHERE inventory_no LIKE 'T-PROD-%')"
+        )
+    )
+    await db.execute(
+        text(
+            "DELETE FROM metrology.instrument_status_history "
+            "WHERE instrument_id IN (SELECT id FROM metrology.instrument WHERE inventory_no LIKE 'T-PROD-%')"
+        )
+    )
+    await db.execute(text("DELETE FROM metrology.instrument WHERE inventory_no LIKE 'T-PROD-%'"))
+    await db.execute(text("DELETE FROM metrology.document WHERE storage_ref IN ('s3://test/1', 's3://test/2')"))
+    await _assert_counts_exact(db)
+
+    # Cascades to check_event_document; the truncate trigger zeroes check_event's counters
+    await db.execute(text("TRUNCATE metrology.check_event CASCADE"))
+    await _assert_counts_exact(db)
+    assert await exact_count(db, "check_event") == 0
+
+
+async def test_multi_row_insert_writes_one_counter(db: AsyncConnection) -> None:
+    before = await db.scalar(_COUNTER_WRITES_SQL)
+    # 50 rows, 50 audit_log rows from the per-row audit trigger: one upsert, for document only
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.document(document_type_id, title, storage_ref)
+            SELECT id, 'Bulk protocol ' || g, 's3://bulk/' || g FROM metrology.document_type, generate_series(1, 50) g
+            WHERE code = 'PROTOCOL'
+            """
+        )
+    )
+    assert await db.scalar(_COUNTER_WRITES_SQL) - before == 1
+    assert await db.scalar(text("SELECT count(*) FROM metrology.row_count WHERE table_name = 'audit_log'")) == 0
+    await _assert_counts_exact(db)
+
+
+async def test_rebuild_repairs_drift(db: AsyncConnection) -> None:
+    # What a bulk load with triggers disabled (bench.datagen) leaves behind
+    await db.execute(text("UPDATE metrology.row_count SET n = n + 7 WHERE table_name IN ('instrument', 'check_event')"))
+    await db.execute(text("DELETE FROM metrology.row_count WHERE table_name = 'document'"))
+    await db.execute(text("SELECT metrology.fn_rebuild_row_counts()"))
+    await _assert_counts_exact(db)
+
+
+async def test_total_count_exact_only_where_counted(db: AsyncConnection) -> None:
+    crud = cruds["instrument"]
+    total = await db.scalar(text("SELECT count(*) FROM metrology.instrument"))
+    assert await crud.total_count(db, "exact", {}) == (total, "exact")
+
+    org_unit_id = await db.scalar(text("SELECT id FROM metrology.org_unit WHERE code = 'PROD'"))
+    in_unit = await db.scalar(
+        text("SELECT count(*) FROM metrology.instrument WHERE org_unit_id = :id"), {"id": org_unit_id}
+    )
+    assert await crud.total_count(db, "exact", {"org_unit_id": org_unit_id}) == (in_unit, "exact")
+
+    # Other filters have no counter: the estimate is used, and the mode says so
+    location_id = await db.scalar(text("SELECT id FROM metrology.location WHERE code = 'LINE_1'"))
+    _, mode = await crud.total_count(db, "exact", {"org_unit_id": org_unit_id, "location_id": location_id})
+    assert mode == "estimate"
@@ -0,0 +1,68 @@
+"""GET /search ranks the best matches even when far more rows match than it pulls as candidates."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.api.router import SEARCH_CANDIDATES
+from app.db import get_read_conn
+from app.main import app
+
+pytestmark = [pytest.mark.anyio, pytest.mark.db]
+
+DECOYS = SEARCH_CANDIDATES * 5
+
+
+@pytest.fixture
+async def client(db: AsyncConnection) -> AsyncIterator[httpx.AsyncClient]:
+    async def conn() -> AsyncIterator[AsyncConnection]:
+        yield db
+
+    # "000123" is a close match for every GEN-000123xxx number (as generated by bench.datagen);
+    # the exact words are inserted last, so a scan in physical order reaches them last
+    await db.execute(
+        text(
+            """
+            INSERT INTO metrology.instrument(
+              instrument_model_id, inventory_no, serial_no, org_unit_id, location_id, status_id
+            )
+            SELECT m.id, v.inventory_no, v.serial_no, l.org_unit_id, l.id, st.id
+            FROM (
+              SELECT g, 'GEN-000123' || lpad(g::text, 3, '0'), NULL FROM generate_series(1, :decoys) g
+              UNION ALL SELECT :decoys + 1, 'T-000123', NULL
+              UNION ALL SELECT :decoys + 2, 'T-SERIAL', 'SN 000123'
+            ) v(n, inventory_no, serial_no),
+            metrology.instrument_model m, metrology.location l, metrology.instrument_status st
+            WHERE m.manufacturer = 'ACME' AND m.model_name = 'P-100' AND l.code = 'LINE_1' AND st.code = 'ACTIVE'
+            ORDER BY v.n
+            """
+        ),
+        {"decoys": DECOYS},
+    )
+    await db.execute(text("ANALYZE metrology.instrument"))
+    app.dependency_overrides[get_read_conn] = conn
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def test_best_matches_survive_the_candidate_cap(client: httpx.AsyncClient, db: AsyncConnection) -> None:
+    matching = await db.scalar(text("SELECT count(*) FROM metrology.instrument WHERE '000123' <% inventory_no"))
+    assert matching > SEARCH_CANDIDATES
+
+    response = await client.get("/search", params={"q": "000123", "limit": 5})
+    assert response.status_code == 200, response.text
+    instruments = [hit for hit in response.json() if hit["type"] == "instrument"]
+
+    assert len(instruments) == 5
+    # Whole-word matches by inventory and by serial number outrank every GEN-000123xxx
+    assert {hit["label"] for hit in instruments[:2]} == {"T-000123", "T-SERIAL"}
+    assert [hit["score"] for hit in instruments[:2]] == [1.0, 1.0]
+    assert all(hit["score"] < 1.0 for hit in instruments[2:])
@@ -0,0 +1,195 @@
+"""Serialization failure and deadlock retries in app.transactions, on a fake connection."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from typing import Any
+from uuid import uuid4
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import DBAPIError
+
+import app.transactions as transactions
+from app.db import get_conn
+from app.main import app
+from app.settings import settings
+from app.transactions import RetryBudget, run_transaction
+
+pytestmark = pytest.mark.anyio
+
+DECOMMISSION_ROUTE = "POST /instruments/{instrument_id}/decommission"
+
+
+class _Orig(Exception):
+    def __init__(self, sqlstate: str) -> None:
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+def _db_error(sqlstate: str) -> DBAPIError:
+    return DBAPIError("SELECT 1", {}, _Orig(sqlstate))
+
+
+class FakeConn:
+    """Records transactions and statements; the first `failures` statements raise `sqlstate`."""
+
+    def __init__(self, failures: int = 0, sqlstate: str = "40001") -> None:
+        self.failures = failures
+        self.sqlstate = sqlstate
+        self.log: list[str] = []
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[None]:
+        self.log.append("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.log.append("ROLLBACK")
+            raise
+        self.log.append("COMMIT")
+
+    async def execute(self, stmt: Any, params: Any = None) -> None:
+        self.log.append(" ".join(str(stmt).split()))
+        if self.failures:
+            self.failures -= 1
+            raise _db_error(self.sqlstate)
+
+
+def _metric(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture(autouse=True)
+def budget(monkeypatch: pytest.MonkeyPatch) -> RetryBudget:
+    """A fresh, full retry budget; retries do not sleep."""
+    monkeypatch.setattr(settings, "tx_max_attempts", 4)
+    monkeypatch.setattr(settings, "tx_retry_backoff_s", 0.0)
+    budget = RetryBudget(ratio=0.5, capacity=10)
+    monkeypatch.setattr(transactions, "retry_budget", budget)
+    return budget
+
+
+async def _statement(conn: FakeConn) -> str:
+    await conn.execute("SELECT 1")
+    return "ok"
+
+
+@pytest.mark.parametrize("sqlstate", ["40001", "40P01"])
+async def test_retries_until_success(sqlstate: str, budget: RetryBudget) -> None:
+    conn = FakeConn(failures=2, sqlstate=sqlstate)
+    retries = _metric("db_tx_retries_total", operation="op", sqlstate=sqlstate)
+
+    assert await run_transaction(conn, _statement, operation="op") == "ok"  # type: ignore[arg-type]
+
+    assert conn.log == ["BEGIN", "SELECT 1", "ROLLBACK"] * 2 + ["BEGIN", "SELECT 1", "COMMIT"]
+    assert _metric("db_tx_retries_total", operation="op", sqlstate=sqlstate) == retries + 2
+    # Full bucket: the deposit is capped, then each retry spends a token
+    assert budget.tokens == 10 - 2
+
+
+async def test_gives_up_after_max_attempts(budget: RetryBudget) -> None:
+    conn = FakeConn(failures=100)
+    exhausted = _metric("db_tx_retries_exhausted_total", operation="op", reason="attempts")
+
+    with pytest.raises(DBAPIError):
+        await run_transaction(conn, _statement, operation="op")  # type: ignore[arg-type]
+
+    assert conn.log.count("BEGIN") == settings.tx_max_attempts
+    assert conn.log.count("ROLLBACK") == settings.tx_max_attempts
+    assert _metric("db_tx_retries_exhausted_total", operation="op", reason="attempts") == exhausted + 1
+    assert budget.tokens == 10 - (settings.tx_max_attempts - 1)
+
+
+async def test_gives_up_when_budget_is_spent(budget: RetryBudget) -> None:
+    budget.tokens = 1.2
+    conn = FakeConn(failures=100)
+    exhausted = _metric("db_tx_retries_exhausted_total", operation="op", reason="budget")
+
+    with pytest.raises(DBAPIError):
+        await run_transaction(conn, _statement, operation="op")  # type: ignore[arg-type]
+
+    # 1.2 + 0.5 deposited: one retry fits, the second does not
+    assert conn.log.count("BEGIN") == 2
+    assert _metric("db_tx_retries_exhausted_total", operation="op", reason="budget") == exhausted + 1
+    assert budget.tokens == pytest.approx(0.7)
+
+
+async def test_budget_refills_with_transactions(budget: RetryBudget) -> None:
+    budget.tokens = 0
+    for _ in range(4):
+        await run_transaction(FakeConn(), _statement)  # type: ignore[arg-type]
+    assert budget.tokens == pytest.approx(2.0)
+    for _ in range(100):
+        await run_transaction(FakeConn(), _statement)  # type: ignore[arg-type]
+    assert budget.tokens == budget.capacity
+
+
+async def test_other_errors_are_not_retried() -> None:
+    conn = FakeConn(failures=1, sqlstate="23505")
+    with pytest.raises(DBAPIError):
+        await run_transaction(conn, _statement)  # type: ignore[arg-type]
+    assert conn.log == ["BEGIN", "SELECT 1", "ROLLBACK"]
+
+
+async def test_isolation_is_set_first_on_every_attempt() -> None:
+    conn = FakeConn(failures=1)
+    await run_transaction(conn, _statement, isolation="SERIALIZABLE")  # type: ignore[arg-type]
+    # The failing statement is the SET itself the first time round
+    assert conn.log == [
+        "BEGIN",
+        "SET TRANSACTION ISOLATION LEVEL SERIALIZABLE",
+        "ROLLBACK",
+        "BEGIN",
+        "SET TRANSACTION ISOLATION LEVEL SERIALIZABLE",
+        "SELECT 1",
+        "COMMIT",
+    ]
+
+
+@pytest.fixture
+def fake_conn() -> Iterator[FakeConn]:
+    conn = FakeConn()
+
+    async def override() -> AsyncIterator[FakeConn]:
+        yield conn
+
+    app.dependency_overrides[get_conn] = override
+    try:
+        yield conn
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def _decommission() -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.post(f"/instruments/{uuid4()}/decommission", json={"reason": "test"})
+
+
+async def test_endpoint_retries_with_route_isolation(fake_conn: FakeConn, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "tx_isolation", {DECOMMISSION_ROUTE: "REPEATABLE READ"})
+    fake_conn.failures = 2
+    retries = _metric("db_tx_retries_total", operation=DECOMMISSION_ROUTE, sqlstate="40001")
+
+    response = await _decommission()
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"status": "ok"}
+    assert fake_conn.log.count("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ") == 3
+    assert fake_conn.log[-1] == "COMMIT"
+    assert _metric("db_tx_retries_total", operation=DECOMMISSION_ROUTE, sqlstate="40001") == retries + 2
+
+
+@pytest.mark.parametrize("sqlstate, error", [("40001", "serialization_failure"), ("40P01", "deadlock_detected")])
+async def test_exhausted_retries_map_to_409(fake_conn: FakeConn, sqlstate: str, error: str) -> None:
+    fake_conn.failures = 100
+    fake_conn.sqlstate = sqlstate
+
+    response = await _decommission()
+
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"error": error, "retryable": True}
+    assert fake_conn.log.count("BEGIN") == settings.tx_max_attempts